@@ -0,0 +1,4 @@
+"""Бенчмарки производительности загрузки и построения отчётов.
+
+Запуск: python -m benchmarks.<имя_модуля>
+"""
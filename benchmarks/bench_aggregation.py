@@ -0,0 +1,90 @@
+"""Бенчмарк: движок группировки против загрузки строк в словарь.
+
+Сравнивает прежний путь отчёта (load_products_from_csv собирает все
+строки по брендам, среднее считается по спискам) с однопроходной
+агрегацией aggregate_products: быстрым путём (один ключ, одно среднее)
+и общим путём (несколько агрегатов).
+
+Запуск:
+    python -m benchmarks.bench_aggregation --rows 300000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.bench_compression import write_sample_csv
+from data.aggregation import Aggregate, GroupByAggregator
+from data.loader import aggregate_products, load_products_from_csv, safe_average
+
+
+def dict_average(filepaths: list[str]) -> dict:
+    """Средний рейтинг по брендам через загрузку всех строк в словарь."""
+    products = load_products_from_csv(filepaths)
+    return {
+        brand: safe_average([item["rating"] for item in items])
+        for brand, items in products.items()
+    }
+
+
+def engine_average(filepaths: list[str]) -> list[tuple]:
+    """Средний рейтинг по брендам движком группировки (быстрый путь)."""
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+    return aggregate_products(filepaths, aggregator).rows()
+
+
+def engine_general(filepaths: list[str]) -> list[tuple]:
+    """Средний рейтинг и количество по брендам (общий путь движка)."""
+    aggregator = GroupByAggregator(
+        ["brand"], [Aggregate("rating", "mean"), Aggregate("rating", "count")]
+    )
+    return aggregate_products(filepaths, aggregator).rows()
+
+
+def measure(run: Callable[[list[str]], object], filepaths: list[str], repeats: int) -> float:
+    """Измерить лучшее время прогона.
+
+    Args:
+        run: Функция, считающая отчёт по файлам
+        filepaths: Файлы для загрузки
+        repeats: Количество повторов
+
+    Returns:
+        Минимальное время в секундах
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run(filepaths)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    """Запустить бенчмарк и вывести таблицу результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    variants = [
+        ("dict", dict_average),
+        ("engine", engine_average),
+        ("engine+count", engine_general),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, "products.csv")
+        write_sample_csv(filepath, args.rows)
+
+        print(f"Строк: {args.rows}")
+        print(f"{'variant':<14}{'time, s':>10}{'rows/s':>12}")
+        for name, run in variants:
+            elapsed = measure(run, [filepath], args.repeats)
+            print(f"{name:<14}{elapsed:>10.3f}{args.rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Бенчмарк: загрузка сжатых CSV файлов против обычных.
+
+Генерирует синтетический CSV, сжимает его каждым доступным форматом
+и измеряет пропускную способность load_products_from_csv.
+
+Запуск:
+    python -m benchmarks.bench_compression --rows 500000
+"""
+
+import argparse
+import bz2
+import csv
+import gzip
+import lzma
+import os
+import random
+import tempfile
+import time
+
+from data.loader import load_products_from_csv, zstandard
+
+BRANDS = ["apple", "samsung", "xiaomi", "huawei", "oneplus", "google", "sony"]
+
+
+def write_sample_csv(filepath: str, rows: int, seed: int = 42) -> None:
+    """Записать синтетический CSV с товарами.
+
+    Args:
+        filepath: Путь к создаваемому файлу
+        rows: Количество строк данных
+        seed: Зерно генератора случайных чисел
+    """
+    rng = random.Random(seed)
+    with open(filepath, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "brand", "price", "rating"])
+        for index in range(rows):
+            writer.writerow(
+                [
+                    f"product {index}",
+                    rng.choice(BRANDS),
+                    rng.randint(100, 2000),
+                    round(rng.uniform(1.0, 5.0), 1),
+                ]
+            )
+
+
+def compress_file(source: str, target: str, compression: str) -> None:
+    """Сжать файл указанным форматом.
+
+    Args:
+        source: Исходный файл
+        target: Путь к сжатому файлу
+        compression: Формат сжатия ("gzip", "bz2", "xz", "zstd")
+    """
+    with open(source, "rb") as file:
+        payload = file.read()
+
+    if compression == "gzip":
+        payload = gzip.compress(payload)
+    elif compression == "bz2":
+        payload = bz2.compress(payload)
+    elif compression == "xz":
+        payload = lzma.compress(payload)
+    else:
+        payload = zstandard.ZstdCompressor().compress(payload)
+
+    with open(target, "wb") as file:
+        file.write(payload)
+
+
+def measure(filepaths: list[str], repeats: int, workers: int = 1) -> float:
+    """Измерить лучшее время загрузки файлов.
+
+    Args:
+        filepaths: Файлы для загрузки
+        repeats: Количество повторов
+        workers: Количество процессов загрузки
+
+    Returns:
+        Минимальное время загрузки в секундах
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        load_products_from_csv(filepaths, workers=workers)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    """Запустить бенчмарк и вывести таблицу результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    formats = ["plain", "gzip", "bz2", "xz"]
+    if zstandard is not None:
+        formats.append("zstd")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plain = os.path.join(tmpdir, "products.csv")
+        write_sample_csv(plain, args.rows)
+        plain_size = os.path.getsize(plain)
+
+        print(f"Строк: {args.rows}, размер CSV: {plain_size / 1e6:.1f} МБ")
+        print(f"{'format':<8}{'size, MB':>10}{'time, s':>10}{'MB/s':>10}{'rows/s':>12}")
+
+        for compression in formats:
+            if compression == "plain":
+                target = plain
+            else:
+                target = os.path.join(tmpdir, f"products.csv.{compression}")
+                compress_file(plain, target, compression)
+
+            # Параллельный путь имеет смысл только для нескольких файлов
+            filepaths = [target] * max(args.workers, 1)
+            elapsed = measure(filepaths, args.repeats, args.workers)
+            total_rows = args.rows * len(filepaths)
+            total_mb = plain_size * len(filepaths) / 1e6
+
+            print(
+                f"{compression:<8}{os.path.getsize(target) / 1e6:>10.2f}"
+                f"{elapsed:>10.3f}{total_mb / elapsed:>10.1f}"
+                f"{total_rows / elapsed:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
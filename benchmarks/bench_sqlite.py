@@ -0,0 +1,70 @@
+"""Бенчмарк: хранилище SQLite против разбора CSV в Python.
+
+Сравнивает время первичной загрузки и задержку запроса отчёта
+для каждого отчёта из реестра.
+
+Запуск:
+    python -m benchmarks.bench_sqlite --rows 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_compression import write_sample_csv
+from data.loader import aggregate_products
+from data.sqlite_store import ProductStore
+from reports import REPORTS_REGISTRY
+
+
+def best_of(repeats: int, action) -> float:
+    """Вернуть минимальное время выполнения действия в секундах."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    """Запустить бенчмарк и вывести таблицу результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "products.csv")
+        db_path = os.path.join(tmpdir, "products.db")
+        write_sample_csv(csv_path, args.rows)
+
+        with ProductStore(db_path) as store:
+            started = time.perf_counter()
+            store.sync([csv_path])
+            load_time = time.perf_counter() - started
+
+            print(f"Строк: {args.rows}")
+            print(f"Загрузка в SQLite (один раз): {load_time:.3f} с")
+            print(f"{'report':<20}{'python, s':>12}{'sqlite, s':>12}")
+
+            for name, report_class in REPORTS_REGISTRY.items():
+                report = report_class()
+                python_time = best_of(
+                    args.repeats,
+                    lambda: report.build(
+                        aggregate_products([csv_path], report.create_aggregator())
+                    ),
+                )
+                sqlite_time = best_of(
+                    args.repeats,
+                    lambda: report.build(
+                        store.aggregate(report.create_aggregator(), [csv_path])
+                    ),
+                )
+                print(f"{name:<20}{python_time:>12.3f}{sqlite_time:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
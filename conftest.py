@@ -0,0 +1,31 @@
+"""Общие fixtures и помощники тестов."""
+
+import pytest
+
+CSV_CONTENT = (
+    "name,brand,price,rating\n"
+    "iphone 15 pro,apple,999,4.9\n"
+    "iphone se,apple,429,4.1\n"
+    "galaxy s23 ultra,samsung,1199,4.8\n"
+    "redmi 10c,xiaomi,149,4.1\n"
+)
+
+
+def rounded(rows):
+    """Округлить дробные значения: суммы в другом порядке расходятся в последних знаках."""
+    return [
+        tuple(round(value, 9) if isinstance(value, float) else value for value in row)
+        for row in rows
+    ]
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    """Fixture: два CSV файла, iphone 15 pro есть в обоих."""
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text(CSV_CONTENT, encoding="utf-8")
+    second.write_text(
+        "name,brand,price,rating\niphone 15 pro,apple,949,4.7\n", encoding="utf-8"
+    )
+    return [str(first), str(second)]
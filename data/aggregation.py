@@ -0,0 +1,653 @@
+"""Движок группировки и агрегации данных о товарах.
+
+Группирует строки по одной или нескольким колонкам (в том числе
+вычисляемым, например ценовым диапазонам) и считает все запрошенные
+агрегаты за один проход. Значения ключей кодируются целыми числами,
+поэтому ключ группы — кортеж int-кодов, а не кортеж строк.
+"""
+
+import hashlib
+import math
+import sys
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+# Сколько групп просматривать при оценке занимаемой памяти
+MEMORY_SAMPLE_SIZE = 64
+# Накладные расходы на запись в dict (слот хеш-таблицы), байт
+DICT_ENTRY_OVERHEAD = 100
+# Точность HyperLogLog: 2**12 регистров, стандартная ошибка около 1.6%
+HLL_PRECISION = 12
+
+
+@dataclass(frozen=True)
+class Column:
+    """Колонка группировки, значение берётся из строки как есть."""
+
+    name: str
+
+    @property
+    def source(self) -> str:
+        """Колонка исходной строки, из которой берётся значение."""
+        return self.name
+
+    def extract(self, row: Mapping[str, Any]) -> Hashable:
+        """Получить значение ключа из строки."""
+        return row[self.name]
+
+    def label(self, value: Hashable) -> Any:
+        """Преобразовать значение ключа в значение для вывода."""
+        return value
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """Вычисляемая колонка: номер диапазона числовой колонки.
+
+    Границы задаются по возрастанию, значение попадает в диапазон
+    [edges[i-1], edges[i]). Ключом служит номер диапазона, поэтому
+    при сортировке диапазоны идут по порядку, а не по алфавиту подписей.
+    """
+
+    source: str
+    edges: tuple[float, ...]
+    name: str = ""
+    labels: Optional[tuple[str, ...]] = None
+
+    def __post_init__(self) -> None:
+        if list(self.edges) != sorted(self.edges):
+            raise ValueError(f"Границы диапазонов должны возрастать: {self.edges}")
+        if self.labels is not None and len(self.labels) != len(self.edges) + 1:
+            raise ValueError(
+                f"Нужно {len(self.edges) + 1} подписей для границ {self.edges}"
+            )
+
+    def extract(self, row: Mapping[str, Any]) -> Hashable:
+        """Получить номер диапазона для значения из строки."""
+        return bisect_right(self.edges, row[self.source])
+
+    def label(self, value: Hashable) -> Any:
+        """Получить подпись диапазона по его номеру."""
+        if self.labels is not None:
+            return self.labels[value]
+        if value == 0:
+            return f"<{self.edges[0]:g}"
+        if value == len(self.edges):
+            return f">={self.edges[-1]:g}"
+        return f"{self.edges[value - 1]:g}-{self.edges[value]:g}"
+
+
+KeyColumn = Union[Column, Bucket]
+
+
+class AggregateFunction(ABC):
+    """Агрегатная функция с состоянием, которое можно сливать.
+
+    Слияние состояний позволяет считать частичные агрегаты
+    независимо (по файлам, в разных процессах) и объединять их.
+    """
+
+    @abstractmethod
+    def initial(self) -> Any:
+        """Начальное состояние для новой группы."""
+
+    @abstractmethod
+    def update(self, state: Any, value: Any) -> Any:
+        """Учесть значение и вернуть новое состояние."""
+
+    @abstractmethod
+    def merge(self, left: Any, right: Any) -> Any:
+        """Слить два состояния и вернуть результат."""
+
+    @abstractmethod
+    def finalize(self, state: Any) -> Any:
+        """Получить итоговое значение из состояния."""
+
+
+class Count(AggregateFunction):
+    """Количество значений."""
+
+    def initial(self) -> int:
+        return 0
+
+    def update(self, state: int, value: Any) -> int:
+        return state + 1
+
+    def merge(self, left: int, right: int) -> int:
+        return left + right
+
+    def finalize(self, state: int) -> int:
+        return state
+
+
+class Sum(AggregateFunction):
+    """Сумма значений."""
+
+    def initial(self) -> float:
+        return 0.0
+
+    def update(self, state: float, value: float) -> float:
+        return state + value
+
+    def merge(self, left: float, right: float) -> float:
+        return left + right
+
+    def finalize(self, state: float) -> float:
+        return state
+
+
+class Mean(AggregateFunction):
+    """Среднее значение, состояние — [количество, сумма]."""
+
+    def initial(self) -> list:
+        return [0, 0.0]
+
+    def update(self, state: list, value: float) -> list:
+        state[0] += 1
+        state[1] += value
+        return state
+
+    def merge(self, left: list, right: list) -> list:
+        return [left[0] + right[0], left[1] + right[1]]
+
+    def finalize(self, state: list) -> Optional[float]:
+        if not state[0]:
+            return None
+        return state[1] / state[0]
+
+
+class Variance(AggregateFunction):
+    """Выборочная дисперсия, состояние — [количество, среднее, M2] (Уэлфорд).
+
+    Слияние состояний — по формуле Чана, без повторного прохода по данным.
+    """
+
+    def initial(self) -> list:
+        return [0, 0.0, 0.0]
+
+    def update(self, state: list, value: float) -> list:
+        state[0] += 1
+        delta = value - state[1]
+        state[1] += delta / state[0]
+        state[2] += delta * (value - state[1])
+        return state
+
+    def merge(self, left: list, right: list) -> list:
+        count = left[0] + right[0]
+        if not count:
+            return [0, 0.0, 0.0]
+        delta = right[1] - left[1]
+        mean = left[1] + delta * right[0] / count
+        m2 = left[2] + right[2] + delta * delta * left[0] * right[0] / count
+        return [count, mean, m2]
+
+    def finalize(self, state: list) -> Optional[float]:
+        if state[0] < 2:
+            return None
+        return state[2] / (state[0] - 1)
+
+
+class Min(AggregateFunction):
+    """Минимальное значение."""
+
+    def initial(self) -> Optional[float]:
+        return None
+
+    def update(self, state: Optional[float], value: float) -> float:
+        return value if state is None or value < state else state
+
+    def merge(self, left: Optional[float], right: Optional[float]) -> Optional[float]:
+        if left is None or right is None:
+            return right if left is None else left
+        return min(left, right)
+
+    def finalize(self, state: Optional[float]) -> Optional[float]:
+        return state
+
+
+class Max(AggregateFunction):
+    """Максимальное значение."""
+
+    def initial(self) -> Optional[float]:
+        return None
+
+    def update(self, state: Optional[float], value: float) -> float:
+        return value if state is None or value > state else state
+
+    def merge(self, left: Optional[float], right: Optional[float]) -> Optional[float]:
+        if left is None or right is None:
+            return right if left is None else left
+        return max(left, right)
+
+    def finalize(self, state: Optional[float]) -> Optional[float]:
+        return state
+
+
+class HyperLogLog(AggregateFunction):
+    """Оценка числа различных значений, состояние — регистры HyperLogLog.
+
+    Память на группу постоянна (2**precision байт) и не зависит от числа
+    значений. Хеш детерминирован (blake2b, а не hash()), поэтому состояния
+    из разных процессов сливаются поэлементным максимумом регистров.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION) -> None:
+        self.precision = precision
+        self.registers = 1 << precision
+        # Поправочный коэффициент alpha_m из статьи Flajolet et al.
+        self.alpha = 0.7213 / (1 + 1.079 / self.registers)
+
+    def initial(self) -> bytearray:
+        return bytearray(self.registers)
+
+    def update(self, state: bytearray, value: Any) -> bytearray:
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        # Позиция первой единицы в оставшихся битах
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > state[index]:
+            state[index] = rank
+        return state
+
+    def merge(self, left: bytearray, right: bytearray) -> bytearray:
+        return bytearray(map(max, left, right))
+
+    def finalize(self, state: bytearray) -> int:
+        estimate = self.alpha * self.registers**2 / sum(2.0**-rank for rank in state)
+        zeros = state.count(0)
+        if estimate <= 2.5 * self.registers and zeros:
+            # Малые значения точнее оцениваются линейным подсчётом
+            estimate = self.registers * math.log(self.registers / zeros)
+        return round(estimate)
+
+
+AGGREGATE_FUNCTIONS: dict[str, AggregateFunction] = {
+    "count": Count(),
+    "distinct": HyperLogLog(),
+    "sum": Sum(),
+    "mean": Mean(),
+    "var": Variance(),
+    "min": Min(),
+    "max": Max(),
+}
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """Описание агрегата: какую функцию к какой колонке применить."""
+
+    column: str
+    function: str
+    alias: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Название агрегата в результатах."""
+        return self.alias or f"{self.function}_{self.column}"
+
+
+class GroupByAggregator:
+    """Хеш-агрегация строк по одной или нескольким колонкам.
+
+    Каждое значение ключа кодируется порядковым номером в словаре своей
+    колонки, ключ группы — кортеж таких кодов. Для каждой группы хранится
+    список состояний агрегатных функций, все они обновляются за один проход.
+
+    Example:
+        >>> aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+        >>> aggregator.add({"brand": "apple", "rating": 4.9})
+        >>> aggregator.rows()
+        [('apple', 4.9)]
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Union[KeyColumn, str]],
+        aggregates: Sequence[Aggregate],
+    ) -> None:
+        """Создать агрегатор.
+
+        Args:
+            keys: Колонки группировки (строка — обычная колонка)
+            aggregates: Агрегаты, вычисляемые для каждой группы
+
+        Raises:
+            ValueError: Если нет колонок группировки или функция неизвестна
+        """
+        if not keys:
+            raise ValueError("Нужна хотя бы одна колонка группировки")
+
+        unknown = [a.function for a in aggregates if a.function not in AGGREGATE_FUNCTIONS]
+        if unknown:
+            available = ", ".join(AGGREGATE_FUNCTIONS)
+            raise ValueError(
+                f"Неизвестная агрегатная функция: {', '.join(unknown)}. "
+                f"Доступные: {available}"
+            )
+
+        self.keys: tuple[KeyColumn, ...] = tuple(
+            Column(key) if isinstance(key, str) else key for key in keys
+        )
+        self.aggregates: tuple[Aggregate, ...] = tuple(aggregates)
+        self.rows_seen = 0
+
+        self._plan = [
+            (aggregate.column, AGGREGATE_FUNCTIONS[aggregate.function])
+            for aggregate in self.aggregates
+        ]
+        self._dictionaries: list[dict[Hashable, int]] = [{} for _ in self.keys]
+        self._values: list[list[Hashable]] = [[] for _ in self.keys]
+        self._groups: dict[tuple[int, ...], list] = {}
+
+        # Быстрый путь для одной обычной колонки ключа: группа ищется
+        # по самому значению, без кортежа кодов. Списки состояний общие
+        # с self._groups.
+        self._key_name: Optional[str] = (
+            self.keys[0].name
+            if len(self.keys) == 1 and type(self.keys[0]) is Column  # pylint: disable=unidiomatic-typecheck
+            else None
+        )
+        self._by_value: dict[Hashable, list] = {}
+        # Единственный агрегат — среднее: его обновление встраивается в add()
+        self._mean_column: Optional[str] = (
+            self._plan[0][0]
+            if len(self._plan) == 1 and isinstance(self._plan[0][1], Mean)
+            else None
+        )
+
+    def __len__(self) -> int:
+        """Количество групп."""
+        return len(self._groups)
+
+    def spawn(self) -> "GroupByAggregator":
+        """Создать пустой агрегатор с той же конфигурацией."""
+        return GroupByAggregator(self.keys, self.aggregates)
+
+    def _encode(self, position: int, value: Hashable) -> int:
+        """Получить int-код значения ключа, добавив его в словарь при надобности."""
+        dictionary = self._dictionaries[position]
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(self._values[position])
+            self._values[position].append(value)
+        return code
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        """Учесть одну строку.
+
+        Args:
+            row: Строка данных с колонками ключей и агрегатов
+        """
+        if self._key_name is not None:
+            value = row[self._key_name]
+            states = self._by_value.get(value)
+            if states is None:
+                states = self._new_group((self._encode(0, value),))
+            if self._mean_column is not None:
+                state = states[0]
+                state[0] += 1
+                state[1] += row[self._mean_column]
+                self.rows_seen += 1
+                return
+        else:
+            key = tuple(
+                self._encode(position, column.extract(row))
+                for position, column in enumerate(self.keys)
+            )
+            states = self._groups.get(key)
+            if states is None:
+                states = self._new_group(key)
+
+        for index, (column, function) in enumerate(self._plan):
+            states[index] = function.update(states[index], row[column])
+
+        self.rows_seen += 1
+
+    def _new_group(self, key: tuple[int, ...]) -> list:
+        """Завести группу с начальными состояниями агрегатов.
+
+        Args:
+            key: Кортеж кодов значений ключей
+
+        Returns:
+            Список состояний новой группы
+        """
+        states = self._groups[key] = [function.initial() for _, function in self._plan]
+        if self._key_name is not None:
+            self._by_value[self._values[0][key[0]]] = states
+        return states
+
+    def add_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Учесть несколько строк.
+
+        Args:
+            rows: Итерируемая последовательность строк
+        """
+        for row in rows:
+            self.add(row)
+
+    def merge(self, other: "GroupByAggregator") -> None:
+        """Влить частичные агрегаты другого агрегатора с той же конфигурацией.
+
+        Args:
+            other: Агрегатор, посчитанный независимо (другой файл, процесс)
+
+        Raises:
+            ValueError: Если конфигурации агрегаторов различаются
+        """
+        if other.keys != self.keys or other.aggregates != self.aggregates:
+            raise ValueError("Нельзя слить агрегаторы с разной конфигурацией")
+
+        # Коды другого агрегатора переводятся в коды этого
+        remaps = [
+            [self._encode(position, value) for value in values]
+            for position, values in enumerate(other._values)  # pylint: disable=protected-access
+        ]
+
+        for other_key, other_states in other._groups.items():  # pylint: disable=protected-access
+            key = tuple(remap[code] for remap, code in zip(remaps, other_key))
+            states = self._groups.get(key)
+            if states is None:
+                states = self._new_group(key)
+            for index, (_, function) in enumerate(self._plan):
+                states[index] = function.merge(states[index], other_states[index])
+
+        self.rows_seen += other.rows_seen
+
+    def _merge_group(self, values: tuple, states: list) -> None:
+        """Влить состояния одной группы, заданной значениями ключей.
+
+        Args:
+            values: Исходные (не закодированные) значения ключей
+            states: Состояния агрегатных функций группы
+        """
+        key = tuple(
+            self._encode(position, value) for position, value in enumerate(values)
+        )
+        current = self._groups.get(key)
+        if current is None:
+            current = self._new_group(key)
+        for index, (_, function) in enumerate(self._plan):
+            current[index] = function.merge(current[index], states[index])
+
+    def estimate_memory(self) -> int:
+        """Оценить память, занятую группами и словарями ключей.
+
+        Размер считается по выборке групп и умножается на их число,
+        поэтому оценка дешёвая и подходит для частых проверок.
+
+        Returns:
+            Приблизительный объём в байтах
+        """
+        total = 0
+
+        if self._groups:
+            sample = list(islice(self._groups.items(), MEMORY_SAMPLE_SIZE))
+            per_group = sum(
+                sys.getsizeof(key)
+                + sys.getsizeof(states)
+                + sum(sys.getsizeof(state) for state in states)
+                for key, states in sample
+            ) / len(sample)
+            total += int((per_group + DICT_ENTRY_OVERHEAD) * len(self._groups))
+
+        for values in self._values:
+            if values:
+                sample = values[:MEMORY_SAMPLE_SIZE]
+                per_value = sum(sys.getsizeof(value) for value in sample) / len(sample)
+                # Значение хранится в словаре кодов и в списке значений
+                total += int((per_value + 2 * DICT_ENTRY_OVERHEAD) * len(values))
+
+        return total
+
+    def sorted_rows(self, key: Optional[Callable[[tuple], Any]] = None) -> Iterator[tuple]:
+        """Получить итоги без подписей, отсортированные по ключу.
+
+        Args:
+            key: Ключ сортировки строк из rows(labelled=False)
+
+        Returns:
+            Итератор по отсортированным строкам
+        """
+        return iter(sorted(self.rows(labelled=False), key=key))
+
+    def _total_states(self) -> list:
+        """Слить состояния всех групп в общие состояния агрегатов."""
+        totals = [function.initial() for _, function in self._plan]
+        for states in self._groups.values():
+            for index, (_, function) in enumerate(self._plan):
+                totals[index] = function.merge(totals[index], states[index])
+        return totals
+
+    def totals(self) -> dict[str, Any]:
+        """Получить агрегаты по всем строкам сразу, без группировки.
+
+        Считаются слиянием состояний групп за O(групп), повторный проход
+        по данным не нужен.
+
+        Returns:
+            Словарь {название_агрегата: значение}
+        """
+        return {
+            aggregate.name: function.finalize(state)
+            for aggregate, (_, function), state in zip(
+                self.aggregates, self._plan, self._total_states()
+            )
+        }
+
+    def results(self) -> list[tuple[tuple, dict[str, Any]]]:
+        """Получить итоги по группам.
+
+        Returns:
+            Список кортежей (значения ключей, {название_агрегата: значение})
+        """
+        names = [aggregate.name for aggregate in self.aggregates]
+        return [
+            (
+                self._decode(key),
+                {
+                    name: function.finalize(state)
+                    for name, (_, function), state in zip(names, self._plan, states)
+                },
+            )
+            for key, states in self._groups.items()
+        ]
+
+    def rows(self, labelled: bool = True) -> list[tuple]:
+        """Получить итоги по группам в виде плоских кортежей.
+
+        Args:
+            labelled: Подставить подписи вычисляемых колонок. С False
+                возвращаются исходные значения ключей (номера диапазонов),
+                удобные для сортировки; подписи добавляет label_row
+
+        Returns:
+            Список кортежей (*значения_ключей, *значения_агрегатов)
+        """
+        rows = [
+            tuple(values[code] for values, code in zip(self._values, key))
+            + tuple(
+                function.finalize(state)
+                for (_, function), state in zip(self._plan, states)
+            )
+            for key, states in self._groups.items()
+        ]
+        if labelled:
+            return [self.label_row(row) for row in rows]
+        return rows
+
+    def label_row(self, row: tuple) -> tuple:
+        """Подставить подписи колонок ключа в строку из rows(labelled=False)."""
+        width = len(self.keys)
+        labels = tuple(
+            column.label(value) for column, value in zip(self.keys, row[:width])
+        )
+        return labels + row[width:]
+
+    def _decode(self, key: tuple[int, ...]) -> tuple:
+        """Перевести ключ из int-кодов в значения для вывода."""
+        return tuple(
+            column.label(values[code])
+            for column, values, code in zip(self.keys, self._values, key)
+        )
+
+
+class AggregatorGroup:
+    """Несколько агрегаторов, заполняемых за один проход по данным.
+
+    Поддерживает тот же протокол, что и GroupByAggregator при загрузке
+    (add, spawn, merge, rows_seen), поэтому его можно передать
+    в data.loader.aggregate_products вместо одного агрегатора.
+    """
+
+    def __init__(self, aggregators: Sequence[GroupByAggregator]) -> None:
+        """Создать группу.
+
+        Args:
+            aggregators: Агрегаторы, каждый получает каждую строку
+
+        Raises:
+            ValueError: Если список агрегаторов пуст
+        """
+        if not aggregators:
+            raise ValueError("Нужен хотя бы один агрегатор")
+        self.aggregators = list(aggregators)
+
+    @property
+    def rows_seen(self) -> int:
+        """Количество учтённых строк (одинаково для всех агрегаторов)."""
+        return self.aggregators[0].rows_seen
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        """Передать строку всем агрегаторам."""
+        for aggregator in self.aggregators:
+            aggregator.add(row)
+
+    def add_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Передать строки всем агрегаторам."""
+        for row in rows:
+            self.add(row)
+
+    def spawn(self) -> "AggregatorGroup":
+        """Создать группу пустых агрегаторов с той же конфигурацией."""
+        return AggregatorGroup([aggregator.spawn() for aggregator in self.aggregators])
+
+    def merge(self, other: "AggregatorGroup") -> None:
+        """Влить частичные агрегаты другой группы попарно."""
+        for aggregator, partial in zip(self.aggregators, other.aggregators):
+            aggregator.merge(partial)
@@ -0,0 +1,311 @@
+"""Отсев повторяющихся товаров при загрузке.
+
+Один и тот же товар (бренд, название) встречается в нескольких файлах.
+Deduplicator пропускает только первую его запись. Ключи проверяются
+сначала фильтром Блума фиксированного размера: если фильтр отвечает
+«не встречался», товар точно новый. Только при положительном (возможно,
+ложном) ответе ключ сверяется с точным множеством ключей, которое
+хранится на диске в SQLite, поэтому память не растёт с числом товаров.
+
+Для параллельной загрузки строки раскладываются по разделам хешем
+ключа (key_partition): повторы товара всегда оказываются в одном
+разделе, и отсев внутри разделов точен.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import zlib
+from typing import Any, Callable, Iterator, Mapping, Optional, Sequence
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.01
+# Колонки, по которым товар считается тем же самым
+DEDUPE_KEY = ("brand", "name")
+# Сколько новых ключей копить в памяти перед записью на диск
+FLUSH_SIZE = 10_000
+
+
+def product_key(product: Mapping[str, Any], key: Sequence[str]) -> Optional[str]:
+    """Ключ товара: значения колонок через разделитель.
+
+    Returns:
+        Ключ или None, если какая-то из колонок пустая (например,
+        в файле нет колонки name): такой товар не опознать
+    """
+    values = [str(product[column]) for column in key]
+    if not all(values):
+        return None
+    return "\x1f".join(values)
+
+
+def key_partition(product: Mapping[str, Any], key: Sequence[str], partitions: int) -> int:
+    """Номер раздела товара по хешу ключа.
+
+    crc32 не зависит от PYTHONHASHSEED, поэтому номер совпадает во всех
+    процессах. Строки без ключа не отсеиваются и попадают в раздел 0.
+
+    Args:
+        product: Строка {name, brand, price, rating}
+        key: Колонки ключа
+        partitions: Количество разделов
+
+    Returns:
+        Номер раздела от 0 до partitions - 1
+    """
+    value = product_key(product, key)
+    if value is None:
+        return 0
+    return zlib.crc32(value.encode("utf-8")) % partitions
+
+
+class BloomFilter:
+    """Фильтр Блума: множество без ложноотрицательных ответов.
+
+    Позиции битов получаются двойным хешированием одного дайджеста
+    blake2b, поэтому фильтры из разных процессов совместимы и сливаются
+    побитовым ИЛИ.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """Создать фильтр.
+
+        Args:
+            capacity: Ожидаемое количество ключей
+            error_rate: Допустимая доля ложноположительных ответов
+                при заполнении до capacity
+
+        Raises:
+            ValueError: Если параметры вне допустимых границ
+        """
+        if capacity <= 0:
+            raise ValueError(f"Ёмкость фильтра должна быть положительной: {capacity}")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"Доля ошибок должна быть в (0, 1): {error_rate}")
+
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        """Номера битов ключа."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[bit >> 3] & (1 << (bit & 7)) for bit in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Добавить ключ.
+
+        Returns:
+            True, если все биты ключа уже были установлены
+            (ключ, возможно, встречался раньше)
+        """
+        seen = True
+        for bit in self._positions(key):
+            mask = 1 << (bit & 7)
+            if not self._bits[bit >> 3] & mask:
+                seen = False
+                self._bits[bit >> 3] |= mask
+        return seen
+
+    def merge(self, other: "BloomFilter") -> None:
+        """Объединить с фильтром того же размера.
+
+        Raises:
+            ValueError: Если размеры или число хешей различаются
+        """
+        if (other.size, other.hashes) != (self.size, self.hashes):
+            raise ValueError("Нельзя слить фильтры Блума разного размера")
+        merged = int.from_bytes(self._bits, "little") | int.from_bytes(other._bits, "little")
+        self._bits = bytearray(merged.to_bytes(len(self._bits), "little"))
+
+
+class Deduplicator:
+    """Пропускает только первую запись каждого товара.
+
+    Состояние (фильтр и точное множество ключей) можно сливать, как
+    счётчики RowValidator, и передавать между процессами: так
+    aggregate_products собирает отсев по разделам, обработанным
+    в отдельных процессах. Временные файлы удаляются в close()
+    (или при выходе из with).
+
+    Example:
+        >>> with Deduplicator() as deduplicator:
+        ...     aggregate_products(files, aggregator, deduplicator=deduplicator)
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        key: Sequence[str] = DEDUPE_KEY,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        """Создать фильтр повторов.
+
+        Args:
+            capacity: Ожидаемое количество различных товаров (размер фильтра)
+            error_rate: Доля ложных срабатываний фильтра, которые
+                приходится проверять по диску
+            key: Колонки, по которым товар считается тем же самым
+            spill_dir: Каталог для временной базы ключей (по умолчанию системный)
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.key = tuple(key)
+        self.spill_dir = spill_dir
+        self.duplicates = 0
+        # Сколько раз фильтр ошибся и ключ пришлось искать на диске зря
+        self.false_positives = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._pending: set[str] = set()
+        self._workdir: Optional[tempfile.TemporaryDirectory] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "Deduplicator":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def spawn(self) -> "Deduplicator":
+        """Создать пустой фильтр с теми же параметрами."""
+        return Deduplicator(self.capacity, self.error_rate, self.key, self.spill_dir)
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Состояние для передачи между процессами.
+
+        Ключи с диска переносятся в память: временная база остаётся
+        у исходного объекта.
+        """
+        state = self.__dict__.copy()
+        state["_pending"] = set(self.keys())
+        state["_workdir"] = None
+        state["_connection"] = None
+        return state
+
+    @property
+    def empty(self) -> bool:
+        """Не запомнено ни одного ключа."""
+        return not self._pending and self._connection is None
+
+    def _key(self, product: Mapping[str, Any]) -> Optional[str]:
+        """Ключ товара (None для строк с пустой колонкой ключа)."""
+        return product_key(product, self.key)
+
+    def is_new(self, product: Mapping[str, Any]) -> bool:
+        """Проверить, встречался ли товар, и запомнить его.
+
+        Строки с пустым значением колонки ключа не отсеиваются:
+        иначе все товары бренда без названия слились бы в один.
+
+        Args:
+            product: Строка {name, brand, price, rating}
+
+        Returns:
+            True для первой записи товара и для строк без ключа
+        """
+        key = self._key(product)
+        if key is None:
+            return True
+        if not self._bloom.add(key):
+            self._remember(key)
+            return True
+
+        if key in self._pending or self._stored(key):
+            self.duplicates += 1
+            return False
+
+        self.false_positives += 1
+        self._remember(key)
+        return True
+
+    def filter(self, consume: Callable[[dict], None]) -> Callable[[dict], None]:
+        """Обернуть обработчик строк: повторы до него не доходят.
+
+        Args:
+            consume: Обработчик строки
+
+        Returns:
+            Обработчик, пропускающий только первые записи товаров
+        """
+
+        def consume_new(product: dict) -> None:
+            if self.is_new(product):
+                consume(product)
+
+        return consume_new
+
+    def keys(self) -> Iterator[str]:
+        """Все запомненные ключи (из памяти и с диска)."""
+        yield from self._pending
+        if self._connection is not None:
+            for (key,) in self._connection.execute("SELECT key FROM seen"):
+                yield key
+
+    def merge(self, other: "Deduplicator") -> None:
+        """Добавить ключи и счётчики другого фильтра.
+
+        Args:
+            other: Фильтр с теми же параметрами
+
+        Raises:
+            ValueError: Если параметры фильтров различаются
+        """
+        if other.key != self.key:
+            raise ValueError("Нельзя слить фильтры повторов с разными ключами")
+        self._bloom.merge(other._bloom)  # pylint: disable=protected-access
+        for key in other.keys():
+            self._remember(key)
+        self.duplicates += other.duplicates
+        self.false_positives += other.false_positives
+
+    def _remember(self, key: str) -> None:
+        """Запомнить ключ, при накоплении пачки записать её на диск."""
+        self._pending.add(key)
+        if len(self._pending) >= FLUSH_SIZE:
+            self._flush()
+
+    def _stored(self, key: str) -> bool:
+        """Проверить ключ по базе на диске."""
+        if self._connection is None:
+            return False
+        return (
+            self._connection.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone()
+            is not None
+        )
+
+    def _flush(self) -> None:
+        """Записать накопленные ключи на диск и освободить память."""
+        if self._connection is None:
+            self._workdir = tempfile.TemporaryDirectory(  # pylint: disable=consider-using-with
+                prefix="brand-dedupe-", dir=self.spill_dir
+            )
+            self._connection = sqlite3.connect(os.path.join(self._workdir.name, "seen.db"))
+            self._connection.execute("PRAGMA journal_mode=OFF")
+            self._connection.execute("PRAGMA synchronous=OFF")
+            self._connection.execute("CREATE TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                ((key,) for key in self._pending),
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Удалить временную базу ключей."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._workdir is not None:
+            self._workdir.cleanup()
+            self._workdir = None
+        self._pending.clear()
@@ -0,0 +1,348 @@
+"""Распределённая загрузка: координатор раздаёт шарды файлов воркерам.
+
+Координатор слушает TCP-сокет, воркеры подключаются к нему
+(multiprocessing.connection: кадры с pickle и проверкой общего ключа
+HMAC). Воркер забирает шард — список файлов, — разбирает его обычным
+data.loader и возвращает частичные агрегаты; координатор сливает их
+в агрегатор отчёта. Если воркер умер или оборвал соединение, его шард
+возвращается в очередь и достаётся другому воркеру.
+
+Локальные воркеры запускаются подпроцессами. Воркер на другой машине
+запускается вручную с тем же ключом в переменной окружения:
+
+    BRAND_WORKER_AUTHKEY=<hex> python -m data.distributed --connect host:port
+
+Файлы шарда должны быть доступны воркеру по тем же путям.
+"""
+
+import argparse
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener, wait
+from typing import Any, Optional, Sequence
+
+from data.aggregation import GroupByAggregator
+from data.loader import DEFAULT_ENCODING, _aggregate_file
+from data.validation import RowValidator
+
+AUTHKEY_ENV = "BRAND_WORKER_AUTHKEY"
+DEFAULT_ADDRESS = ("127.0.0.1", 0)
+# Сколько раз шард можно назначить, прежде чем сдаться
+MAX_ATTEMPTS = 3
+# Сколько ждать первого подключения воркера, в секундах
+CONNECT_TIMEOUT = 30.0
+POLL_INTERVAL = 0.1
+HANDSHAKE_TIMEOUT = 5.0
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ShardError(Exception):
+    """Распределённая загрузка не удалась: нет воркеров или шард не обработан."""
+
+
+def parse_address(value: str) -> tuple[str, int]:
+    """Разобрать адрес вида "host:port".
+
+    Args:
+        value: Строка с адресом
+
+    Returns:
+        Кортеж (хост, порт)
+
+    Raises:
+        ValueError: Если строка не похожа на адрес
+    """
+    host, separator, port = value.rpartition(":")
+    if not separator or not host or not port.isdigit():
+        raise ValueError(f"Некорректный адрес: {value}")
+    return host, int(port)
+
+
+def load_shard(
+    filepaths: Sequence[str],
+    aggregator: GroupByAggregator,
+    encoding: str = DEFAULT_ENCODING,
+    validator: Optional[RowValidator] = None,
+) -> tuple[GroupByAggregator, int, Optional[RowValidator]]:
+    """Агрегировать файлы одного шарда.
+
+    Args:
+        filepaths: Файлы шарда
+        aggregator: Пустой агрегатор с конфигурацией отчёта
+        encoding: Кодировка файлов
+        validator: Проверка строк перед агрегацией
+
+    Returns:
+        Кортеж (агрегатор, количество прочитанных файлов, валидатор)
+    """
+    loaded = 0
+    for filepath in filepaths:
+        loaded += _aggregate_file(filepath, aggregator, encoding, validator)[1]
+    return aggregator, loaded, validator
+
+
+def run_worker(address: tuple[str, int], authkey: bytes) -> None:
+    """Обрабатывать шарды координатора, пока он не пришлёт None.
+
+    Args:
+        address: Адрес координатора
+        authkey: Общий ключ
+    """
+    with Client(address, authkey=authkey) as connection:
+        connection.send(os.getpid())
+        while True:
+            try:
+                task = connection.recv()
+            except EOFError:
+                return
+            if task is None:
+                return
+
+            shard_id, filepaths, aggregator, encoding, validator = task
+            try:
+                result = load_shard(filepaths, aggregator, encoding, validator)
+            except Exception as error:  # pylint: disable=broad-except
+                connection.send(("error", shard_id, repr(error)))
+            else:
+                connection.send(("done", shard_id, *result))
+
+
+class ShardCoordinator:
+    """Раздача шардов воркерам и слияние частичных агрегатов.
+
+    Example:
+        >>> coordinator = ShardCoordinator(local_workers=4)
+        >>> coordinator.aggregate([["a.csv"], ["b.csv", "c.csv"]], aggregator)
+    """
+
+    def __init__(
+        self,
+        local_workers: int = 2,
+        address: tuple[str, int] = DEFAULT_ADDRESS,
+        authkey: Optional[bytes] = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        connect_timeout: float = CONNECT_TIMEOUT,
+    ) -> None:
+        """Создать координатор.
+
+        Args:
+            local_workers: Сколько воркеров запустить подпроцессами
+                (0 — только внешние воркеры)
+            address: Адрес для подключения воркеров (порт 0 — любой свободный)
+            authkey: Общий ключ (по умолчанию из BRAND_WORKER_AUTHKEY
+                или случайный)
+            max_attempts: Сколько раз назначать шард, прежде чем сдаться
+            connect_timeout: Сколько ждать воркеров, когда подключённых нет
+        """
+        if authkey is None:
+            env_key = os.environ.get(AUTHKEY_ENV)
+            authkey = bytes.fromhex(env_key) if env_key else os.urandom(32)
+
+        self.local_workers = local_workers
+        self.address = address
+        self.authkey = authkey
+        self.max_attempts = max_attempts
+        self.connect_timeout = connect_timeout
+        # Сколько шардов было переназначено из-за сбоев воркеров
+        self.reassigned = 0
+
+    def _worker_command(self, address: tuple[str, int]) -> list[str]:
+        """Команда запуска локального воркера."""
+        host, port = address
+        return [sys.executable, "-m", "data.distributed", "--connect", f"{host}:{port}"]
+
+    def _start_worker(self, address: tuple[str, int]) -> subprocess.Popen:
+        """Запустить локальный воркер подпроцессом."""
+        env = dict(os.environ)
+        env[AUTHKEY_ENV] = self.authkey.hex()
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")])
+        )
+        return subprocess.Popen(  # pylint: disable=consider-using-with
+            self._worker_command(address), env=env
+        )
+
+    def aggregate(
+        self,
+        shards: Sequence[Sequence[str]],
+        aggregator: Any,
+        encoding: str = DEFAULT_ENCODING,
+        validator: Optional[RowValidator] = None,
+    ) -> int:
+        """Агрегировать шарды на воркерах и слить результаты в агрегатор.
+
+        Args:
+            shards: Шарды — списки файлов
+            aggregator: Агрегатор отчёта (или AggregatorGroup)
+            encoding: Кодировка файлов
+            validator: Проверка строк; счётчики воркеров сливаются в него
+
+        Returns:
+            Количество прочитанных файлов
+
+        Raises:
+            ShardError: Если адрес занят, не осталось воркеров или шард
+                не удалось обработать за max_attempts попыток
+            ValueError: Если воркер упал с ошибкой при разборе шарда
+        """
+        template = aggregator.spawn()
+        template_validator = validator.spawn() if validator is not None else None
+        pending = deque(range(len(shards)))
+        attempts: Counter[int] = Counter()
+        files_loaded = 0
+
+        def requeue(shard_id: int) -> None:
+            if attempts[shard_id] >= self.max_attempts:
+                raise ShardError(
+                    f"Шард {list(shards[shard_id])} не обработан "
+                    f"за {self.max_attempts} попыток"
+                )
+            self.reassigned += 1
+            pending.appendleft(shard_id)
+
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        except OSError as error:
+            raise ShardError(f"Не удалось слушать адрес {self.address}: {error}") from error
+
+        with listener:
+            accepted: queue.Queue = queue.Queue()
+            stopped = threading.Event()
+
+            def accept_loop() -> None:
+                while not stopped.is_set():
+                    try:
+                        connection = listener.accept()
+                        # Воркер первым делом сообщает свой pid
+                        if connection.poll(HANDSHAKE_TIMEOUT):
+                            accepted.put((connection, connection.recv()))
+                        else:
+                            connection.close()
+                    except (OSError, EOFError, AuthenticationError):
+                        # Воркер не прошёл проверку ключа или listener закрыт
+                        continue
+
+            threading.Thread(target=accept_loop, daemon=True).start()
+
+            processes = [
+                self._start_worker(listener.address) for _ in range(self.local_workers)
+            ]
+            # Упавший локальный воркер перезапускается, но не бесконечно
+            restarts_left = self.local_workers * self.max_attempts
+            idle: list[Connection] = []
+            busy: dict[Connection, int] = {}
+            connected_pids: set[int] = set()
+
+            def take_accepted() -> None:
+                while not accepted.empty():
+                    connection, pid = accepted.get()
+                    connected_pids.add(pid)
+                    idle.append(connection)
+
+            waiting_since = time.monotonic()
+
+            try:
+                while pending or busy:
+                    take_accepted()
+
+                    while idle and pending:
+                        connection = idle.pop()
+                        shard_id = pending.popleft()
+                        attempts[shard_id] += 1
+                        try:
+                            connection.send(
+                                (shard_id, list(shards[shard_id]), template, encoding,
+                                 template_validator)
+                            )
+                        except OSError:
+                            connection.close()
+                            requeue(shard_id)
+                            continue
+                        busy[connection] = shard_id
+
+                    for index, process in enumerate(processes):
+                        if process.poll() is not None and pending and restarts_left:
+                            restarts_left -= 1
+                            processes[index] = self._start_worker(listener.address)
+
+                    if busy or idle:
+                        waiting_since = time.monotonic()
+                    elif time.monotonic() - waiting_since > self.connect_timeout:
+                        raise ShardError("Нет доступных воркеров")
+
+                    for connection in wait(list(busy), timeout=POLL_INTERVAL):
+                        shard_id = busy.pop(connection)
+                        try:
+                            status, _, *payload = connection.recv()
+                        except (EOFError, OSError):
+                            connection.close()
+                            requeue(shard_id)
+                            continue
+
+                        if status == "error":
+                            raise ValueError(
+                                f"Ошибка воркера на шарде {list(shards[shard_id])}: "
+                                f"{payload[0]}"
+                            )
+
+                        partial, loaded, partial_validator = payload
+                        aggregator.merge(partial)
+                        files_loaded += loaded
+                        if validator is not None:
+                            validator.merge(partial_validator)
+                        idle.append(connection)
+            finally:
+                # Разбудить поток, ждущий в accept(), чтобы он завершился
+                stopped.set()
+                try:
+                    socket.create_connection(listener.address, timeout=1).close()
+                except OSError:
+                    pass
+                take_accepted()
+
+                for connection in [*idle, *busy]:
+                    try:
+                        connection.send(None)
+                    except OSError:
+                        pass
+                    connection.close()
+                for process in processes:
+                    # Воркер, не успевший подключиться, не получит команду завершения
+                    if process.pid not in connected_pids:
+                        process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.wait()
+
+        return files_loaded
+
+
+def main() -> int:
+    """Запустить воркер из командной строки."""
+    parser = argparse.ArgumentParser(description="Воркер распределённой загрузки")
+    parser.add_argument(
+        "--connect", required=True, type=parse_address, help="Адрес координатора host:port"
+    )
+    args = parser.parse_args()
+
+    env_key = os.environ.get(AUTHKEY_ENV)
+    if not env_key:
+        print(f"❌ Не задан ключ в переменной окружения {AUTHKEY_ENV}")
+        return 1
+
+    run_worker(args.connect, bytes.fromhex(env_key))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
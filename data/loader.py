@@ -1,30 +1,519 @@
 """Модуль для загрузки и обработки данных из CSV файлов.
 
 Этот модуль содержит функции для чтения CSV файлов с данными
-о товарах и их рейтингах.
+о товарах и их рейтингах. Сжатые файлы (gzip, bz2, xz, zstd)
+распознаются по сигнатуре и распаковываются потоково во время парсинга.
+Вместо файла можно передать "-" (stdin) или именованный канал.
 """
 
+import bz2
 import csv
+import gzip
+import io
+import lzma
 import os
+import pickle
+import stat
+import sys
+import tempfile
 from collections import defaultdict
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import repeat
+from typing import IO, Any, Callable, Iterator, Mapping, Optional
+
+from data.aggregation import GroupByAggregator
+from data.dedupe import Deduplicator, key_partition
+from data.spill import _read_frames
+from data.validation import VALIDATION_BATCH_SIZE, RowValidator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - зависит от окружения
+    zstandard = None
 
 # Константы
 DEFAULT_ENCODING = "utf-8"
 MAX_RETRIES = 3
+READ_BUFFER_SIZE = 1024 * 1024
+# Сколько строк писать одним кадром при раскладке по разделам отсева повторов
+PARTITION_FRAME_SIZE = 10_000
+# Путь, означающий стандартный ввод
+STDIN_PATH = "-"
+
+# Сигнатуры сжатых форматов (magic bytes)
+GZIP_MAGIC = b"\x1f\x8b"
+BZ2_MAGIC = b"BZh"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Ошибки распаковки, которые не наследуются от OSError
+DECOMPRESSION_ERRORS: tuple[type[Exception], ...] = (EOFError, lzma.LZMAError)
+if zstandard is not None:
+    DECOMPRESSION_ERRORS += (zstandard.ZstdError,)
+
+
+def detect_compression(header: bytes) -> Optional[str]:
+    """Определить формат сжатия по первым байтам файла.
+
+    Args:
+        header: Начало файла (достаточно 6 байт)
+
+    Returns:
+        Название формата ("gzip", "bz2", "xz", "zstd") или None
+        для несжатого файла
+    """
+    if header.startswith(GZIP_MAGIC):
+        return "gzip"
+    if header.startswith(BZ2_MAGIC):
+        return "bz2"
+    if header.startswith(XZ_MAGIC):
+        return "xz"
+    if header.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def is_stream_input(filepath: str) -> bool:
+    """Проверить, что вход читается потоком: stdin ("-") или именованный канал.
+
+    Потоковый вход можно прочитать только один раз: его нельзя перемотать,
+    разобрать в другом процессе или отпечатать по размеру и mtime.
+
+    Args:
+        filepath: Путь к файлу или "-"
+
+    Returns:
+        True для stdin и именованных каналов
+    """
+    if filepath == STDIN_PATH:
+        return True
+    try:
+        return stat.S_ISFIFO(os.stat(filepath).st_mode)
+    except OSError:
+        return False
+
+
+class _PrefixedReader(io.RawIOBase):
+    """Поток, который сначала отдаёт уже прочитанное начало, затем остальное.
+
+    Нужен для каналов: начало прочитано ради сигнатуры сжатия,
+    а вернуть его в канал нельзя.
+    """
+
+    def __init__(self, prefix: bytes, stream: io.BufferedReader) -> None:
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        # Не больше одного чтения, чтобы данные разбирались по мере поступления
+        return self._stream.readinto1(buffer)
+
+
+def _decompressing_reader(raw: io.BufferedReader, compression: str) -> IO[bytes]:
+    """Обернуть бинарный поток в потоковый распаковщик.
+
+    Args:
+        raw: Исходный бинарный поток (не закрывается распаковщиком)
+        compression: Формат сжатия из detect_compression
+
+    Returns:
+        Бинарный поток с распакованными данными
+
+    Raises:
+        OSError: Если поток сжат zstd, а пакет zstandard не установлен
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(raw, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(raw, mode="rb")
+    if zstandard is None:
+        raise OSError("Для чтения zstd нужен пакет zstandard")
+    # Склеенные кадры (cat a.zst b.zst) — один поток, как у gzip
+    return zstandard.ZstdDecompressor().stream_reader(
+        raw, closefd=False, read_across_frames=True
+    )
+
+
+@contextmanager
+def open_products_file(
+    filepath: str, encoding: str = DEFAULT_ENCODING
+) -> Iterator[IO[str]]:
+    """Открыть файл с товарами как текстовый поток.
+
+    Формат сжатия определяется по сигнатуре, а не по расширению.
+    Сжатые файлы распаковываются на лету, без временных файлов на диске.
+
+    Данные читаются блоками по READ_BUFFER_SIZE и декодируются
+    инкрементально, поэтому stdin и каналы разбираются по мере поступления.
+
+    Args:
+        filepath: Путь к файлу (сжатому или обычному) или "-" для stdin
+        encoding: Кодировка файла
+
+    Yields:
+        Текстовый поток, пригодный для csv.reader
+
+    Raises:
+        OSError: Если файл сжат zstd, а пакет zstandard не установлен
+    """
+    if filepath == STDIN_PATH:
+        # stdin не закрывается вместе с потоком
+        raw_file = open(  # pylint: disable=consider-using-with
+            sys.stdin.fileno(), "rb", buffering=READ_BUFFER_SIZE, closefd=False
+        )
+    else:
+        raw_file = open(  # pylint: disable=consider-using-with
+            filepath, "rb", buffering=READ_BUFFER_SIZE
+        )
+
+    with raw_file as raw:
+        # peek делает не больше одного чтения: канал может отдать меньше
+        # байт сигнатуры, поэтому начало читается до конца
+        header = raw.read(len(XZ_MAGIC))
+        compression = detect_compression(header)
+        if raw.seekable():
+            raw.seek(-len(header), io.SEEK_CUR)
+            source: IO[bytes] = raw
+        else:
+            source = io.BufferedReader(
+                _PrefixedReader(header, raw), buffer_size=READ_BUFFER_SIZE
+            )
+
+        if compression is None:
+            stream: IO[bytes] = source
+        else:
+            stream = io.BufferedReader(
+                _decompressing_reader(source, compression),
+                buffer_size=READ_BUFFER_SIZE,
+            )
+
+        with io.TextIOWrapper(stream, encoding=encoding, newline="") as text:
+            yield text
+
+
+def parse_product(row: Mapping[str, Optional[str]]) -> dict:
+    """Преобразовать строку CSV в товар с типизированными полями.
+
+    Args:
+        row: Строка из csv.DictReader
+
+    Returns:
+        Словарь {name, brand, price, rating}
+
+    Raises:
+        KeyError: Если нет колонки brand, price или rating
+        ValueError: Если цена или рейтинг не число
+        AttributeError: Если в строке не хватает значений
+    """
+    return {
+        "name": (row.get("name") or "").strip(),
+        "brand": row["brand"].strip(),
+        "price": float(row["price"]),
+        "rating": float(row["rating"]),
+    }
+
+
+class _ValidatingSink:
+    """Копит товары пачкой и передаёт обработчику только прошедшие проверку."""
+
+    def __init__(self, consume: Callable[[dict], None], validator: RowValidator) -> None:
+        self._consume = consume
+        self._validator = validator
+        self._products: list[dict] = []
+        self._prices: list[float] = []
+        self._ratings: list[float] = []
+
+    def __call__(self, product: dict) -> None:
+        self._products.append(product)
+        self._prices.append(product["price"])
+        self._ratings.append(product["rating"])
+        if len(self._products) >= VALIDATION_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Проверить накопленную пачку и передать дальше валидные товары."""
+        rejected = self._validator.validate(self._prices, self._ratings)
+        if rejected:
+            skip = set(rejected)
+            for index, product in enumerate(self._products):
+                if index not in skip:
+                    self._consume(product)
+        else:
+            for product in self._products:
+                self._consume(product)
+
+        self._products.clear()
+        self._prices.clear()
+        self._ratings.clear()
+
+
+def _read_products(
+    filepath: str,
+    encoding: str,
+    consume: Callable[[dict], None],
+    validator: Optional[RowValidator] = None,
+    deduplicator: Optional[Deduplicator] = None,
+) -> bool:
+    """Прочитать один CSV файл и передать каждый товар обработчику.
+
+    Args:
+        filepath: Путь к файлу или "-" для stdin
+        encoding: Кодировка файла
+        consume: Обработчик строки {name, brand, price, rating}
+        validator: Проверка строк пачками перед передачей обработчику
+        deduplicator: Отсев повторов товаров после проверки
+
+    Returns:
+        True если файл прочитан целиком, False иначе
+    """
+    if not (os.path.isfile(filepath) or is_stream_input(filepath)):
+        print(f"Файл не найден: {filepath}")
+        return False
+
+    if deduplicator is not None:
+        consume = deduplicator.filter(consume)
+
+    sink = None
+    if validator is not None:
+        sink = consume = _ValidatingSink(consume, validator)
+
+    try:
+        with open_products_file(filepath, encoding) as file:
+            reader = csv.DictReader(file)
+
+            if reader.fieldnames is None:
+                print(f"Нет заголовков в {filepath}")
+                return False
+
+            for row in reader:
+                try:
+                    product = parse_product(row)
+                except (ValueError, KeyError, AttributeError) as error:
+                    print(f"Ошибка парсинга в {filepath}: {error}")
+                    continue
+
+                consume(product)
+
+        return True
+
+    except FileNotFoundError:
+        # Уже проверили выше, но может быть race condition
+        print(f"❌ Файл не найден: {filepath}")
+    except PermissionError:
+        print(f"❌ Нет прав доступа к файлу: {filepath}")
+    except UnicodeDecodeError as error:
+        print(f"❌ Ошибка кодировки в {filepath}: {error}")
+    except csv.Error as error:
+        print(f"❌ Ошибка парсинга CSV в {filepath}: {error}")
+    except OSError as error:
+        # Ловит файловые ошибки (IOError, исключение ОС, битый gzip)
+        print(f"❌ Ошибка при чтении {filepath}: {error}")
+    except DECOMPRESSION_ERRORS as error:
+        print(f"❌ Ошибка распаковки {filepath}: {error}")
+    finally:
+        if sink is not None:
+            sink.flush()
+
+    return False
+
+
+def _load_file(filepath: str, encoding: str) -> tuple[dict[str, list[dict]], bool]:
+    """Загрузить один CSV файл в словарь {бренд: [продукты]}.
+
+    Args:
+        filepath: Путь к файлу
+        encoding: Кодировка файла
+
+    Returns:
+        Кортеж (словарь {бренд: [продукты]}, был ли файл прочитан)
+    """
+    products = defaultdict(list)
+
+    def consume(product: dict) -> None:
+        products[product["brand"]].append(
+            {
+                "rating": product["rating"],
+                "price": product["price"],
+            }
+        )
+
+    loaded = _read_products(filepath, encoding, consume)
+    return dict(products), loaded
+
+
+def _aggregate_file(
+    filepath: str,
+    aggregator: GroupByAggregator,
+    encoding: str,
+    validator: Optional[RowValidator] = None,
+    deduplicator: Optional[Deduplicator] = None,
+) -> tuple[GroupByAggregator, bool, Optional[RowValidator]]:
+    """Агрегировать один CSV файл.
+
+    Args:
+        filepath: Путь к файлу
+        aggregator: Агрегатор, в который добавляются строки
+        encoding: Кодировка файла
+        validator: Проверка строк перед агрегацией
+        deduplicator: Отсев повторов товаров
+
+    Returns:
+        Кортеж (агрегатор, был ли файл прочитан, валидатор со счётчиками)
+    """
+    loaded = _read_products(filepath, encoding, aggregator.add, validator, deduplicator)
+    return aggregator, loaded, validator
+
+
+def _partition_file(
+    filepath: str,
+    encoding: str,
+    validator: Optional[RowValidator],
+    key: tuple[str, ...],
+    paths: list[str],
+) -> tuple[bool, Optional[RowValidator]]:
+    """Разобрать CSV файл и разложить товары по разделам ключа отсева.
+
+    Args:
+        filepath: Путь к файлу
+        encoding: Кодировка файла
+        validator: Проверка строк; отклонённые строки в разделы не попадают
+        key: Колонки ключа отсева повторов
+        paths: Файлы разделов этого входного файла
+
+    Returns:
+        Кортеж (был ли файл прочитан, валидатор со счётчиками)
+    """
+    frames: list[list[dict]] = [[] for _ in paths]
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(path, "wb")) for path in paths]
+
+        def consume(product: dict) -> None:
+            partition = key_partition(product, key, len(paths))
+            frame = frames[partition]
+            frame.append(product)
+            if len(frame) >= PARTITION_FRAME_SIZE:
+                pickle.dump(frame, files[partition], protocol=pickle.HIGHEST_PROTOCOL)
+                frame.clear()
+
+        loaded = _read_products(filepath, encoding, consume, validator)
+        for file, frame in zip(files, frames):
+            if frame:
+                pickle.dump(frame, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return loaded, validator
+
+
+def _aggregate_partition(
+    paths: list[str],
+    aggregator: GroupByAggregator,
+    deduplicator: Deduplicator,
+) -> tuple[GroupByAggregator, Deduplicator]:
+    """Агрегировать раздел без повторов.
+
+    Args:
+        paths: Части раздела в порядке входных файлов
+        aggregator: Пустой агрегатор
+        deduplicator: Пустой фильтр повторов
+
+    Returns:
+        Кортеж (агрегатор, фильтр с ключами раздела)
+    """
+    consume = deduplicator.filter(aggregator.add)
+    for path in paths:
+        for frame in _read_frames(path):
+            for product in frame:
+                consume(product)
+    return aggregator, deduplicator
+
+
+def _aggregate_deduplicated(
+    filepaths: list[str],
+    aggregator: GroupByAggregator,
+    encoding: str,
+    workers: int,
+    validator: Optional[RowValidator],
+    deduplicator: Deduplicator,
+) -> int:
+    """Параллельная агрегация с отсевом повторов.
+
+    Сначала файлы разбираются в отдельных процессах, и строки
+    раскладываются по workers разделам хешем ключа товара. Затем каждый
+    раздел отсеивается и агрегируется в своём процессе: повторы товара
+    лежат в одном разделе в порядке файлов, поэтому учитывается та же
+    первая запись, что и при последовательной загрузке.
+
+    Returns:
+        Количество прочитанных файлов
+    """
+    with tempfile.TemporaryDirectory(
+        prefix="brand-dedupe-", dir=deduplicator.spill_dir
+    ) as workdir, ProcessPoolExecutor(max_workers=workers) as executor:
+        paths = [
+            [os.path.join(workdir, f"file-{index}-part-{part}.bin") for part in range(workers)]
+            for index in range(len(filepaths))
+        ]
+        file_validator = validator.spawn() if validator is not None else None
+        futures = [
+            None if is_stream_input(filepath)
+            else executor.submit(
+                _partition_file,
+                filepath,
+                encoding,
+                file_validator,
+                deduplicator.key,
+                paths[index],
+            )
+            for index, filepath in enumerate(filepaths)
+        ]
+        # Потоковые входы недоступны дочерним процессам и читаются здесь
+        files_loaded = 0
+        for index, filepath in enumerate(filepaths):
+            if futures[index] is None:
+                files_loaded += _partition_file(
+                    filepath, encoding, validator, deduplicator.key, paths[index]
+                )[0]
+        for future in futures:
+            if future is not None:
+                loaded, partial_validator = future.result()
+                files_loaded += loaded
+                if validator is not None:
+                    validator.merge(partial_validator)
+
+        results = executor.map(
+            _aggregate_partition,
+            [[file_paths[part] for file_paths in paths] for part in range(workers)],
+            repeat(aggregator.spawn()),
+            repeat(deduplicator.spawn()),
+        )
+        for partial, partial_deduplicator in results:
+            aggregator.merge(partial)
+            deduplicator.merge(partial_deduplicator)
+    return files_loaded
 
 
 def load_products_from_csv(
     filepaths: list[str],
     encoding: str = DEFAULT_ENCODING,
     raise_on_empty: bool = True,  # Добавляем флаг
+    workers: int = 1,
 ) -> dict[str, list[dict]]:
     """Загрузить данные из CSV файлов.
 
     Args:
-        filepaths: Список путей к CSV файлам
+        filepaths: Список путей к CSV файлам (в том числе сжатым)
         encoding: Кодировка файла (по умолчанию utf-8)
         raise_on_empty: Выбросить ошибку если ничего не загружено
+        workers: Количество процессов для параллельной загрузки файлов
 
     Returns:
         Словарь, где ключ — название бренда, значение — список продуктов
@@ -36,53 +525,116 @@ def load_products_from_csv(
     products = defaultdict(list)
     files_loaded = 0
 
-    for filepath in filepaths:
-        if not os.path.isfile(filepath):
-            print(f"Файл не найден: {filepath}")
-            continue
+    if workers > 1 and len(filepaths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                None if is_stream_input(filepath)
+                else executor.submit(_load_file, filepath, encoding)
+                for filepath in filepaths
+            ]
+            # Потоковые входы недоступны дочерним процессам и читаются здесь
+            streamed = {
+                index: _load_file(filepath, encoding)
+                for index, filepath in enumerate(filepaths)
+                if futures[index] is None
+            }
+            results = [
+                streamed[index] if future is None else future.result()
+                for index, future in enumerate(futures)
+            ]
+    else:
+        results = [_load_file(filepath, encoding) for filepath in filepaths]
 
-        try:
-            with open(filepath, "r", encoding=encoding) as file:
-                reader = csv.DictReader(file)
+    # Результаты сливаются в порядке файлов, поэтому порядок не зависит от workers
+    for file_products, loaded in results:
+        for brand, items in file_products.items():
+            products[brand].extend(items)
+        files_loaded += loaded
 
-                if reader.fieldnames is None:
-                    print(f"Нет заголовков в {filepath}")
-                    continue
+    if files_loaded == 0 and raise_on_empty:
+        raise ValueError("Не удалось загрузить ни один файл")
+
+    return dict(products)
 
-                for row in reader:
-                    try:
-                        brand = row["brand"].strip()
-                        rating = float(row["rating"])
-                        price = float(row["price"])
-
-                        products[brand].append(
-                            {
-                                "rating": rating,
-                                "price": price,
-                            }
-                        )
-                    except (ValueError, KeyError) as error:
-                        print(f"Ошибка парсинга в {filepath}: {error}")
-
-                files_loaded += 1
-
-        except FileNotFoundError:
-            # Уже проверили выше, но может быть race condition
-            print(f"❌ Файл не найден: {filepath}")
-        except PermissionError:
-            print(f"❌ Нет прав доступа к файлу: {filepath}")
-        except UnicodeDecodeError as error:
-            print(f"❌ Ошибка кодировки в {filepath}: {error}")
-        except csv.Error as error:
-            print(f"❌ Ошибка парсинга CSV в {filepath}: {error}")
-        except OSError as error:
-            # Ловит файловые ошибки (IOError, исключение ОС)
-            print(f"❌ Ошибка при чтении {filepath}: {error}")
+
+def aggregate_products(
+    filepaths: list[str],
+    aggregator: GroupByAggregator,
+    encoding: str = DEFAULT_ENCODING,
+    raise_on_empty: bool = True,
+    workers: int = 1,
+    validator: Optional[RowValidator] = None,
+    deduplicator: Optional[Deduplicator] = None,
+) -> GroupByAggregator:
+    """Агрегировать товары из CSV файлов за один проход.
+
+    В отличие от load_products_from_csv строки не сохраняются в памяти:
+    каждая сразу учитывается в агрегаторе. При workers > 1 файлы
+    агрегируются в отдельных процессах, частичные агрегаты сливаются.
+
+    Args:
+        filepaths: Список путей к CSV файлам (в том числе сжатым)
+        aggregator: Агрегатор, в который добавляются строки
+        encoding: Кодировка файлов
+        raise_on_empty: Выбросить ошибку если ничего не загружено
+        workers: Количество процессов для параллельной агрегации
+        validator: Проверка строк перед агрегацией; отклонённые строки
+            не учитываются, их количество по правилам копится в validator
+        deduplicator: Учитывать только первую запись каждого товара.
+            При workers > 1 строки делятся между процессами по хешу
+            ключа товара; если в фильтре уже есть ключи прошлых
+            загрузок, файлы читаются в этом процессе последовательно
+
+    Returns:
+        Тот же агрегатор с учтёнными строками
+
+    Raises:
+        ValueError: Если не удалось загрузить ни одного файла
+        и raise_on_empty=True
+    """
+    files_loaded = 0
+
+    parallel = workers > 1 and len(filepaths) > 1
+    if parallel and deduplicator is not None and not deduplicator.empty:
+        print(
+            "Фильтр повторов уже содержит ключи: файлы читаются в одном процессе",
+            file=sys.stderr,
+        )
+        parallel = False
+
+    if parallel and deduplicator is not None:
+        files_loaded = _aggregate_deduplicated(
+            filepaths, aggregator, encoding, workers, validator, deduplicator
+        )
+    elif parallel:
+        streams = [filepath for filepath in filepaths if is_stream_input(filepath)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _aggregate_file,
+                [filepath for filepath in filepaths if filepath not in streams],
+                repeat(aggregator.spawn()),
+                repeat(encoding),
+                repeat(validator.spawn() if validator is not None else None),
+            )
+            # Потоковые входы недоступны дочерним процессам: они читаются
+            # здесь, пока процессы разбирают обычные файлы
+            for filepath in streams:
+                files_loaded += _aggregate_file(filepath, aggregator, encoding, validator)[1]
+            for partial, loaded, partial_validator in results:
+                aggregator.merge(partial)
+                files_loaded += loaded
+                if validator is not None:
+                    validator.merge(partial_validator)
+    else:
+        for filepath in filepaths:
+            files_loaded += _aggregate_file(
+                filepath, aggregator, encoding, validator, deduplicator
+            )[1]
 
     if files_loaded == 0 and raise_on_empty:
         raise ValueError("Не удалось загрузить ни один файл")
 
-    return dict(products)
+    return aggregator
 
 
 def safe_average(values: list[float]) -> Optional[float]:
@@ -0,0 +1,412 @@
+"""Выборочное чтение CSV файлов для быстрых приближённых отчётов.
+
+Обычные (несжатые) файлы делятся на блоки фиксированного размера,
+в выборку блок попадает с заданной вероятностью. Невыбранные блоки
+пропускаются через seek и не читаются с диска. Строка относится к блоку,
+в котором она начинается, поэтому каждая строка учитывается не больше
+одного раза. Поля с переводом строки внутри кавычек не поддерживаются.
+
+Сжатые файлы, stdin и именованные каналы нельзя читать с произвольного
+места: для них выборка делается по строкам, разбираются только
+выбранные строки.
+
+Каждая выбранная строка помечается блоком, из которого она пришла
+(колонка SAMPLE_BLOCK). Строки одного блока соседние в файле и похожи
+друг на друга, поэтому погрешность среднего оценивается по разбросу
+между блоками (кластерная выборка), а не по разбросу строк.
+"""
+
+import csv
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, Mapping, Optional
+
+from data.aggregation import Column, GroupByAggregator
+from data.loader import (
+    DECOMPRESSION_ERRORS,
+    DEFAULT_ENCODING,
+    XZ_MAGIC,
+    _decompressing_reader,
+    _ValidatingSink,
+    detect_compression,
+    is_stream_input,
+    open_products_file,
+    parse_product,
+)
+from data.validation import RowValidator
+
+BLOCK_SIZE = 64 * 1024
+# Запас при переводе --sample-rows в долю блоков: лишнее срежет резервуар
+OVERSAMPLING = 1.25
+# Колонка строки с блоком выборки, из которого она пришла
+SAMPLE_BLOCK = "sample_block"
+# На сколько случайных групп делятся строки построчной выборки
+ROW_GROUPS = 100
+# Сколько сжатых байт распаковать для оценки числа строк сжатого файла
+ESTIMATE_COMPRESSED_BYTES = 4 * BLOCK_SIZE
+
+
+@dataclass(frozen=True)
+class SampleBlock(Column):
+    """Колонка группировки по блоку выборки.
+
+    Строки без отметки блока (добавленные не через sample_products)
+    считаются одним общим блоком.
+    """
+
+    name: str = SAMPLE_BLOCK
+
+    def extract(self, row: Mapping[str, Any]) -> Hashable:
+        """Получить блок строки или None, если строка не из выборки."""
+        return row.get(self.name)
+
+
+@dataclass
+class SampleStats:
+    """Сколько данных прочитано при построении выборки."""
+
+    bytes_total: int = 0
+    bytes_read: int = 0
+    rows_sampled: int = 0
+
+    @property
+    def fraction_read(self) -> float:
+        """Доля прочитанных байт от общего размера файлов."""
+        if not self.bytes_total:
+            return 0.0
+        return self.bytes_read / self.bytes_total
+
+
+def _is_compressed(filepath: str) -> bool:
+    """Проверить, сжат ли файл (по сигнатуре)."""
+    with open(filepath, "rb") as file:
+        return detect_compression(file.read(len(XZ_MAGIC))) is not None
+
+
+def _consume_lines(
+    lines: Iterable[str],
+    fieldnames: list[str],
+    filepath: str,
+    consume: Callable[[dict], None],
+    block: Callable[[], Hashable],
+) -> None:
+    """Разобрать выбранные строки и передать товары обработчику.
+
+    Args:
+        lines: Выбранные строки CSV без заголовка
+        fieldnames: Колонки из заголовка файла
+        filepath: Путь к файлу (для сообщений об ошибках)
+        consume: Обработчик товара
+        block: Возвращает блок выборки для очередного товара
+    """
+    for row in csv.DictReader(lines, fieldnames=fieldnames):
+        try:
+            product = parse_product(row)
+        except (ValueError, KeyError, AttributeError) as error:
+            print(f"Ошибка парсинга в {filepath}: {error}")
+            continue
+        product[SAMPLE_BLOCK] = block()
+        consume(product)
+
+
+def _estimate_compressed_rows(filepath: str, compression: str) -> int:
+    """Оценить число строк сжатого файла по распакованному началу.
+
+    Распаковывается около ESTIMATE_COMPRESSED_BYTES сжатых байт, число
+    строк в них пересчитывается на полный размер файла.
+    """
+    with open(filepath, "rb") as raw:
+        size = os.fstat(raw.fileno()).st_size
+        lines = 0
+        with _decompressing_reader(raw, compression) as reader:
+            while raw.tell() < ESTIMATE_COMPRESSED_BYTES:
+                chunk = reader.read(BLOCK_SIZE)
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+        consumed = raw.tell()
+
+    # Первая строка — заголовок
+    rows = max(lines - 1, 0)
+    if not consumed or consumed >= size:
+        return rows
+    return int(rows * size / consumed)
+
+
+def estimate_rows(filepath: str) -> Optional[int]:
+    """Оценить количество строк файла.
+
+    Для несжатого файла — по длине строк первого блока, для сжатого —
+    по распакованному началу файла.
+
+    Args:
+        filepath: Путь к файлу
+
+    Returns:
+        Оценка числа строк данных или None, если файл не удалось прочитать
+    """
+    try:
+        with open(filepath, "rb") as file:
+            compression = detect_compression(file.read(len(XZ_MAGIC)))
+            if compression is None:
+                file.seek(0)
+                file.readline()
+                data_start = file.tell()
+                size = os.fstat(file.fileno()).st_size
+                head = file.read(BLOCK_SIZE)
+        if compression is not None:
+            return _estimate_compressed_rows(filepath, compression)
+    except (OSError, *DECOMPRESSION_ERRORS):
+        return None
+
+    lines = head.count(b"\n")
+    if not lines:
+        return 1 if head else 0
+    return int((size - data_start) / (len(head) / lines))
+
+
+def _sample_blocks(
+    filepath: str,
+    rate: float,
+    rng: random.Random,
+    consume: Callable[[dict], None],
+    encoding: str,
+    read_blocks: set[int],
+) -> tuple[int, bool]:
+    """Прочитать случайные блоки несжатого файла.
+
+    Из ещё не прочитанных блоков выбирается хотя бы один, поэтому
+    маленький файл не выпадает из выборки целиком.
+
+    Args:
+        filepath: Путь к файлу
+        rate: Вероятность выбора каждого непрочитанного блока
+        rng: Генератор случайных чисел
+        consume: Обработчик товаров
+        encoding: Кодировка файла
+        read_blocks: Начала уже прочитанных блоков; пропускаются
+            и пополняются прочитанными сейчас
+
+    Returns:
+        Количество прочитанных байт и признак, что непрочитанных
+        блоков не осталось
+    """
+    with open(filepath, "rb") as file:
+        header = file.readline().decode(encoding)
+        fieldnames = next(csv.reader([header]), None)
+        if not fieldnames:
+            print(f"Нет заголовков в {filepath}")
+            return file.tell(), True
+
+        data_start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        bytes_read = covered_until = data_start if not read_blocks else 0
+
+        unread = [
+            block_start
+            for block_start in range(data_start, size, BLOCK_SIZE)
+            if block_start not in read_blocks
+        ]
+        selected = [block_start for block_start in unread if rng.random() < rate]
+        if not selected and unread:
+            selected = [rng.choice(unread)]
+
+        for block_start in selected:
+            # Хвост строки, начатой в предыдущем блоке, относится к нему.
+            # Перед block_start всегда есть хотя бы перевод строки заголовка
+            file.seek(block_start - 1)
+            file.readline()
+
+            block_end = block_start + BLOCK_SIZE
+            lines = []
+            while file.tell() < block_end:
+                line = file.readline()
+                if not line:
+                    break
+                lines.append(line.decode(encoding))
+
+            # Соседние выбранные блоки перекрываются на одну строку
+            bytes_read += file.tell() - max(block_start - 1, covered_until)
+            covered_until = file.tell()
+            read_blocks.add(block_start)
+            block = (filepath, block_start)
+            _consume_lines(lines, fieldnames, filepath, consume, lambda: block)
+
+    return bytes_read, len(selected) == len(unread)
+
+
+def _sample_stream(
+    filepath: str,
+    rate: float,
+    rng: random.Random,
+    consume: Callable[[dict], None],
+    encoding: str,
+) -> int:
+    """Сделать построчную выборку из сжатого файла или потока.
+
+    Returns:
+        Количество прочитанных байт (файл читается целиком); размер
+        потока заранее неизвестен, для него считаются прочитанные символы
+    """
+    read = 0
+
+    def selected(lines: Iterable[str]) -> Iterable[str]:
+        nonlocal read
+        for line in lines:
+            read += len(line)
+            if rng.random() < rate:
+                yield line
+
+    with open_products_file(filepath, encoding) as file:
+        header = file.readline()
+        read += len(header)
+        fieldnames = next(csv.reader([header]), None)
+        if fieldnames:
+            # Строки выбираются независимо, блоками служат случайные группы
+            _consume_lines(
+                selected(file),
+                fieldnames,
+                filepath,
+                consume,
+                lambda: (filepath, rng.randrange(ROW_GROUPS)),
+            )
+        else:
+            print(f"Нет заголовков в {filepath}")
+
+    return read if is_stream_input(filepath) else os.path.getsize(filepath)
+
+
+def sample_products(
+    filepaths: list[str],
+    aggregator: GroupByAggregator,
+    rate: Optional[float] = None,
+    rows: Optional[int] = None,
+    seed: Optional[int] = None,
+    encoding: str = DEFAULT_ENCODING,
+    validator: Optional[RowValidator] = None,
+) -> SampleStats:
+    """Агрегировать случайную выборку товаров из CSV файлов.
+
+    Ровно один из параметров rate и rows должен быть задан. С rate каждый
+    блок (для сжатых файлов — строка) попадает в выборку с этой вероятностью.
+    В каждом несжатом файле читается хотя бы один блок.
+
+    С rows доля оценивается по числу строк каждого файла с запасом (потоки
+    выбираются с той же долей, что и файлы с известным размером), а лишние
+    строки отсекаются резервуарной выборкой (алгоритм R) до rows штук.
+    Если строк набралось меньше rows, из несжатых файлов дочитываются
+    ещё не прочитанные блоки.
+
+    Args:
+        filepaths: Пути к CSV файлам (в том числе сжатым)
+        aggregator: Агрегатор, в который добавляются выбранные строки
+        rate: Доля выборки, от 0 до 1
+        rows: Желаемый размер выборки в строках
+        seed: Зерно генератора для воспроизводимой выборки
+        encoding: Кодировка файлов
+        validator: Проверка строк перед агрегацией
+
+    Returns:
+        Статистика прочитанных данных
+
+    Raises:
+        ValueError: Если не задан ровно один из rate и rows
+            или они вне допустимых границ
+    """
+    if (rate is None) == (rows is None):
+        raise ValueError("Нужно задать ровно одно: долю выборки или число строк")
+    if rate is not None and not 0 < rate <= 1:
+        raise ValueError(f"Доля выборки должна быть в (0, 1]: {rate}")
+    if rows is not None and rows <= 0:
+        raise ValueError(f"Размер выборки должен быть положительным: {rows}")
+
+    rng = random.Random(seed)
+    stats = SampleStats()
+    rows_before = aggregator.rows_seen
+    existing = [
+        filepath
+        for filepath in filepaths
+        if os.path.isfile(filepath) or is_stream_input(filepath)
+    ]
+    for filepath in sorted(set(filepaths) - set(existing)):
+        print(f"Файл не найден: {filepath}")
+
+    reservoir: list[dict] = []
+    seen = 0
+
+    def keep_in_reservoir(product: dict) -> None:
+        nonlocal seen
+        seen += 1
+        if len(reservoir) < rows:
+            reservoir.append(product)
+        else:
+            index = rng.randrange(seen)
+            if index < rows:
+                reservoir[index] = product
+
+    if rows is not None:
+        known = sum(
+            estimate
+            for estimate in (
+                estimate_rows(filepath)
+                for filepath in existing
+                if not is_stream_input(filepath)
+            )
+            if estimate is not None
+        )
+        # Размер потока заранее не узнать: без других файлов он читается целиком
+        rate = min(1.0, OVERSAMPLING * rows / known) if known else 1.0
+        consume: Callable[[dict], None] = keep_in_reservoir
+    else:
+        consume = aggregator.add
+
+    sink = _ValidatingSink(consume, validator) if validator is not None else None
+    # Прочитанные блоки несжатых файлов по номеру файла в списке
+    read_blocks: dict[int, set[int]] = {}
+
+    def sample_file(index: int, filepath: str, file_rate: float) -> None:
+        try:
+            if index in read_blocks:
+                bytes_read, exhausted = _sample_blocks(
+                    filepath, file_rate, rng, sink or consume, encoding, read_blocks[index]
+                )
+                if exhausted:
+                    del read_blocks[index]
+            else:
+                bytes_read = _sample_stream(filepath, file_rate, rng, sink or consume, encoding)
+                if is_stream_input(filepath):
+                    stats.bytes_total += bytes_read
+            stats.bytes_read += bytes_read
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            print(f"❌ Ошибка при чтении {filepath}: {error}")
+            read_blocks.pop(index, None)
+        except DECOMPRESSION_ERRORS as error:
+            print(f"❌ Ошибка распаковки {filepath}: {error}")
+        finally:
+            if sink is not None:
+                sink.flush()
+
+    for index, filepath in enumerate(existing):
+        # Сигнатуру потока нельзя прочитать заранее, не потеряв данные
+        if not is_stream_input(filepath):
+            stats.bytes_total += os.path.getsize(filepath)
+            if not _is_compressed(filepath):
+                read_blocks[index] = set()
+        sample_file(index, filepath, rate)
+
+    # Оценка по первому блоку могла оказаться завышенной: дочитать блоки
+    while rows is not None and seen < rows and read_blocks:
+        unread_share = 1.0 - rate
+        rate = min(1.0, rate * OVERSAMPLING * (rows - seen) / (max(seen, 1) * unread_share))
+        for index in list(read_blocks):
+            sample_file(index, existing[index], rate)
+        rate = 1.0 - unread_share * (1.0 - rate)
+
+    if rows is not None:
+        aggregator.add_rows(reservoir)
+        stats.rows_sampled = len(reservoir)
+    else:
+        stats.rows_sampled = aggregator.rows_seen - rows_before
+
+    return stats
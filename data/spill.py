@@ -0,0 +1,247 @@
+"""Агрегация вне памяти с выгрузкой частичных агрегатов на диск.
+
+Когда колонка группировки почти уникальна (например, бренд — это ID
+продавца), группы не помещаются в память. SpillingAggregator следит
+за бюджетом памяти и при его превышении раскладывает частичные агрегаты
+по хешу ключа в файлы-разделы. Итоги собираются по одному разделу
+за раз, а отсортированный вывод строится внешней сортировкой слиянием.
+"""
+
+import heapq
+import os
+import pickle
+import re
+import tempfile
+from typing import Any, Callable, Iterator, Optional, Sequence, Union
+
+from data.aggregation import Aggregate, GroupByAggregator, KeyColumn
+
+DEFAULT_PARTITIONS = 64
+# Как часто (в строках) сверяться с бюджетом памяти
+CHECK_INTERVAL = 10_000
+# Сколько строк отсортированного прогона записывать одним кадром
+RUN_FRAME_ROWS = 10_000
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_memory_size(value: str) -> int:
+    """Разобрать размер памяти вида "512M", "2G" или число байт.
+
+    Args:
+        value: Строка с размером
+
+    Returns:
+        Размер в байтах
+
+    Raises:
+        ValueError: Если строка не похожа на размер
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", value.upper())
+    if match is None:
+        raise ValueError(f"Некорректный размер памяти: {value}")
+
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def _read_frames(path: str) -> Iterator[Any]:
+    """Последовательно прочитать кадры, записанные pickle.dump в один файл."""
+    with open(path, "rb") as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+class SpillingAggregator(GroupByAggregator):
+    """GroupByAggregator с бюджетом памяти и выгрузкой на диск.
+
+    Пока оценка памяти в пределах бюджета, работает как обычный агрегатор.
+    После выгрузки группы и словари ключей очищаются; одна и та же группа
+    может оказаться в нескольких выгрузках, её состояния сливаются при
+    сборке раздела. Файлы удаляются в close() (или при выходе из with).
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Union[KeyColumn, str]],
+        aggregates: Sequence[Aggregate],
+        max_memory: int,
+        partitions: int = DEFAULT_PARTITIONS,
+        spill_dir: Optional[str] = None,
+        check_interval: int = CHECK_INTERVAL,
+    ) -> None:
+        """Создать агрегатор.
+
+        Args:
+            keys: Колонки группировки (строка — обычная колонка)
+            aggregates: Агрегаты, вычисляемые для каждой группы
+            max_memory: Бюджет памяти на группы в байтах
+            partitions: Количество файлов-разделов
+            spill_dir: Каталог для временных файлов (по умолчанию системный)
+            check_interval: Через сколько строк проверять бюджет
+        """
+        super().__init__(keys, aggregates)
+        self.max_memory = max_memory
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.check_interval = check_interval
+        self.spill_count = 0
+        self._workdir: Optional[tempfile.TemporaryDirectory] = None
+        self._since_check = 0
+
+    def __enter__(self) -> "SpillingAggregator":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def spawn(self) -> GroupByAggregator:
+        """Создать пустой обычный агрегатор с той же конфигурацией.
+
+        Бюджет памяти к нему не применяется: частичный агрегат строится
+        целиком в памяти. Поэтому загрузка с бюджетом идёт в одном
+        процессе (ReportSession отклоняет max_memory вместе с workers > 1
+        и распределённой загрузкой).
+        """
+        return GroupByAggregator(self.keys, self.aggregates)
+
+    def add(self, row: Any) -> None:
+        """Учесть одну строку, при необходимости выгрузив группы на диск."""
+        super().add(row)
+        self._since_check += 1
+        if self._since_check >= self.check_interval:
+            self._check_budget()
+
+    def merge(self, other: GroupByAggregator) -> None:
+        """Влить частичные агрегаты и проверить бюджет памяти."""
+        super().merge(other)
+        self._check_budget()
+
+    def _check_budget(self) -> None:
+        """Выгрузить группы на диск, если оценка памяти превышает бюджет."""
+        self._since_check = 0
+        if self.estimate_memory() > self.max_memory:
+            self.spill()
+
+    def _path(self, name: str) -> str:
+        """Путь к временному файлу, рабочий каталог создаётся при первом обращении."""
+        if self._workdir is None:
+            self._workdir = tempfile.TemporaryDirectory(  # pylint: disable=consider-using-with
+                prefix="brand-spill-", dir=self.spill_dir
+            )
+        return os.path.join(self._workdir.name, name)
+
+    def spill(self) -> None:
+        """Разложить группы из памяти по файлам-разделам и очистить память."""
+        if not self._groups:
+            return
+
+        buckets: list[list[tuple]] = [[] for _ in range(self.partitions)]
+        for key, states in self._groups.items():
+            values = tuple(
+                column_values[code] for column_values, code in zip(self._values, key)
+            )
+            buckets[hash(values) % self.partitions].append((values, states))
+
+        for partition, records in enumerate(buckets):
+            if records:
+                with open(self._path(f"partition-{partition}.bin"), "ab") as file:
+                    pickle.dump(records, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._groups.clear()
+        self._by_value.clear()
+        self._dictionaries = [{} for _ in self.keys]
+        self._values = [[] for _ in self.keys]
+        self.spill_count += 1
+
+    def iter_partitions(self) -> Iterator[GroupByAggregator]:
+        """Собрать итоговые агрегаты по одному разделу за раз.
+
+        Yields:
+            Обычный агрегатор с полностью слитыми группами одного раздела
+        """
+        if not self.spill_count:
+            yield self
+            return
+
+        self.spill()
+        for partition in range(self.partitions):
+            path = self._path(f"partition-{partition}.bin")
+            if not os.path.exists(path):
+                continue
+
+            merged = GroupByAggregator(self.keys, self.aggregates)
+            for records in _read_frames(path):
+                for values, states in records:
+                    merged._merge_group(values, states)  # pylint: disable=protected-access
+            yield merged
+
+    def _total_states(self) -> list:
+        """Слить общие состояния агрегатов по всем разделам."""
+        if not self.spill_count:
+            return super()._total_states()
+
+        totals = [function.initial() for _, function in self._plan]
+        for partition in self.iter_partitions():
+            states = partition._total_states()  # pylint: disable=protected-access
+            for index, (_, function) in enumerate(self._plan):
+                totals[index] = function.merge(totals[index], states[index])
+        return totals
+
+    def rows(self, labelled: bool = True) -> list[tuple]:
+        """Получить итоги по всем разделам (результат целиком в памяти)."""
+        if not self.spill_count:
+            return super().rows(labelled)
+        return [
+            row for partition in self.iter_partitions() for row in partition.rows(labelled)
+        ]
+
+    def results(self) -> list[tuple[tuple, dict[str, Any]]]:
+        """Получить итоги по всем разделам (результат целиком в памяти)."""
+        if not self.spill_count:
+            return super().results()
+        return [item for partition in self.iter_partitions() for item in partition.results()]
+
+    def sorted_rows(self, key: Optional[Callable[[tuple], Any]] = None) -> Iterator[tuple]:
+        """Получить итоги без подписей внешней сортировкой слиянием.
+
+        Каждый раздел сортируется в памяти и записывается отсортированным
+        прогоном, затем прогоны сливаются heapq.merge. В памяти одновременно
+        находится один раздел или по кадру от каждого прогона.
+
+        Args:
+            key: Ключ сортировки строк из rows(labelled=False)
+
+        Returns:
+            Итератор по отсортированным строкам
+        """
+        if not self.spill_count:
+            return super().sorted_rows(key)
+
+        runs = []
+        for index, partition in enumerate(self.iter_partitions()):
+            rows = partition.rows(labelled=False)
+            rows.sort(key=key)
+            path = self._path(f"run-{index}.bin")
+            with open(path, "wb") as file:
+                for start in range(0, len(rows), RUN_FRAME_ROWS):
+                    pickle.dump(
+                        rows[start:start + RUN_FRAME_ROWS],
+                        file,
+                        protocol=pickle.HIGHEST_PROTOCOL,
+                    )
+            runs.append(path)
+
+        readers = [
+            (row for frame in _read_frames(path) for row in frame) for path in runs
+        ]
+        return heapq.merge(*readers, key=key)
+
+    def close(self) -> None:
+        """Удалить временные файлы."""
+        if self._workdir is not None:
+            self._workdir.cleanup()
+            self._workdir = None
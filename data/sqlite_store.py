@@ -0,0 +1,338 @@
+"""Хранилище товаров в локальной базе SQLite.
+
+CSV файлы загружаются в базу один раз (executemany внутри транзакции),
+повторные запуски читают агрегаты SQL-запросом GROUP BY вместо повторного
+разбора файлов. Файл перезагружается, только если изменились его размер
+или mtime. Потоковые входы (stdin, именованные каналы) нельзя сверить
+по размеру, они перезагружаются при каждой синхронизации.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Callable, Optional
+
+from data.aggregation import AGGREGATE_FUNCTIONS, Bucket, GroupByAggregator, KeyColumn
+from data.loader import DEFAULT_ENCODING, STDIN_PATH, _read_products, is_stream_input
+from data.validation import RowValidator
+
+INSERT_BATCH_SIZE = 10_000
+
+# Колонки таблицы products, к которым можно обращаться из отчётов
+PRODUCT_COLUMNS = ("name", "brand", "price", "rating")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    validation TEXT NOT NULL DEFAULT '',
+    rejected TEXT NOT NULL DEFAULT '{}'
+);
+-- SQLite хранит NaN как NULL, поэтому цена и рейтинг допускают NULL
+CREATE TABLE IF NOT EXISTS products (
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    name TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    price REAL,
+    rating REAL
+);
+CREATE INDEX IF NOT EXISTS idx_products_source ON products(source_id);
+CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+"""
+
+# SQL-выражения, из которых восстанавливается состояние агрегатной функции
+SQL_STATES: dict[str, tuple[tuple[str, ...], Callable[[tuple], Any]]] = {
+    "count": (("COUNT({column})",), lambda values: values[0]),
+    "distinct": (("HLL({column})",), lambda values: bytearray(values[0])),
+    "sum": (("TOTAL({column})",), lambda values: values[0]),
+    "mean": (("COUNT({column})", "TOTAL({column})"), list),
+    "min": (("MIN({column})",), lambda values: values[0]),
+    "max": (("MAX({column})",), lambda values: values[0]),
+}
+
+
+class _SqlHyperLogLog:
+    """Агрегатная функция SQLite HLL(column): регистры HyperLogLog в BLOB."""
+
+    def __init__(self) -> None:
+        self._function = AGGREGATE_FUNCTIONS["distinct"]
+        self._state = self._function.initial()
+
+    def step(self, value: Any) -> None:
+        if value is not None:
+            self._state = self._function.update(self._state, value)
+
+    def finalize(self) -> bytes:
+        return bytes(self._state)
+
+
+class _FileNotLoaded(Exception):
+    """Файл не прочитан, транзакцию его загрузки нужно откатить."""
+
+
+def _column(name: str) -> str:
+    """Проверить имя колонки перед подстановкой в SQL.
+
+    Raises:
+        ValueError: Если колонки нет в таблице products
+    """
+    if name not in PRODUCT_COLUMNS:
+        raise ValueError(
+            f"Колонка {name} недоступна в SQLite. Доступные: {', '.join(PRODUCT_COLUMNS)}"
+        )
+    return name
+
+
+def _source_path(filepath: str) -> str:
+    """Ключ файла в таблице sources ("-" для stdin остаётся как есть)."""
+    return filepath if filepath == STDIN_PATH else os.path.abspath(filepath)
+
+
+def _key_expression(key: KeyColumn) -> str:
+    """SQL-выражение для колонки группировки (Bucket — через CASE)."""
+    if isinstance(key, Bucket):
+        source = _column(key.source)
+        branches = " ".join(
+            f"WHEN {source} < {float(edge)!r} THEN {index}"
+            for index, edge in enumerate(key.edges)
+        )
+        return f"CASE {branches} ELSE {len(key.edges)} END"
+    return _column(key.name)
+
+
+class ProductStore:
+    """Товары из CSV файлов в базе SQLite с индексами по бренду и цене.
+
+    Example:
+        >>> with ProductStore("products.db") as store:
+        ...     store.sync(["products1.csv"])
+        ...     aggregator = store.aggregate(report.create_aggregator(), ["products1.csv"])
+    """
+
+    def __init__(self, db_path: str = ":memory:") -> None:
+        """Открыть (или создать) базу.
+
+        Args:
+            db_path: Путь к файлу базы (":memory:" — база в памяти)
+        """
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._connection.create_aggregate("HLL", 1, _SqlHyperLogLog)
+
+    def __enter__(self) -> "ProductStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрыть соединение с базой."""
+        self._connection.close()
+
+    def sync(
+        self,
+        filepaths: list[str],
+        encoding: str = DEFAULT_ENCODING,
+        validator: Optional[RowValidator] = None,
+    ) -> int:
+        """Загрузить в базу новые и изменившиеся файлы.
+
+        Файл также перезагружается, если изменились настройки проверки.
+        Для пропущенных файлов счётчики отклонённых строк берутся из базы.
+        Строки отсутствующих и непрочитанных файлов удаляются из базы,
+        чтобы aggregate не учитывал их старое содержимое.
+
+        Args:
+            filepaths: Пути к CSV файлам (в том числе сжатым)
+            encoding: Кодировка файлов
+            validator: Проверка строк перед записью в базу
+
+        Returns:
+            Количество файлов, которые пришлось разобрать заново
+        """
+        validation = repr(validator) if validator is not None else ""
+        reloaded = 0
+        for filepath in filepaths:
+            path = _source_path(filepath)
+            if is_stream_input(filepath):
+                try:
+                    self._load_file(path, 0, 0, encoding, validator)
+                    reloaded += 1
+                except _FileNotLoaded:
+                    self._forget(path)
+                continue
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                print(f"Файл не найден: {filepath}")
+                self._forget(path)
+                continue
+
+            known = self._connection.execute(
+                "SELECT size, mtime_ns, validation, rejected FROM sources WHERE path = ?",
+                (path,),
+            ).fetchone()
+            if known is not None and known[:3] == (
+                stat.st_size,
+                stat.st_mtime_ns,
+                validation,
+            ):
+                if validator is not None:
+                    validator.rejected.update(json.loads(known[3]))
+                continue
+
+            try:
+                self._load_file(path, stat.st_size, stat.st_mtime_ns, encoding, validator)
+                reloaded += 1
+            except _FileNotLoaded:
+                # Транзакция откатилась, старые строки файла ещё в базе
+                self._forget(path)
+
+        return reloaded
+
+    def _delete_source(self, path: str) -> None:
+        """Удалить строки файла и запись о нём (внутри текущей транзакции)."""
+        self._connection.execute(
+            "DELETE FROM products WHERE source_id = "
+            "(SELECT id FROM sources WHERE path = ?)",
+            (path,),
+        )
+        self._connection.execute("DELETE FROM sources WHERE path = ?", (path,))
+
+    def _forget(self, path: str) -> None:
+        """Удалить строки файла и запись о нём из базы."""
+        with self._connection:
+            self._delete_source(path)
+
+    def _load_file(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        encoding: str,
+        validator: Optional[RowValidator],
+    ) -> None:
+        """Заменить строки файла в базе одной транзакцией.
+
+        Raises:
+            _FileNotLoaded: Если файл не удалось прочитать (транзакция откатывается)
+        """
+        batch: list[tuple] = []
+        rows = 0
+        # Счётчики этого файла копятся отдельно, чтобы сохранить их в базе
+        file_validator = validator.spawn() if validator is not None else None
+
+        with self._connection:
+            self._delete_source(path)
+            source_id = self._connection.execute(
+                "INSERT INTO sources (path, size, mtime_ns, rows) VALUES (?, ?, ?, 0)",
+                (path, size, mtime_ns),
+            ).lastrowid
+
+            def flush() -> None:
+                self._connection.executemany(
+                    "INSERT INTO products (source_id, name, brand, price, rating) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    batch,
+                )
+                batch.clear()
+
+            def consume(product: dict) -> None:
+                nonlocal rows
+                batch.append(
+                    (
+                        source_id,
+                        product["name"],
+                        product["brand"],
+                        product["price"],
+                        product["rating"],
+                    )
+                )
+                rows += 1
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    flush()
+
+            if not _read_products(path, encoding, consume, file_validator):
+                raise _FileNotLoaded(path)
+
+            flush()
+            rejected = {}
+            if file_validator is not None:
+                rejected = dict(file_validator.rejected)
+                validator.merge(file_validator)
+            self._connection.execute(
+                "UPDATE sources SET rows = ?, validation = ?, rejected = ? WHERE id = ?",
+                (
+                    rows,
+                    repr(file_validator) if file_validator is not None else "",
+                    json.dumps(rejected),
+                    source_id,
+                ),
+            )
+
+    def aggregate(
+        self,
+        aggregator: GroupByAggregator,
+        filepaths: Optional[list[str]] = None,
+    ) -> GroupByAggregator:
+        """Заполнить агрегатор результатами GROUP BY по базе.
+
+        Для каждой группы SQL возвращает состояния агрегатных функций
+        (для среднего — количество и сумму), поэтому результат можно
+        сливать с другими агрегатами и строить по нему любые отчёты.
+
+        Args:
+            aggregator: Пустой агрегатор с конфигурацией отчёта
+            filepaths: Учитывать только эти файлы (None — всю базу)
+
+        Returns:
+            Тот же агрегатор
+
+        Raises:
+            ValueError: Если отчёт использует колонки или функции,
+                недоступные в SQLite
+        """
+        keys = [_key_expression(key) for key in aggregator.keys]
+        selects = list(keys)
+        builders = []
+        for aggregate in aggregator.aggregates:
+            if aggregate.function not in SQL_STATES:
+                raise ValueError(f"Функция {aggregate.function} недоступна в SQLite")
+            expressions, builder = SQL_STATES[aggregate.function]
+            column = _column(aggregate.column)
+            builders.append((len(selects), len(expressions), builder))
+            selects.extend(expression.format(column=column) for expression in expressions)
+
+        query = f"SELECT COUNT(*), {', '.join(selects)} FROM products"
+        params: list[Any] = []
+        if filepaths is not None:
+            paths = [_source_path(filepath) for filepath in filepaths]
+            placeholders = ", ".join("?" * len(paths))
+            query += (
+                " WHERE source_id IN "
+                f"(SELECT id FROM sources WHERE path IN ({placeholders}))"
+            )
+            params.extend(paths)
+        query += " GROUP BY " + ", ".join(str(index + 2) for index in range(len(keys)))
+
+        partial = aggregator.spawn()
+        for row_count, *values in self._connection.execute(query, params):
+            states = [
+                builder(tuple(values[start:start + width]))
+                for start, width, builder in builders
+            ]
+            partial._merge_group(  # pylint: disable=protected-access
+                tuple(values[:len(keys)]), states
+            )
+            partial.rows_seen += row_count
+
+        aggregator.merge(partial)
+        return aggregator
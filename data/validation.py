@@ -0,0 +1,157 @@
+"""Проверка строк с товарами перед агрегацией.
+
+Строки проверяются пачками по колонкам: сначала одна быстрая проверка
+всей пачки, и только для отклонённых строк определяется нарушенное
+правило. Если установлен NumPy, проверка пачки векторизована.
+"""
+
+import math
+from collections import Counter
+from typing import Optional, Sequence
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - зависит от окружения
+    numpy = None
+
+MIN_RATING = 0.0
+MAX_RATING = 5.0
+MIN_PRICE = 0.0
+MAX_PRICE = math.inf
+
+VALIDATION_BATCH_SIZE = 4096
+
+# Правила в порядке проверки: строка учитывается в первом нарушенном
+RULES = (
+    "rating_not_finite",
+    "rating_out_of_range",
+    "price_not_finite",
+    "negative_price",
+    "price_out_of_range",
+)
+
+
+class RowValidator:
+    """Проверка рейтинга и цены с подсчётом отклонённых строк по правилам.
+
+    Счётчики можно сливать, поэтому проверка работает и при параллельной
+    загрузке: каждый процесс считает своё, результаты складываются.
+    """
+
+    def __init__(
+        self,
+        min_rating: float = MIN_RATING,
+        max_rating: float = MAX_RATING,
+        min_price: float = MIN_PRICE,
+        max_price: float = MAX_PRICE,
+        use_numpy: Optional[bool] = None,
+    ) -> None:
+        """Создать валидатор.
+
+        Args:
+            min_rating: Минимальный допустимый рейтинг
+            max_rating: Максимальный допустимый рейтинг
+            min_price: Минимальная допустимая цена
+            max_price: Максимальная допустимая цена
+            use_numpy: Векторизовать проверку (None — если NumPy доступен)
+        """
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+        self.min_price = min_price
+        self.max_price = max_price
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        self.rejected: Counter[str] = Counter()
+
+    def __repr__(self) -> str:
+        return (
+            f"RowValidator(rating=[{self.min_rating}, {self.max_rating}], "
+            f"price=[{self.min_price}, {self.max_price}])"
+        )
+
+    def spawn(self) -> "RowValidator":
+        """Создать валидатор с теми же границами и пустыми счётчиками."""
+        return RowValidator(
+            self.min_rating, self.max_rating, self.min_price, self.max_price, self.use_numpy
+        )
+
+    @property
+    def total_rejected(self) -> int:
+        """Общее количество отклонённых строк."""
+        return sum(self.rejected.values())
+
+    def merge(self, other: "RowValidator") -> None:
+        """Добавить счётчики другого валидатора.
+
+        Args:
+            other: Валидатор, отработавший в другом процессе
+        """
+        self.rejected.update(other.rejected)
+
+    def validate(self, prices: Sequence[float], ratings: Sequence[float]) -> list[int]:
+        """Проверить пачку строк, заданную колонками.
+
+        Args:
+            prices: Цены строк пачки
+            ratings: Рейтинги строк пачки
+
+        Returns:
+            Отсортированные индексы отклонённых строк (пусто для чистых данных)
+        """
+        if self.use_numpy:
+            rejected = self._find_rejected_numpy(prices, ratings)
+        else:
+            rejected = self._find_rejected(prices, ratings)
+
+        for index in rejected:
+            self.rejected[self._violated_rule(prices[index], ratings[index])] += 1
+
+        return rejected
+
+    def _find_rejected(self, prices: Sequence[float], ratings: Sequence[float]) -> list[int]:
+        """Найти отклонённые строки одним проходом по колонкам."""
+        min_rating, max_rating = self.min_rating, self.max_rating
+        min_price, max_price = self.min_price, self.max_price
+        isfinite = math.isfinite
+
+        return [
+            index
+            for index, (price, rating) in enumerate(zip(prices, ratings))
+            if not (
+                min_rating <= rating <= max_rating
+                and min_price <= price <= max_price
+                and isfinite(price)
+                and isfinite(rating)
+            )
+        ]
+
+    def _find_rejected_numpy(
+        self, prices: Sequence[float], ratings: Sequence[float]
+    ) -> list[int]:
+        """Найти отклонённые строки векторными операциями NumPy."""
+        price = numpy.asarray(prices, dtype=float)
+        rating = numpy.asarray(ratings, dtype=float)
+
+        # Сравнения с NaN ложны, поэтому NaN отсекается диапазоном
+        valid = (
+            (rating >= self.min_rating)
+            & (rating <= self.max_rating)
+            & (price >= self.min_price)
+            & (price <= self.max_price)
+            & numpy.isfinite(price)
+            & numpy.isfinite(rating)
+        )
+        if valid.all():
+            return []
+        return numpy.flatnonzero(~valid).tolist()
+
+    def _violated_rule(self, price: float, rating: float) -> str:
+        """Определить первое нарушенное правило для отклонённой строки."""
+        if not math.isfinite(rating):
+            return "rating_not_finite"
+        if not self.min_rating <= rating <= self.max_rating:
+            return "rating_out_of_range"
+        if not math.isfinite(price):
+            return "price_not_finite"
+        if price < 0:
+            return "negative_price"
+        return "price_out_of_range"
@@ -4,25 +4,36 @@
 и основной интерфейс для генерирования отчётов разных типов.
 """
 
-from reports.base import Report
+from reports.base import AggregateReport, Report
+from reports.average_price import AveragePriceReport
 from reports.average_rating import AverageRatingReport
+from reports.bayesian_rating import BayesianRatingReport
+from reports.distinct_products import DistinctProductsReport
+from reports.price_tier_rating import PriceTierRatingReport
+from reports.product_rating import ProductRatingReport
 
 REPORTS_REGISTRY = {
     "average-rating": AverageRatingReport,
+    "average-price": AveragePriceReport,
+    "bayesian-rating": BayesianRatingReport,
+    "distinct-products": DistinctProductsReport,
+    "price-tier-rating": PriceTierRatingReport,
+    "product-rating": ProductRatingReport,
 }
 
 
-def get_report(report_name: str) -> Report:
+def get_report(report_name: str, **options) -> AggregateReport:
     """Получить класс отчёта по названию.
 
     Args:
         report_name: Название отчёта
+        options: Параметры конструктора отчёта (например prior_weight)
 
     Returns:
         Экземпляр класса отчёта
 
     Raises:
-        ValueError: Если отчёт не найден в реестре
+        ValueError: Если отчёт не найден в реестре или параметры не подходят
     """
     if report_name not in REPORTS_REGISTRY:
         available = ", ".join(REPORTS_REGISTRY.keys())
@@ -31,7 +42,10 @@ def get_report(report_name: str) -> Report:
         )
 
     report_class = REPORTS_REGISTRY[report_name]
-    return report_class()
+    try:
+        return report_class(**options)
+    except TypeError as error:
+        raise ValueError(f"Неверные параметры отчёта {report_name}: {error}") from error
 
 
 def list_available_reports() -> list[str]:
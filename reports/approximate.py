@@ -0,0 +1,95 @@
+"""Приближённый отчёт по выборке с доверительными интервалами."""
+
+import math
+from statistics import NormalDist
+from typing import Any, Iterator
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.sampling import SampleBlock
+from reports.base import AggregateReport, mean_header
+
+DEFAULT_CONFIDENCE = 0.95
+
+
+class ApproximateReport(AggregateReport):
+    """Оборачивает отчёт со средним и считает его по выборке.
+
+    Для каждой группы кроме среднего выводятся границы доверительного
+    интервала (нормальное приближение) и размер выборки группы.
+
+    Выборка кластерная: в неё попадают блоки соседних строк, а строки
+    одного блока похожи (например, файл отсортирован по бренду). Поэтому
+    дисперсия среднего оценивается по суммам группы в блоках выборки
+    (отношение сумм, линеаризация), а не по разбросу отдельных строк.
+    Для групп из одной строки и выборки из одного блока интервал
+    не определён.
+    """
+
+    def __init__(self, report: AggregateReport, confidence: float = DEFAULT_CONFIDENCE) -> None:
+        """Создать приближённый вариант отчёта.
+
+        Args:
+            report: Исходный отчёт, первый агрегат которого — среднее
+            confidence: Уровень доверия интервала, от 0 до 1
+
+        Raises:
+            ValueError: Если первый агрегат отчёта не среднее
+        """
+        if not report.aggregates or report.aggregates[0].function != "mean":
+            raise ValueError(
+                "Выборка поддерживается только для отчётов, где первый агрегат — среднее"
+            )
+
+        column = report.aggregates[0].column
+        width = len(report.group_by)
+
+        self.report = report
+        # Группы считаются отдельно по каждому блоку выборки
+        self.group_by = tuple(report.group_by) + (SampleBlock(),)
+        self.aggregates = (Aggregate(column, "sum"), Aggregate(column, "count"))
+        self.headers = report.headers[:width] + (
+            mean_header(column),
+            "CI Low",
+            "CI High",
+            "Sample Size",
+        )
+        self._width = width
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def sort_key(self, row: tuple) -> Any:
+        """Сортировать как исходный отчёт (по ключам и среднему)."""
+        return self.report.sort_key(row[: self._width + 1])
+
+    def iter_rows(self, aggregator: GroupByAggregator) -> Iterator[tuple]:
+        """Построить строки (*ключи, среднее, нижняя, верхняя граница, n).
+
+        Суммы по блокам собираются в памяти: выборка невелика.
+        """
+        width = self._width
+        blocks = set()
+        groups: dict[tuple, list[tuple[float, int]]] = {}
+        for row in aggregator.rows(labelled=False):
+            keys, block, total, count = row[:width], row[width], row[width + 1], row[width + 2]
+            blocks.add(block)
+            groups.setdefault(keys, []).append((total, count))
+
+        rows = []
+        for keys, parts in groups.items():
+            count = sum(part_count for _, part_count in parts)
+            mean = sum(total for total, _ in parts) / count
+            if count < 2 or len(blocks) < 2:
+                low = high = None
+            else:
+                # Блоки, где группы нет, дают нулевые слагаемые
+                spread = sum((total - mean * part_count) ** 2 for total, part_count in parts)
+                variance = len(blocks) / (len(blocks) - 1) * spread / count**2
+                margin = self._z * math.sqrt(variance)
+                low, high = mean - margin, mean + margin
+            rows.append(keys + (mean, low, high, count))
+
+        rows.sort(key=self.sort_key)
+        for row in rows:
+            labels = tuple(
+                column.label(value) for column, value in zip(aggregator.keys, row[:width])
+            )
+            yield labels + row[width:]
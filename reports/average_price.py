@@ -0,0 +1,20 @@
+"""Отчёт средней цены по брендам."""
+
+from data.aggregation import Aggregate
+from reports.base import AggregateReport
+
+
+class AveragePriceReport(AggregateReport):
+    """Генерирует отчёт средней цены по брендам.
+
+    Сортирует бренды по убыванию средней цены.
+    """
+
+    group_by = ("brand",)
+    aggregates = (Aggregate("price", "mean"),)
+    headers = ("Brand", "Average Price")
+
+    def sort_key(self, row: tuple) -> tuple:
+        """Сортировать по убыванию цены, при равенстве — по бренду."""
+        brand, average = row
+        return -average, brand
@@ -4,7 +4,26 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Iterator, Optional, Union
+
+from data.aggregation import Aggregate, GroupByAggregator, KeyColumn
+from data.spill import SpillingAggregator
+
+
+def mean_header(column: str) -> str:
+    """Заголовок колонки со средним значением исходной колонки.
+
+    Обёртки отчётов (сравнение, выборка) считают обычное среднее первого
+    агрегата, даже если исходный отчёт выводит вместо него другую величину
+    (например, сглаженный рейтинг), поэтому заголовок берётся от агрегата.
+
+    Args:
+        column: Колонка, по которой считается среднее
+
+    Returns:
+        Заголовок вида "Average Rating"
+    """
+    return f"Average {column.capitalize()}"
 
 
 class Report(ABC):  # pylint: disable=too-few-public-methods
@@ -15,6 +34,7 @@ class Report(ABC):  # pylint: disable=too-few-public-methods
     Примеры подклассов:
         - AverageRatingReport: средний рейтинг по брендам
         - AveragePriceReport: средняя цена по брендам
+        - PriceTierRatingReport: средний рейтинг по брендам и ценовым диапазонам
     """
 
     @abstractmethod
@@ -30,3 +50,91 @@ class Report(ABC):  # pylint: disable=too-few-public-methods
         Raises:
             NotImplementedError: Метод должен быть реализован в подклассе
         """
+
+
+class AggregateReport(Report):
+    """Отчёт, заданный конфигурацией движка группировки.
+
+    Подкласс описывает колонки группировки, агрегаты, заголовки таблицы
+    и порядок сортировки; разбор данных и агрегацию выполняет
+    GroupByAggregator.
+    """
+
+    group_by: tuple[Union[KeyColumn, str], ...] = ("brand",)
+    aggregates: tuple[Aggregate, ...] = ()
+    headers: tuple[str, ...] = ()
+
+    def create_aggregator(self, max_memory: Optional[int] = None) -> GroupByAggregator:
+        """Создать пустой агрегатор с конфигурацией отчёта.
+
+        Args:
+            max_memory: Бюджет памяти в байтах; если задан, при его
+                превышении частичные агрегаты выгружаются на диск
+
+        Returns:
+            Агрегатор для загрузки данных (см. data.loader.aggregate_products)
+        """
+        if max_memory is not None:
+            return SpillingAggregator(self.group_by, self.aggregates, max_memory)
+        return GroupByAggregator(self.group_by, self.aggregates)
+
+    def build(self, aggregator: GroupByAggregator) -> list[tuple]:
+        """Построить отчёт по заполненному агрегатору.
+
+        Args:
+            aggregator: Агрегатор, созданный create_aggregator
+
+        Returns:
+            Список кортежей (*ключи, *агрегаты), отсортированный sort_key
+        """
+        return list(self.iter_rows(aggregator))
+
+    def iter_rows(self, aggregator: GroupByAggregator) -> Iterator[tuple]:
+        """Построить отчёт потоково, не собирая все строки в список.
+
+        Для SpillingAggregator строки приходят из внешней сортировки,
+        поэтому память не зависит от числа групп.
+
+        Args:
+            aggregator: Агрегатор, созданный create_aggregator
+
+        Yields:
+            Кортежи (*ключи, *агрегаты) в порядке sort_key
+        """
+        for row in aggregator.sorted_rows(self.sort_key):
+            yield aggregator.label_row(row)
+
+    def sort_key(self, row: tuple) -> Any:
+        """Ключ сортировки строки отчёта (по умолчанию — по ключам группы).
+
+        Args:
+            row: Кортеж (*ключи, *агрегаты) с исходными значениями ключей
+
+        Returns:
+            Значение для сравнения строк
+        """
+        return row
+
+    def generate(self, data: dict) -> list[tuple]:
+        """Генерировать отчёт из уже сгруппированных значений.
+
+        Args:
+            data: Словарь {ключ_группы: [значения]}. Ключ — значение
+                колонки группировки или кортеж значений для нескольких
+                колонок, значения относятся к колонке первого агрегата
+
+        Returns:
+            Список кортежей, как у build
+        """
+        aggregator = self.create_aggregator()
+        sources = [getattr(column, "source", column) for column in self.group_by]
+        value_column = self.aggregates[0].column
+
+        for key, values in data.items():
+            parts = key if isinstance(key, tuple) else (key,)
+            row = dict(zip(sources, parts))
+            for value in values:
+                row[value_column] = value
+                aggregator.add(row)
+
+        return self.build(aggregator)
@@ -0,0 +1,230 @@
+"""Кэш результатов отчётов.
+
+Результат отчёта зависит только от входных файлов, названия отчёта
+и его параметров, поэтому его можно переиспользовать, не загружая данные.
+Ключ кэша строится по дешёвому отпечатку файлов (путь, размер, mtime)
+или, по желанию, по хешу содержимого.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+DEFAULT_MAX_ENTRIES = 128
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def fingerprint_file(filepath: str, content_hash: bool = False) -> tuple:
+    """Получить отпечаток файла.
+
+    Args:
+        filepath: Путь к файлу
+        content_hash: Хешировать содержимое вместо размера и mtime
+
+    Returns:
+        Кортеж, меняющийся при изменении файла; для отсутствующего
+        файла — (путь, None)
+    """
+    path = os.path.abspath(filepath)
+
+    try:
+        if content_hash:
+            digest = hashlib.sha256()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            return path, digest.hexdigest()
+
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return path, None
+
+
+class ReportCache:
+    """LRU-кэш результатов отчётов в памяти с необязательным уровнем на диске.
+
+    Результаты на диске хранятся в JSON: строки отчёта состоят
+    из строк и чисел, а JSON, в отличие от pickle, безопасно читать.
+    Кэшем можно пользоваться из нескольких потоков.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        cache_dir: Optional[str] = None,
+        content_hash: bool = False,
+    ) -> None:
+        """Создать кэш.
+
+        Args:
+            max_entries: Максимум результатов в памяти
+            cache_dir: Каталог для уровня на диске (None — только память)
+            content_hash: Строить отпечаток файлов по содержимому
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, list[tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(
+        self,
+        filepaths: list[str],
+        report_name: str,
+        options: Optional[dict[str, Any]] = None,
+        fingerprints: Optional[list[tuple]] = None,
+    ) -> str:
+        """Построить ключ кэша.
+
+        Args:
+            filepaths: Входные файлы (порядок важен)
+            report_name: Название отчёта
+            options: Параметры, влияющие на результат отчёта
+            fingerprints: Отпечатки файлов, снятые заранее (например,
+                перед загрузкой данных); по умолчанию снимаются сейчас
+
+        Returns:
+            Хеш отпечатков файлов, названия отчёта и параметров
+        """
+        if fingerprints is None:
+            fingerprints = self.fingerprints(filepaths)
+        payload = [
+            fingerprints,
+            report_name,
+            sorted((options or {}).items()),
+        ]
+        encoded = json.dumps(payload, sort_keys=True, default=repr)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def fingerprints(self, filepaths: list[str]) -> list[tuple]:
+        """Снять отпечатки файлов способом, заданным для этого кэша.
+
+        Args:
+            filepaths: Входные файлы
+
+        Returns:
+            Отпечатки в порядке файлов
+        """
+        return [fingerprint_file(filepath, self.content_hash) for filepath in filepaths]
+
+    def get(self, key: str) -> Optional[list[tuple]]:
+        """Получить результат по ключу.
+
+        Args:
+            key: Ключ из make_key
+
+        Returns:
+            Копия результата отчёта или None, если его нет в кэше
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            else:
+                result = self._read_disk(key)
+                if result is not None:
+                    self._remember(key, result)
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                # Вызывающий может менять строки, запись в кэше не должна меняться
+                result = list(result)
+            return result
+
+    def put(self, key: str, result: list[tuple]) -> None:
+        """Сохранить результат.
+
+        Args:
+            key: Ключ из make_key
+            result: Строки отчёта (кэш хранит их копию)
+        """
+        with self._lock:
+            self._remember(key, list(result))
+        self._write_disk(key, result)
+
+    def stats(self) -> dict[str, int]:
+        """Получить счётчики кэша.
+
+        Returns:
+            Словарь {hits, misses, entries}
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _remember(self, key: str, result: list[tuple]) -> None:
+        """Положить результат в память, вытеснив самый старый при переполнении."""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        """Путь к файлу результата на диске."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[list[tuple]]:
+        """Прочитать результат с диска (повреждённый файл считается промахом)."""
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as file:
+                return [tuple(row) for row in json.load(file)]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            print(f"⚠️  Не удалось прочитать кэш {key}: {error}")
+            return None
+
+    def _write_disk(self, key: str, result: list[tuple]) -> None:
+        """Записать результат на диск атомарно (через временный файл)."""
+        if self.cache_dir is None:
+            return
+
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as file:
+                tmp_path = file.name
+                json.dump(result, file)
+            os.replace(tmp_path, self._disk_path(key))
+        except (OSError, TypeError, ValueError) as error:
+            print(f"⚠️  Не удалось записать кэш {key}: {error}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+_SHARED_CACHES: dict[tuple[Optional[str], bool], ReportCache] = {}
+
+
+def get_result_cache(
+    cache_dir: Optional[str] = None, content_hash: bool = False
+) -> ReportCache:
+    """Получить общий для процесса кэш с указанными настройками.
+
+    Повторные вызовы с теми же настройками возвращают тот же объект,
+    поэтому результаты переиспользуются между вызовами в одном процессе.
+
+    Args:
+        cache_dir: Каталог для уровня на диске (None — только память)
+        content_hash: Строить отпечаток файлов по содержимому
+
+    Returns:
+        Экземпляр ReportCache
+    """
+    settings = (cache_dir, content_hash)
+    if settings not in _SHARED_CACHES:
+        _SHARED_CACHES[settings] = ReportCache(
+            cache_dir=cache_dir, content_hash=content_hash
+        )
+    return _SHARED_CACHES[settings]
@@ -0,0 +1,132 @@
+"""Сравнение двух наборов данных: изменения отчёта по группам."""
+
+from typing import Any, Iterator, Optional
+
+from data.aggregation import Aggregate, GroupByAggregator
+from reports.base import AggregateReport, mean_header
+
+
+class DiffReport(AggregateReport):
+    """Оборачивает отчёт со средним и сравнивает его на двух наборах файлов.
+
+    Для каждого набора строится сводка (*ключи, среднее, количество),
+    сводки соединяются по ключам группы. Память — O(число групп),
+    строки файлов не хранятся. Сводки — обычные результаты отчёта,
+    поэтому их можно брать из кэша результатов.
+    """
+
+    def __init__(self, report: AggregateReport, threshold: float = 0.0) -> None:
+        """Создать сравнение.
+
+        Args:
+            report: Исходный отчёт, первый агрегат которого — среднее
+            threshold: Выводить только группы, где среднее изменилось
+                по модулю не меньше чем на threshold (появившиеся
+                и исчезнувшие группы выводятся всегда)
+
+        Raises:
+            ValueError: Если первый агрегат отчёта не среднее
+                или порог отрицательный
+        """
+        if not report.aggregates or report.aggregates[0].function != "mean":
+            raise ValueError(
+                "Сравнение поддерживается только для отчётов, где первый агрегат — среднее"
+            )
+        if threshold < 0:
+            raise ValueError(f"Порог не может быть отрицательным: {threshold}")
+
+        column = report.aggregates[0].column
+        width = len(report.group_by)
+        metric = mean_header(column)
+
+        self.report = report
+        self.threshold = threshold
+        self.group_by = report.group_by
+        self.aggregates = (Aggregate(column, "mean"), Aggregate(column, "count"))
+        self.headers = report.headers[:width] + (
+            f"{metric} Before",
+            f"{metric} After",
+            "Change",
+            "Count Before",
+            "Count After",
+            "Count Change",
+        )
+
+    def iter_rows(self, aggregator: GroupByAggregator) -> Iterator[tuple]:
+        """Построить сводку одного набора: (*ключи, среднее, количество)."""
+        for row in aggregator.sorted_rows(self.sort_key):
+            yield aggregator.label_row(row)
+
+    def compare(self, before: list[tuple], after: list[tuple]) -> list[tuple]:
+        """Соединить сводки двух наборов по ключам группы.
+
+        Args:
+            before: Сводка базового набора (из build)
+            after: Сводка нового набора (из build)
+
+        Returns:
+            Строки (*ключи, среднее до, после, изменение, количество до,
+            после, изменение), отсортированные по убыванию модуля изменения
+            среднего; группы, которые есть только в одном наборе, — в конце
+        """
+        width = len(self.group_by)
+        baseline = {tuple(row[:width]): row[width:] for row in before}
+
+        rows = []
+        for row in after:
+            keys = tuple(row[:width])
+            mean_before, count_before = baseline.pop(keys, (None, 0))
+            rows.append(self._change(keys, mean_before, row[width], count_before, row[width + 1]))
+        for keys, (mean_before, count_before) in baseline.items():
+            rows.append(self._change(keys, mean_before, None, count_before, 0))
+
+        rows = [row for row in rows if self._passes(row[width + 2])]
+        rows.sort(key=lambda row: self._order(row, width))
+        return rows
+
+    @staticmethod
+    def _change(
+        keys: tuple,
+        mean_before: Optional[float],
+        mean_after: Optional[float],
+        count_before: int,
+        count_after: int,
+    ) -> tuple:
+        """Строка сравнения одной группы."""
+        if mean_before is None or mean_after is None:
+            change = None
+        else:
+            change = mean_after - mean_before
+        return keys + (
+            mean_before,
+            mean_after,
+            change,
+            count_before,
+            count_after,
+            count_after - count_before,
+        )
+
+    def _passes(self, change: Optional[float]) -> bool:
+        """Проверить изменение по порогу."""
+        return change is None or abs(change) >= self.threshold
+
+    @staticmethod
+    def _order(row: tuple, width: int) -> Any:
+        """Ключ сортировки: сначала большие изменения, без пары — в конце."""
+        change = row[width + 2]
+        return change is None, -abs(change or 0.0), row[:width]
+
+    def generate(self, data: dict) -> list[tuple]:
+        """Сравнить два набора уже сгруппированных значений.
+
+        Args:
+            data: Словарь {"before": {...}, "after": {...}}; каждый набор —
+                словарь {ключ_группы: [значения]}, как у AggregateReport.generate
+
+        Returns:
+            Список кортежей, как у compare
+        """
+        return self.compare(
+            AggregateReport.generate(self, data.get("before", {})),
+            AggregateReport.generate(self, data.get("after", {})),
+        )
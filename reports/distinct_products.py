@@ -0,0 +1,22 @@
+"""Отчёт о числе различных товаров по брендам."""
+
+from data.aggregation import Aggregate
+from reports.base import AggregateReport
+
+
+class DistinctProductsReport(AggregateReport):
+    """Генерирует отчёт о числе различных товаров каждого бренда.
+
+    Один товар встречается в нескольких файлах, поэтому различные названия
+    считаются оценкой HyperLogLog: память на бренд постоянна, а частичные
+    оценки из разных файлов и процессов сливаются без потери точности.
+    Погрешность — около 1.6%, небольшие значения считаются почти точно.
+    """
+
+    aggregates = (Aggregate("name", "distinct"), Aggregate("name", "count"))
+    headers = ("Brand", "Unique Products", "Entries")
+
+    def sort_key(self, row: tuple) -> tuple:
+        """Сортировать по убыванию числа товаров, при равенстве — по бренду."""
+        brand, distinct = row[:2]
+        return -distinct, brand
@@ -0,0 +1,26 @@
+"""Отчёт среднего рейтинга по брендам в разрезе ценовых диапазонов."""
+
+from data.aggregation import Aggregate, Bucket
+from reports.base import AggregateReport
+
+PRICE_TIERS = Bucket(
+    "price",
+    edges=(300.0, 700.0, 1000.0),
+    name="price_tier",
+    labels=("budget", "mid", "upper", "flagship"),
+)
+
+
+class PriceTierRatingReport(AggregateReport):
+    """Генерирует отчёт среднего рейтинга по брендам и ценовым диапазонам.
+
+    Группирует по паре (бренд, ценовой диапазон). Строки идут по брендам,
+    внутри бренда — от дешёвого диапазона к дорогому.
+    """
+
+    group_by = ("brand", PRICE_TIERS)
+    aggregates = (
+        Aggregate("rating", "mean"),
+        Aggregate("rating", "count"),
+    )
+    headers = ("Brand", "Price Tier", "Average Rating", "Products")
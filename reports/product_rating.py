@@ -0,0 +1,26 @@
+"""Отчёт рейтинга товаров по брендам."""
+
+from data.aggregation import Aggregate
+from reports.base import AggregateReport
+
+
+class ProductRatingReport(AggregateReport):
+    """Генерирует отчёт рейтинга по паре (бренд, товар).
+
+    Один и тот же товар может встречаться в нескольких файлах:
+    отчёт показывает его средний рейтинг, разброс цены и число записей.
+    """
+
+    group_by = ("brand", "name")
+    aggregates = (
+        Aggregate("rating", "mean"),
+        Aggregate("price", "min"),
+        Aggregate("price", "max"),
+        Aggregate("rating", "count"),
+    )
+    headers = ("Brand", "Product", "Average Rating", "Min Price", "Max Price", "Entries")
+
+    def sort_key(self, row: tuple) -> tuple:
+        """Сортировать по бренду, внутри бренда — по убыванию рейтинга."""
+        brand, name, average = row[:3]
+        return brand, -average, name
@@ -0,0 +1,436 @@
+"""Сессия построения отчётов для встраивания в Python-сервисы.
+
+ReportSession получает список файлов один раз, загружает агрегаты
+и держит их в памяти: повторные и разные отчёты по тем же файлам
+строятся без повторного разбора CSV. CLI (script.py) — тонкая обёртка
+над этим классом.
+
+Загруженные агрегаты — снимок файлов на момент загрузки: если файл
+потом изменился, сессия продолжает отвечать по снимку. Отпечатки файлов
+снимаются перед загрузкой, и результаты кэшируются под ними, поэтому
+в кэш не попадает старый результат под отпечатком нового файла.
+
+Потоковые входы (stdin "-", именованные каналы) читаются один раз,
+поэтому агрегаты всех нужных отчётов надо загрузить сразу через
+prepare(), а кэш результатов для них не используется.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from data.aggregation import AggregatorGroup, GroupByAggregator
+from data.dedupe import Deduplicator
+from data.distributed import ShardCoordinator
+from data.loader import DEFAULT_ENCODING, aggregate_products, is_stream_input
+from data.sampling import SampleStats, sample_products
+from data.sqlite_store import ProductStore
+from data.validation import RowValidator
+from reports import get_report
+from reports.approximate import ApproximateReport
+from reports.base import AggregateReport
+from reports.cache import ReportCache
+from reports.diff import DiffReport
+
+
+@dataclass
+class ReportResult:
+    """Результат отчёта: заголовки и строки таблицы."""
+
+    name: str
+    headers: tuple[str, ...]
+    rows: list[tuple]
+    from_cache: bool = False
+    sample: Optional[SampleStats] = None
+
+
+class ReportSession:
+    """Загруженные агрегаты по набору файлов и построение отчётов по ним.
+
+    Агрегаты кэшируются по конфигурации отчёта (колонки группировки
+    и агрегаты), поэтому отчёты с одинаковой конфигурацией и разными
+    параметрами используют одну загрузку. prepare() загружает агрегаты
+    для нескольких отчётов за один проход по файлам.
+
+    Example:
+        >>> with ReportSession(["products1.csv", "products2.csv"]) as session:
+        ...     session.prepare("average-rating", "bayesian-rating")
+        ...     top = session.run("average-rating").rows
+        ...     damped = session.run("bayesian-rating", prior_weight=20).rows
+    """
+
+    def __init__(
+        self,
+        files: list[str],
+        encoding: str = DEFAULT_ENCODING,
+        workers: int = 1,
+        validate: bool = True,
+        db_path: Optional[str] = None,
+        max_memory: Optional[int] = None,
+        cache: Optional[ReportCache] = None,
+        coordinator: Optional[ShardCoordinator] = None,
+        dedupe: bool = False,
+    ) -> None:
+        """Создать сессию.
+
+        Args:
+            files: Пути к CSV файлам (в том числе сжатым)
+            encoding: Кодировка файлов
+            workers: Количество процессов для параллельной загрузки
+            validate: Проверять рейтинг и цену при загрузке
+            db_path: База SQLite вместо разбора CSV (см. data.sqlite_store)
+            max_memory: Бюджет памяти на агрегаты одного отчёта в байтах;
+                несовместим с workers > 1 и coordinator
+            cache: Кэш результатов отчётов (None — без кэша)
+            coordinator: Раздавать файлы воркерам координатора
+                (каждый файл — отдельный шард) вместо локальной загрузки
+            dedupe: Учитывать только первую запись каждого товара
+                (бренд, название); несовместимо с db_path и coordinator
+        """
+        self.files = list(files)
+        self.encoding = encoding
+        self.workers = workers
+        self.validate = validate
+        self.db_path = db_path
+        self.max_memory = max_memory
+        self.cache = cache
+        self.coordinator = coordinator
+        self.dedupe = dedupe
+        # Сколько повторов товаров отсеяно при загрузке
+        self.duplicates = 0
+        # Счётчики отклонённых строк по первой загрузке файлов
+        self.validator = RowValidator() if validate else None
+        self._aggregators: dict[tuple, GroupByAggregator] = {}
+        # Отпечатки файлов, снятые перед загрузкой агрегатора, по конфигурации
+        self._fingerprints: dict[tuple, list[tuple]] = {}
+        self._loads = 0
+        self._streams = [filepath for filepath in self.files if is_stream_input(filepath)]
+        self._streams_read = False
+
+    def __enter__(self) -> "ReportSession":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Освободить агрегаты (и временные файлы выгрузки на диск)."""
+        for aggregator in self._aggregators.values():
+            close = getattr(aggregator, "close", None)
+            if close is not None:
+                close()
+        self._aggregators.clear()
+        self._fingerprints.clear()
+
+    @staticmethod
+    def _config(report: AggregateReport) -> tuple:
+        """Ключ кэша агрегатов: от него зависит содержимое агрегатора."""
+        return tuple(report.group_by), tuple(report.aggregates)
+
+    def _next_validator(self) -> Optional[RowValidator]:
+        """Валидатор для очередной загрузки.
+
+        Строки при каждой загрузке одни и те же, поэтому счётчики
+        копятся только при первой, чтобы не умножать их.
+        """
+        if self.validator is None:
+            return None
+        return self.validator if self._loads == 0 else self.validator.spawn()
+
+    def _read_streams(self) -> None:
+        """Отметить чтение потоковых входов.
+
+        Raises:
+            ValueError: Если потоки уже были прочитаны
+        """
+        if not self._streams:
+            return
+        if self._streams_read:
+            raise ValueError(
+                "Потоковый ввод (stdin, канал) читается один раз: "
+                "загрузите все отчёты сразу через prepare()"
+            )
+        self._streams_read = True
+
+    def prepare(self, *report_names: str) -> None:
+        """Загрузить агрегаты для нескольких отчётов за один проход.
+
+        Args:
+            report_names: Названия отчётов из реестра
+
+        Raises:
+            ValueError: Если отчёт неизвестен или не удалось загрузить данные
+        """
+        self._load([get_report(name) for name in report_names])
+
+    def _load(
+        self,
+        reports: list[AggregateReport],
+        fingerprints: Optional[list[tuple]] = None,
+    ) -> None:
+        """Загрузить агрегаты для отчётов, которых ещё нет в сессии.
+
+        Args:
+            reports: Отчёты
+            fingerprints: Отпечатки файлов, уже снятые перед загрузкой
+                (по умолчанию снимаются здесь, если есть кэш результатов)
+        """
+        missing: dict[tuple, GroupByAggregator] = {}
+        for report in reports:
+            config = self._config(report)
+            if config not in self._aggregators and config not in missing:
+                missing[config] = report.create_aggregator(max_memory=self.max_memory)
+
+        if not missing:
+            return
+
+        if self.dedupe and (self.db_path or self.coordinator is not None):
+            raise ValueError(
+                "Отсев повторов требует общего состояния по всем файлам "
+                "и несовместим с базой SQLite и распределённой загрузкой"
+            )
+
+        if self.max_memory is not None and (self.workers > 1 or self.coordinator is not None):
+            raise ValueError(
+                "Бюджет памяти соблюдается только при загрузке в одном процессе: "
+                "max_memory несовместим с workers > 1 и распределённой загрузкой"
+            )
+
+        self._read_streams()
+        if self.cache is not None and not self._streams:
+            # Снимаются до чтения: изменение файла во время загрузки
+            # даст другой отпечаток при следующем запуске
+            if fingerprints is None:
+                fingerprints = self.cache.fingerprints(self.files)
+            for config in missing:
+                self._fingerprints[config] = fingerprints
+        aggregators = list(missing.values())
+        validator = self._next_validator()
+        target = aggregators[0] if len(aggregators) == 1 else AggregatorGroup(aggregators)
+
+        if self.db_path:
+            with ProductStore(self.db_path) as store:
+                store.sync(self.files, self.encoding, validator)
+                for aggregator in aggregators:
+                    store.aggregate(aggregator, self.files)
+        elif self.coordinator is not None:
+            shards = [[filepath] for filepath in self.files if filepath not in self._streams]
+            loaded = 0
+            if shards:
+                loaded = self.coordinator.aggregate(shards, target, self.encoding, validator)
+            # Воркеры не видят stdin координатора: потоки читаются здесь
+            if self._streams:
+                aggregate_products(
+                    self._streams,
+                    target,
+                    encoding=self.encoding,
+                    raise_on_empty=False,
+                    validator=validator,
+                )
+            elif not loaded:
+                raise ValueError("Не удалось загрузить ни один файл")
+        else:
+            deduplicator = Deduplicator() if self.dedupe else None
+            try:
+                aggregate_products(
+                    self.files,
+                    target,
+                    encoding=self.encoding,
+                    workers=self.workers,
+                    validator=validator,
+                    deduplicator=deduplicator,
+                )
+            finally:
+                if deduplicator is not None:
+                    self.duplicates = deduplicator.duplicates
+                    deduplicator.close()
+
+        self._loads += 1
+        if not aggregators[0].rows_seen:
+            raise ValueError("Не удалось загрузить данные")
+
+        self._aggregators.update(missing)
+
+    def aggregator(self, report: AggregateReport) -> GroupByAggregator:
+        """Получить заполненный агрегатор для отчёта, загрузив его при надобности.
+
+        Args:
+            report: Экземпляр отчёта
+
+        Returns:
+            Агрегатор с конфигурацией отчёта
+        """
+        self._load([report])
+        return self._aggregators[self._config(report)]
+
+    def run(self, report_name: str, **options: Any) -> ReportResult:
+        """Построить отчёт.
+
+        Args:
+            report_name: Название отчёта из реестра
+            options: Параметры конструктора отчёта
+
+        Returns:
+            Результат отчёта (из кэша результатов, если он есть)
+
+        Raises:
+            ValueError: Если отчёт неизвестен или не удалось загрузить данные
+        """
+        return self.run_report(get_report(report_name, **options), report_name, **options)
+
+    def run_report(
+        self, report: AggregateReport, report_name: str, **options: Any
+    ) -> ReportResult:
+        """Построить отчёт по готовому экземпляру (например, не из реестра).
+
+        Args:
+            report: Экземпляр отчёта
+            report_name: Название для кэша результатов и заголовка
+            options: Параметры, от которых зависит результат отчёта
+
+        Returns:
+            Результат отчёта (из кэша результатов, если он есть)
+
+        Raises:
+            ValueError: Если не удалось загрузить данные
+        """
+        cache_key = None
+        fingerprints = None
+        # Содержимое потока не отпечатать заранее, его результат не кэшируется
+        if self.cache is not None and not self._streams:
+            # Уже загруженный агрегатор отвечает по отпечаткам своей загрузки
+            fingerprints = self._fingerprints.get(self._config(report))
+            if fingerprints is None:
+                fingerprints = self.cache.fingerprints(self.files)
+            cache_key = self.cache.make_key(
+                self.files,
+                report_name,
+                {
+                    "encoding": self.encoding,
+                    "validate": self.validate,
+                    "dedupe": self.dedupe,
+                    **options,
+                },
+                fingerprints,
+            )
+            rows = self.cache.get(cache_key)
+            if rows is not None:
+                return ReportResult(report_name, report.headers, rows, from_cache=True)
+
+        self._load([report], fingerprints)
+        rows = report.build(self._aggregators[self._config(report)])
+        if cache_key is not None:
+            self.cache.put(cache_key, rows)
+
+        return ReportResult(report_name, report.headers, rows)
+
+    def diff(
+        self,
+        baseline: "ReportSession",
+        report_name: str,
+        threshold: float = 0.0,
+        **options: Any,
+    ) -> ReportResult:
+        """Сравнить отчёт по файлам сессии с отчётом по файлам baseline.
+
+        Сводки (среднее и количество по группам) двух наборов строятся
+        одновременно в двух потоках и берутся из кэша результатов, если
+        файлы не менялись. Разбор CSV идёт параллельно, если у сессий
+        workers > 1 или координатор: процессы обеих сторон работают
+        одновременно.
+
+        Args:
+            baseline: Сессия с базовым набором файлов (например, вчерашним)
+            report_name: Название отчёта из реестра (первый агрегат — среднее)
+            threshold: Минимальное по модулю изменение среднего
+            options: Параметры конструктора отчёта
+
+        Returns:
+            Результат с изменениями по группам, крупные изменения первыми
+
+        Raises:
+            ValueError: Если отчёт не поддерживает сравнение
+                или не удалось загрузить данные
+        """
+        report = DiffReport(get_report(report_name, **options), threshold)
+        # Сводка не зависит от порога, поэтому кэшируется без него
+        summary_name = f"{report_name}:diff-summary"
+
+        def summarize(session: "ReportSession") -> list[tuple]:
+            return session.run_report(report, summary_name, **options).rows
+
+        shared_db = self.db_path and self.db_path == baseline.db_path
+        shared_port = (
+            self.coordinator is not None
+            and self.coordinator is baseline.coordinator
+            and self.coordinator.address[1] != 0
+        )
+        if shared_db or shared_port:
+            # Одна база SQLite или один порт координатора не обслужат две загрузки сразу
+            before, after = summarize(baseline), summarize(self)
+        else:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                before, after = executor.map(summarize, [baseline, self])
+
+        return ReportResult(report_name, report.headers, report.compare(before, after))
+
+    def stream(self, report_name: str, **options: Any) -> Iterator[tuple]:
+        """Построить отчёт потоково, не собирая строки в список.
+
+        С max_memory строки приходят из внешней сортировки, поэтому
+        память не зависит от числа групп. Кэш результатов не используется.
+
+        Args:
+            report_name: Название отчёта из реестра
+            options: Параметры конструктора отчёта
+
+        Returns:
+            Итератор по строкам отчёта
+        """
+        report = get_report(report_name, **options)
+        return report.iter_rows(self.aggregator(report))
+
+    def sample(
+        self,
+        report_name: str,
+        rate: Optional[float] = None,
+        rows: Optional[int] = None,
+        seed: Optional[int] = None,
+        **options: Any,
+    ) -> ReportResult:
+        """Построить приближённый отчёт по случайной выборке.
+
+        Выборка каждый раз читается заново и не кэшируется.
+
+        Args:
+            report_name: Название отчёта из реестра (первый агрегат — среднее)
+            rate: Доля выборки, от 0 до 1
+            rows: Размер выборки в строках
+            seed: Зерно генератора для воспроизводимой выборки
+            options: Параметры конструктора отчёта
+
+        Returns:
+            Результат с доверительными интервалами и статистикой выборки
+
+        Raises:
+            ValueError: Если отчёт не поддерживает выборку
+                или не удалось загрузить данные
+        """
+        report = ApproximateReport(get_report(report_name, **options))
+        aggregator = report.create_aggregator()
+        self._read_streams()
+
+        stats = sample_products(
+            self.files,
+            aggregator,
+            rate=rate,
+            rows=rows,
+            seed=seed,
+            encoding=self.encoding,
+            validator=self.validator.spawn() if self.validator is not None else None,
+        )
+
+        if not aggregator.rows_seen:
+            raise ValueError("Не удалось загрузить данные")
+
+        return ReportResult(report_name, report.headers, report.build(aggregator), sample=stats)
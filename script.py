@@ -1,11 +1,89 @@
 """Главный скрипт для формирования отчётов по рейтингам брендов."""
 
 import argparse
+import csv
+import os
 import sys
+import time
+
 from tabulate import tabulate
 
-from data.loader import load_products_from_csv
+from data.distributed import DEFAULT_ADDRESS, ShardCoordinator, ShardError, parse_address
+from data.spill import parse_memory_size
+from data.validation import RULES
 from reports import get_report, list_available_reports
+from reports.cache import get_result_cache
+from reports.session import ReportResult, ReportSession
+
+
+def format_cell(value) -> str:
+    """Отформатировать значение ячейки таблицы.
+
+    Args:
+        value: Значение из строки отчёта
+
+    Returns:
+        Дробные числа — с двумя знаками после запятой, отсутствующее
+        значение — прочерк, остальное как есть
+    """
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def print_rejected(session: ReportSession) -> None:
+    """Вывести в stderr сводку по строкам, отклонённым и отсеянным при загрузке.
+
+    Args:
+        session: Сессия, загрузившая данные
+    """
+    if session.duplicates:
+        print(f"⚠️  Пропущено повторов товаров: {session.duplicates}", file=sys.stderr)
+
+    validator = session.validator
+    if validator is None or not validator.total_rejected:
+        return
+
+    summary = ", ".join(
+        f"{rule}: {validator.rejected[rule]}"
+        for rule in RULES
+        if validator.rejected[rule]
+    )
+    print(f"⚠️  Отклонено строк: {validator.total_rejected} ({summary})",
+          file=sys.stderr)
+
+
+def print_table(title: str, result: ReportResult) -> None:
+    """Вывести результат отчёта таблицей.
+
+    Args:
+        title: Заголовок над таблицей
+        result: Результат отчёта
+    """
+    formatted_result = [
+        tuple(format_cell(value) for value in row)
+        for row in result.rows
+    ]
+
+    print(f"\n{title}\n")
+    print(tabulate(formatted_result, headers=result.headers, tablefmt='grid'))
+
+
+def stream_csv(session: ReportSession, report_name: str) -> None:
+    """Вывести отчёт в stdout в CSV по мере внешней сортировки.
+
+    Итог может не помещаться в память, поэтому строки не собираются в список.
+
+    Args:
+        session: Сессия с бюджетом памяти
+        report_name: Название отчёта
+    """
+    writer = csv.writer(sys.stdout)
+    writer.writerow(get_report(report_name).headers)
+    for row in session.stream(report_name):
+        writer.writerow(format_cell(value) for value in row)
 
 
 def main() -> int:
@@ -32,50 +110,211 @@ def main() -> int:
         help='Тип отчёта'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Количество процессов для параллельной загрузки файлов'
+    )
+
+    parser.add_argument(
+        '--shard-workers',
+        type=int,
+        metavar='N',
+        help='Распределённая загрузка: координатор раздаёт файлы N локальным '
+             'воркерам по сокету, шард упавшего воркера переназначается'
+    )
+
+    parser.add_argument(
+        '--listen',
+        type=parse_address,
+        metavar='HOST:PORT',
+        help='Адрес координатора для внешних воркеров '
+             '(python -m data.distributed --connect HOST:PORT)'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        help='Каталог для кэша результатов на диске'
+    )
+
+    parser.add_argument(
+        '--content-hash',
+        action='store_true',
+        help='Строить ключ кэша по содержимому файлов, а не по размеру и mtime'
+    )
+
+    parser.add_argument(
+        '--no-validate',
+        action='store_true',
+        help='Не проверять рейтинг и цену (NaN, inf, выход за границы)'
+    )
+
+    parser.add_argument(
+        '--dedupe',
+        action='store_true',
+        help='Учитывать только первую запись каждого товара (бренд, название); '
+             'повторы отсеиваются фильтром Блума с точной проверкой на диске'
+    )
+
+    parser.add_argument(
+        '--db',
+        help='База SQLite для товаров: файлы загружаются в неё один раз, '
+             'отчёты считаются SQL-запросом'
+    )
+
+    sample = parser.add_mutually_exclusive_group()
+    sample.add_argument(
+        '--sample',
+        type=float,
+        metavar='RATE',
+        help='Приближённый отчёт по случайной доле данных (0 < RATE <= 1)'
+    )
+    sample.add_argument(
+        '--sample-rows',
+        type=int,
+        metavar='N',
+        help='Приближённый отчёт по случайной выборке из N строк'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='Зерно генератора для воспроизводимой выборки'
+    )
+
+    parser.add_argument(
+        '--max-memory',
+        type=parse_memory_size,
+        help='Бюджет памяти на агрегаты (например 512M); при превышении '
+             'агрегаты выгружаются на диск, отчёт выводится потоково в CSV'
+    )
+
+    parser.add_argument(
+        '--compare-to',
+        nargs='+',
+        metavar='FILE',
+        help='Базовый набор файлов (например, вчерашний): вывести изменения '
+             'среднего и количества по группам между ним и --files'
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.0,
+        help='С --compare-to: выводить только группы, где среднее изменилось '
+             'по модулю не меньше чем на это значение'
+    )
+
+    parser.add_argument(
+        '--timing',
+        action='store_true',
+        help='Вывести время выполнения и статистику кэша'
+    )
+
     args = parser.parse_args()
 
+    sampling = args.sample is not None or args.sample_rows is not None
+    if args.compare_to and (sampling or args.max_memory is not None):
+        parser.error('--compare-to несовместим с --sample, --sample-rows и --max-memory')
+    # Воркеры строят группы своих файлов целиком в памяти
+    if args.max_memory is not None and (
+        args.workers > 1 or args.shard_workers is not None or args.listen is not None
+    ):
+        parser.error('--max-memory несовместим с --workers, --shard-workers и --listen')
+
+    coordinator = None
+    if args.shard_workers is not None or args.listen is not None:
+        coordinator = ShardCoordinator(
+            local_workers=args.shard_workers or 0,
+            address=args.listen or DEFAULT_ADDRESS,
+        )
+
+    def open_session(files: list[str]) -> ReportSession:
+        return ReportSession(
+            files,
+            workers=args.workers,
+            validate=not args.no_validate,
+            db_path=args.db,
+            max_memory=args.max_memory,
+            cache=get_result_cache(args.cache_dir, args.content_hash),
+            coordinator=coordinator,
+            dedupe=args.dedupe,
+        )
+
+    session = open_session(args.files)
+    title = args.report.upper().replace('-', ' ')
+
     try:
-        # 1. Загрузить данные
-        all_products = load_products_from_csv(args.files)
-
-        if not all_products:
-            raise ValueError("Не удалось загрузить данные")
-
-        # 2. Подготовить данные
-        if args.report == 'average-rating':
-            data = {
-                brand: [product['rating'] for product in products]
-                for brand, products in all_products.items()
-            }
-            headers = ['Brand', 'Average Rating']
-        elif args.report == 'average-price':
-            data = {
-                brand: [product['price'] for product in products]
-                for brand, products in all_products.items()
-            }
-            headers = ['Brand', 'Average Price']
-        else:
-            raise ValueError(f"Неизвестный отчёт: {args.report}")
-
-        # 3. Получить отчёт
-        report = get_report(args.report)
-
-        # 4. Генерировать отчёт
-        result = report.generate(data)
-
-        # 5. Форматировать результаты
-        formatted_result = [
-            (brand, f"{value:.2f}")
-            for brand, value in result
-        ]
-
-        # 6. Вывести результаты
-        report_name = args.report.upper().replace('-', ' ')
-        print(f"\n{report_name}\n")
-        print(tabulate(formatted_result, headers=headers, tablefmt='grid'))
-
-        return 0
+        with session:
+            started = time.perf_counter()
+
+            # Изменения относительно базового набора файлов
+            if args.compare_to:
+                with open_session(args.compare_to) as baseline:
+                    result = session.diff(baseline, args.report, threshold=args.threshold)
+                    print_rejected(baseline)
+                elapsed = time.perf_counter() - started
 
+                print_rejected(session)
+                print_table(f"{title}: ИЗМЕНЕНИЯ", result)
+
+                if args.timing:
+                    stats = session.cache.stats()
+                    print(
+                        f"\n⏱  Время: {elapsed:.3f} с, "
+                        f"кэш: попаданий {stats['hits']}, промахов {stats['misses']}"
+                    )
+                return 0
+
+            # Быстрый приближённый отчёт по выборке
+            if sampling:
+                result = session.sample(
+                    args.report, rate=args.sample, rows=args.sample_rows, seed=args.seed
+                )
+                print_table(f"{title} (ПРИБЛИЖЁННО)", result)
+                print(
+                    f"\n🔎 Выборка: {result.sample.rows_sampled} строк, "
+                    f"прочитано {result.sample.fraction_read:.1%} входных данных"
+                )
+                return 0
+
+            # Большие данные: агрегация с выгрузкой на диск и потоковый вывод
+            if args.max_memory is not None:
+                stream_csv(session, args.report)
+                print_rejected(session)
+                if args.timing:
+                    spill_count = session.aggregator(get_report(args.report)).spill_count
+                    print(
+                        f"⏱  Время: {time.perf_counter() - started:.3f} с, "
+                        f"выгрузок на диск: {spill_count}",
+                        file=sys.stderr,
+                    )
+                return 0
+
+            # Результат из кэша или загрузка данных за один проход
+            result = session.run(args.report)
+            elapsed = time.perf_counter() - started
+
+            print_rejected(session)
+            print_table(title, result)
+
+            if args.timing:
+                stats = session.cache.stats()
+                print(
+                    f"\n⏱  Время: {elapsed:.3f} с, "
+                    f"кэш: попаданий {stats['hits']}, промахов {stats['misses']}"
+                )
+
+            return 0
+
+    except BrokenPipeError:
+        # Читатель вывода закрылся (например, | head): выходим молча.
+        # stdout перенаправляется в devnull, чтобы сброс буферов
+        # при завершении не упал повторно
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
     except FileNotFoundError as error:
         print(f"❌ Файл не найден: {error}")
         return 1
@@ -85,6 +324,9 @@ def main() -> int:
     except ValueError as error:
         print(f"❌ Ошибка в данных: {error}")
         return 1
+    except ShardError as error:
+        print(f"❌ Ошибка распределённой загрузки: {error}")
+        return 1
     except KeyError as error:
         print(f"❌ Колонка не найдена: {error}")
         return 1
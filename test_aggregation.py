@@ -0,0 +1,207 @@
+"""Тесты для движка группировки и агрегации."""
+
+# pylint: disable=redefined-outer-name
+
+import pickle
+
+import pytest
+
+from data.aggregation import Aggregate, Bucket, GroupByAggregator, HyperLogLog
+from data.loader import aggregate_products
+
+ROWS = [
+    {"name": "iphone 15 pro", "brand": "apple", "price": 999.0, "rating": 4.9},
+    {"name": "iphone 14", "brand": "apple", "price": 799.0, "rating": 4.7},
+    {"name": "iphone se", "brand": "apple", "price": 429.0, "rating": 4.1},
+    {"name": "galaxy a54", "brand": "samsung", "price": 349.0, "rating": 4.2},
+    {"name": "redmi 10c", "brand": "xiaomi", "price": 149.0, "rating": 4.1},
+]
+
+TIERS = Bucket("price", edges=(300.0, 700.0))
+
+
+@pytest.fixture
+def aggregator():
+    """Fixture: агрегатор по брендам со всеми функциями."""
+    return GroupByAggregator(
+        ["brand"],
+        [
+            Aggregate("rating", "mean"),
+            Aggregate("rating", "count"),
+            Aggregate("price", "sum"),
+            Aggregate("price", "min"),
+            Aggregate("price", "max"),
+        ],
+    )
+
+
+def test_single_pass_all_aggregates(aggregator):
+    """Тест: все агрегаты считаются за один проход."""
+    aggregator.add_rows(ROWS)
+
+    results = dict(aggregator.results())
+
+    assert results[("apple",)] == {
+        "mean_rating": pytest.approx(4.5667, abs=1e-4),
+        "count_rating": 3,
+        "sum_price": 2227.0,
+        "min_price": 429.0,
+        "max_price": 999.0,
+    }
+    assert len(aggregator) == 3
+    assert aggregator.rows_seen == 5
+
+
+def test_multi_key_with_bucket():
+    """Тест: группировка по бренду и ценовому диапазону."""
+    aggregator = GroupByAggregator(["brand", TIERS], [Aggregate("rating", "count")])
+    aggregator.add_rows(ROWS)
+
+    assert sorted(aggregator.rows()) == [
+        ("apple", "300-700", 1),
+        ("apple", ">=700", 2),
+        ("samsung", "300-700", 1),
+        ("xiaomi", "<300", 1),
+    ]
+
+
+def test_unlabelled_rows_keep_bucket_order():
+    """Тест: без подписей ключом служит номер диапазона."""
+    aggregator = GroupByAggregator([TIERS], [Aggregate("rating", "count")])
+    aggregator.add_rows(ROWS)
+
+    rows = sorted(aggregator.rows(labelled=False))
+
+    assert rows == [(0, 1), (1, 2), (2, 2)]
+    assert aggregator.label_row(rows[0]) == ("<300", 1)
+
+
+def test_merge_equals_single_pass(aggregator):
+    """Тест: слияние частичных агрегатов даёт тот же результат."""
+    left = aggregator.spawn()
+    right = aggregator.spawn()
+    left.add_rows(ROWS[:2])
+    right.add_rows(ROWS[2:])
+
+    aggregator.add_rows(ROWS)
+    left.merge(right)
+
+    assert sorted(left.rows()) == sorted(aggregator.rows())
+    assert left.rows_seen == aggregator.rows_seen
+
+
+def test_mean_fast_path_after_merge():
+    """Тест: быстрый путь (один ключ, одно среднее) видит группы из слияния."""
+    left = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+    right = left.spawn()
+    right.add_rows(ROWS[:3])
+    left.merge(pickle.loads(pickle.dumps(right)))
+    left.add_rows(ROWS[3:] + ROWS[:1])
+
+    assert sorted(left.rows()) == [
+        ("apple", pytest.approx(4.65)),
+        ("samsung", 4.2),
+        ("xiaomi", 4.1),
+    ]
+    assert len(left) == 3
+    assert left.rows_seen == 6
+
+
+def test_merge_survives_pickle(aggregator):
+    """Тест: агрегатор можно передать между процессами."""
+    aggregator.add_rows(ROWS)
+    restored = pickle.loads(pickle.dumps(aggregator))
+
+    assert restored.rows() == aggregator.rows()
+
+
+def test_merge_rejects_other_config(aggregator):
+    """Тест: нельзя слить агрегаторы с разной конфигурацией."""
+    other = GroupByAggregator(["name"], [Aggregate("rating", "mean")])
+
+    with pytest.raises(ValueError, match="разной конфигурацией"):
+        aggregator.merge(other)
+
+
+def test_unknown_function():
+    """Тест: неизвестная агрегатная функция."""
+    with pytest.raises(ValueError, match="median"):
+        GroupByAggregator(["brand"], [Aggregate("rating", "median")])
+
+
+def test_bucket_requires_sorted_edges():
+    """Тест: границы диапазонов должны возрастать."""
+    with pytest.raises(ValueError):
+        Bucket("price", edges=(700.0, 300.0))
+
+
+def test_aggregate_products_parallel(tmp_path, aggregator):
+    """Тест: параллельная агрегация файлов совпадает с последовательной."""
+    files = []
+    for index, chunk in enumerate((ROWS[:3], ROWS[3:])):
+        filepath = tmp_path / f"part{index}.csv"
+        lines = ["name,brand,price,rating"] + [
+            f"{row['name']},{row['brand']},{row['price']},{row['rating']}"
+            for row in chunk
+        ]
+        filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        files.append(str(filepath))
+
+    sequential = aggregate_products(files, aggregator.spawn())
+    parallel = aggregate_products(files, aggregator.spawn(), workers=2)
+
+    assert sorted(parallel.rows()) == sorted(sequential.rows())
+    assert sequential.rows_seen == 5
+
+
+def test_totals_from_group_states(aggregator):
+    """Тест: общие агрегаты получаются слиянием состояний групп."""
+    aggregator.add_rows(ROWS)
+
+    totals = aggregator.totals()
+
+    assert totals["mean_rating"] == pytest.approx(sum(r["rating"] for r in ROWS) / 5)
+    assert totals["count_rating"] == 5
+    assert totals["min_price"] == 149.0
+    assert totals["max_price"] == 999.0
+
+
+def test_hyperloglog_accuracy():
+    """Тест: оценка HyperLogLog в пределах нескольких стандартных ошибок."""
+    function = HyperLogLog()
+    state = function.initial()
+    for index in range(50_000):
+        function.update(state, f"product {index}")
+        function.update(state, f"product {index}")
+
+    assert function.finalize(state) == pytest.approx(50_000, rel=0.05)
+    assert function.finalize(function.initial()) == 0
+
+
+def test_hyperloglog_merge_counts_union():
+    """Тест: слияние регистров даёт оценку объединения, а не суммы."""
+    function = HyperLogLog()
+    left, right = function.initial(), function.initial()
+    for index in range(3000):
+        function.update(left, index)
+        function.update(right, index + 1500)
+
+    assert function.finalize(function.merge(left, right)) == pytest.approx(4500, rel=0.05)
+
+
+def test_distinct_aggregate_parallel(tmp_path):
+    """Тест: различные значения считаются по частям и сливаются."""
+    aggregator = GroupByAggregator(["brand"], [Aggregate("name", "distinct")])
+    files = []
+    for index in range(2):
+        filepath = tmp_path / f"part{index}.csv"
+        lines = ["name,brand,price,rating"] + [
+            f"{row['name']},{row['brand']},{row['price']},{row['rating']}" for row in ROWS
+        ]
+        filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        files.append(str(filepath))
+
+    parallel = aggregate_products(files, aggregator.spawn(), workers=2)
+    restored = pickle.loads(pickle.dumps(parallel))
+
+    assert sorted(restored.rows()) == [("apple", 3), ("samsung", 1), ("xiaomi", 1)]
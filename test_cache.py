@@ -0,0 +1,114 @@
+"""Тесты для кэша результатов отчётов."""
+
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from reports.cache import ReportCache, fingerprint_file, get_result_cache
+
+RESULT = [("apple", 4.85), ("samsung", 4.7)]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Fixture: небольшой CSV файл."""
+    filepath = tmp_path / "products.csv"
+    filepath.write_text("name,brand,price,rating\nx,apple,1,4.9\n", encoding="utf-8")
+    return str(filepath)
+
+
+def test_hit_after_put(csv_file):
+    """Тест: сохранённый результат возвращается по тому же ключу."""
+    cache = ReportCache()
+    key = cache.make_key([csv_file], "average-rating")
+
+    assert cache.get(key) is None
+    cache.put(key, RESULT)
+
+    assert cache.get(key) == RESULT
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_key_depends_on_report_and_options(csv_file):
+    """Тест: ключ зависит от отчёта и параметров."""
+    cache = ReportCache()
+
+    keys = {
+        cache.make_key([csv_file], "average-rating"),
+        cache.make_key([csv_file], "average-price"),
+        cache.make_key([csv_file], "average-rating", {"encoding": "cp1251"}),
+    }
+
+    assert len(keys) == 3
+
+
+def test_key_changes_when_file_changes(csv_file):
+    """Тест: изменение файла меняет ключ."""
+    cache = ReportCache()
+    before = cache.make_key([csv_file], "average-rating")
+
+    with open(csv_file, "a", encoding="utf-8") as file:
+        file.write("y,samsung,2,4.1\n")
+
+    assert cache.make_key([csv_file], "average-rating") != before
+
+
+def test_content_hash_ignores_mtime(csv_file):
+    """Тест: отпечаток по содержимому не зависит от mtime."""
+    before = fingerprint_file(csv_file, content_hash=True)
+    os.utime(csv_file, (0, 0))
+
+    assert fingerprint_file(csv_file, content_hash=True) == before
+    assert fingerprint_file("missing.csv")[1] is None
+
+
+def test_lru_eviction():
+    """Тест: при переполнении вытесняется самый давний результат."""
+    cache = ReportCache(max_entries=2)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    cache.get("a")
+    cache.put("c", RESULT)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == RESULT
+    assert cache.get("c") == RESULT
+
+
+def test_caller_changes_do_not_touch_entry():
+    """Тест: изменение сохранённого и полученного списка не портит кэш."""
+    cache = ReportCache()
+    rows = list(RESULT)
+    cache.put("key", rows)
+    rows.append(("extra", 0.0))
+    cache.get("key").clear()
+
+    assert cache.get("key") == RESULT
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """Тест: результат с диска доступен новому экземпляру кэша."""
+    cache_dir = str(tmp_path / "cache")
+    ReportCache(cache_dir=cache_dir).put("key", RESULT)
+
+    restored = ReportCache(cache_dir=cache_dir)
+
+    assert restored.get("key") == RESULT
+    assert restored.hits == 1
+
+
+def test_corrupted_disk_entry_is_miss(tmp_path):
+    """Тест: повреждённый файл кэша считается промахом."""
+    cache = ReportCache(cache_dir=str(tmp_path))
+    (tmp_path / "key.json").write_text("{not json", encoding="utf-8")
+
+    assert cache.get("key") is None
+    assert cache.misses == 1
+
+
+def test_shared_cache_per_settings():
+    """Тест: общий кэш переиспользуется при тех же настройках."""
+    assert get_result_cache() is get_result_cache()
+    assert get_result_cache() is not get_result_cache(content_hash=True)
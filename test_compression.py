@@ -0,0 +1,122 @@
+"""Тесты для загрузки сжатых CSV файлов."""
+
+# pylint: disable=redefined-outer-name
+
+import bz2
+import gzip
+import lzma
+import os
+
+import pytest
+
+from data.loader import detect_compression, load_products_from_csv
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - зависит от окружения
+    zstandard = None
+
+CSV_CONTENT = (
+    "name,brand,price,rating\n"
+    "iphone 15 pro,apple,999,4.9\n"
+    "galaxy s23 ultra,samsung,1199,4.8\n"
+    "iphone 14,apple,799,4.7\n"
+)
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    """Fixture: фабрика файлов с произвольным содержимым."""
+
+    def _write(name: str, payload: bytes) -> str:
+        filepath = tmp_path / name
+        filepath.write_bytes(payload)
+        return str(filepath)
+
+    return _write
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_detect_compression(compression):
+    """Тест: формат определяется по сигнатуре."""
+    payload = COMPRESSORS[compression](CSV_CONTENT.encode())
+
+    assert detect_compression(payload[:6]) == compression
+
+
+def test_detect_plain_csv():
+    """Тест: обычный CSV не считается сжатым."""
+    assert detect_compression(CSV_CONTENT.encode()[:6]) is None
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_load_compressed_file(write_file, compression):
+    """Тест: сжатый файл загружается так же, как обычный."""
+    plain = write_file("products.csv", CSV_CONTENT.encode())
+    packed = write_file(
+        "products.csv.bin", COMPRESSORS[compression](CSV_CONTENT.encode())
+    )
+
+    assert load_products_from_csv([packed]) == load_products_from_csv([plain])
+
+
+def test_compression_detected_without_extension(write_file):
+    """Тест: расширение файла не влияет на распознавание."""
+    packed = write_file("products.csv", gzip.compress(CSV_CONTENT.encode()))
+
+    result = load_products_from_csv([packed])
+
+    assert len(result["apple"]) == 2
+    assert result["samsung"][0]["rating"] == 4.8
+
+
+@pytest.mark.skipif(zstandard is None, reason="нужен пакет zstandard")
+def test_zstd_concatenated_frames(write_file):
+    """Тест: склеенные кадры zstd (например, после cat) читаются целиком."""
+    lines = CSV_CONTENT.encode().splitlines(keepends=True)
+    compressor = zstandard.ZstdCompressor()
+    packed = write_file(
+        "products.csv.zst",
+        compressor.compress(b"".join(lines[:2])) + compressor.compress(b"".join(lines[2:])),
+    )
+
+    result = load_products_from_csv([packed])
+
+    assert len(result["apple"]) == 2
+    assert result["samsung"][0]["rating"] == 4.8
+
+
+def test_truncated_gzip_is_reported(write_file, capsys):
+    """Тест: обрезанный gzip не роняет загрузку."""
+    payload = gzip.compress(CSV_CONTENT.encode())
+    packed = write_file("broken.csv.gz", payload[: len(payload) // 2])
+
+    result = load_products_from_csv([packed], raise_on_empty=False)
+
+    assert not result
+    assert "broken.csv.gz" in capsys.readouterr().out
+
+
+def test_parallel_load_matches_sequential(write_file):
+    """Тест: параллельная загрузка даёт тот же результат."""
+    files = [
+        write_file("first.csv.gz", gzip.compress(CSV_CONTENT.encode())),
+        write_file("second.csv", CSV_CONTENT.encode()),
+    ]
+
+    assert load_products_from_csv(files, workers=2) == load_products_from_csv(files)
+
+
+def test_missing_file_still_skipped(write_file):
+    """Тест: отсутствующий файл пропускается и при сжатых входах."""
+    packed = write_file("products.csv.xz", lzma.compress(CSV_CONTENT.encode()))
+
+    result = load_products_from_csv([packed, os.path.join("nope", "missing.csv")])
+
+    assert set(result) == {"apple", "samsung"}
@@ -0,0 +1,169 @@
+"""Тесты для отсева повторяющихся товаров."""
+
+# pylint: disable=redefined-outer-name
+
+import pytest
+
+from data import dedupe
+from data.aggregation import Aggregate, GroupByAggregator
+from data.dedupe import BloomFilter, Deduplicator
+from data.loader import aggregate_products
+from data.validation import RowValidator
+
+
+def _product(name, brand="apple"):
+    return {"name": name, "brand": brand, "price": 100.0, "rating": 4.0}
+
+
+@pytest.fixture
+def deduplicator(tmp_path):
+    """Fixture: фильтр с временными файлами во временном каталоге."""
+    with Deduplicator(capacity=1000, spill_dir=str(tmp_path)) as product_filter:
+        yield product_filter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Тест: добавленный ключ всегда находится, доля ошибок около заданной."""
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for index in range(10_000):
+        bloom.add(f"key {index}")
+
+    assert all(f"key {index}" in bloom for index in range(10_000))
+    false_positives = sum(f"other {index}" in bloom for index in range(10_000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_merge():
+    """Тест: слияние фильтров — объединение множеств."""
+    left, right = BloomFilter(100, 0.01), BloomFilter(100, 0.01)
+    left.add("a")
+    right.add("b")
+    left.merge(right)
+
+    assert "a" in left and "b" in left
+    with pytest.raises(ValueError):
+        left.merge(BloomFilter(1000, 0.01))
+
+
+def test_first_entry_passes(deduplicator):
+    """Тест: пропускается только первая запись товара."""
+    products = [_product("iphone"), _product("iphone"), _product("iphone", "other")]
+
+    assert [deduplicator.is_new(product) for product in products] == [True, False, True]
+    assert deduplicator.duplicates == 1
+
+
+def test_rows_without_name_not_deduplicated(deduplicator, tmp_path):
+    """Тест: без названия товар не опознать, строки бренда не сливаются в одну."""
+    filepath = tmp_path / "no_names.csv"
+    filepath.write_text("brand,price,rating\napple,999,4.9\napple,429,4.1\n", encoding="utf-8")
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+
+    aggregate_products([str(filepath)], aggregator, deduplicator=deduplicator)
+
+    assert aggregator.rows() == [("apple", 2)]
+    assert deduplicator.duplicates == 0
+
+
+def test_exact_check_on_disk(deduplicator, monkeypatch):
+    """Тест: ключи уходят на диск, а ложные срабатывания фильтра не теряют товары."""
+    monkeypatch.setattr(dedupe, "FLUSH_SIZE", 10)
+    # Крошечный фильтр срабатывает почти на всё, решает точная проверка
+    deduplicator._bloom = BloomFilter(capacity=1, error_rate=0.5)  # pylint: disable=protected-access
+
+    first = [deduplicator.is_new(_product(f"item {index}")) for index in range(100)]
+    again = [deduplicator.is_new(_product(f"item {index}")) for index in range(100)]
+
+    assert all(first)
+    assert not any(again)
+    assert deduplicator.false_positives > 0
+    assert len(set(deduplicator.keys())) == 100
+
+
+def test_merge(deduplicator):
+    """Тест: слитый фильтр знает ключи обоих."""
+    other = deduplicator.spawn()
+    deduplicator.is_new(_product("iphone"))
+    other.is_new(_product("galaxy", "samsung"))
+    deduplicator.merge(other)
+    other.close()
+
+    assert not deduplicator.is_new(_product("galaxy", "samsung"))
+    assert deduplicator.is_new(_product("pixel", "google"))
+
+
+def test_aggregate_products_dedupe(tmp_path, deduplicator):
+    """Тест: повтор товара в другом файле не учитывается, даже при workers > 1."""
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text(
+        "name,brand,price,rating\niphone,apple,999,4.9\nbroken,apple,1,9.0\n",
+        encoding="utf-8",
+    )
+    second.write_text(
+        "name,brand,price,rating\niphone,apple,949,3.0\nbroken,apple,1,4.0\n",
+        encoding="utf-8",
+    )
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+
+    aggregate_products(
+        [str(first), str(second)],
+        aggregator,
+        workers=2,
+        validator=RowValidator(),
+        deduplicator=deduplicator,
+    )
+
+    # Отклонённая проверкой строка не занимает ключ товара
+    assert aggregator.rows() == [("apple", pytest.approx(4.45))]
+    assert deduplicator.duplicates == 1
+
+
+def test_parallel_dedupe_matches_sequential(tmp_path, deduplicator):
+    """Тест: отсев по разделам в процессах совпадает с последовательным."""
+    files = []
+    for index in range(3):
+        filepath = tmp_path / f"part{index}.csv"
+        lines = ["name,brand,price,rating"] + [
+            f"item {item},brand {item % 7},{index * 100 + item},{1 + (index + item) % 5}"
+            for item in range(index * 50, index * 50 + 100)
+        ]
+        filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        files.append(str(filepath))
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+
+    with Deduplicator(capacity=1000, spill_dir=str(tmp_path)) as sequential:
+        expected = aggregate_products(files, aggregator.spawn(), deduplicator=sequential)
+        expected_duplicates = sequential.duplicates
+
+    parallel = aggregate_products(
+        files, aggregator.spawn(), workers=2, deduplicator=deduplicator
+    )
+
+    assert sorted(parallel.rows()) == sorted(expected.rows())
+    assert parallel.rows_seen == expected.rows_seen == 200
+    assert deduplicator.duplicates == expected_duplicates == 100
+    # Ключи разделов собраны в общий фильтр
+    assert not deduplicator.is_new(_product("item 0", "brand 0"))
+
+
+def test_parallel_dedupe_with_known_keys_is_sequential(tmp_path, deduplicator, capsys):
+    """Тест: фильтр с ключами прошлой загрузки не теряет их при workers > 1."""
+    files = []
+    for index in range(2):
+        filepath = tmp_path / f"part{index}.csv"
+        filepath.write_text(
+            f"name,brand,price,rating\nitem {index},apple,100,4.0\n", encoding="utf-8"
+        )
+        files.append(str(filepath))
+    deduplicator.is_new(_product("item 0"))
+
+    aggregator = aggregate_products(
+        files,
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")]),
+        workers=2,
+        deduplicator=deduplicator,
+    )
+
+    assert aggregator.rows() == [("apple", 1)]
+    assert "одном процессе" in capsys.readouterr().err
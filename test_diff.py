@@ -0,0 +1,132 @@
+"""Тесты для сравнения двух наборов данных."""
+
+# pylint: disable=redefined-outer-name
+
+from unittest.mock import patch
+
+import pytest
+
+from data.loader import aggregate_products
+from reports import get_report
+from reports.cache import ReportCache
+from reports.diff import DiffReport
+from reports.session import ReportSession
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    """Fixture: вчерашняя и сегодняшняя выгрузки."""
+    yesterday = tmp_path / "yesterday.csv"
+    today = tmp_path / "today.csv"
+    yesterday.write_text(
+        "name,brand,price,rating\n"
+        "iphone,apple,999,4.9\n"
+        "galaxy,samsung,899,4.6\n"
+        "nokia 3310,nokia,49,4.0\n",
+        encoding="utf-8",
+    )
+    today.write_text(
+        "name,brand,price,rating\n"
+        "iphone,apple,999,4.1\n"
+        "iphone se,apple,429,4.3\n"
+        "galaxy,samsung,899,4.65\n"
+        "redmi,xiaomi,149,4.2\n",
+        encoding="utf-8",
+    )
+    return [str(yesterday)], [str(today)]
+
+
+def test_compare_joins_on_keys():
+    """Тест: изменения по брендам, крупные первыми, без пары — в конце."""
+    report = DiffReport(get_report("average-rating"))
+    before = [("apple", 4.9, 1), ("nokia", 4.0, 1), ("samsung", 4.6, 1)]
+    after = [("apple", 4.2, 2), ("samsung", 4.65, 1), ("xiaomi", 4.2, 1)]
+
+    rows = report.compare(before, after)
+
+    assert [row[0] for row in rows] == ["apple", "samsung", "nokia", "xiaomi"]
+    assert rows[0] == ("apple", 4.9, 4.2, pytest.approx(-0.7), 1, 2, 1)
+    assert rows[2] == ("nokia", 4.0, None, None, 1, 0, -1)
+    assert rows[3] == ("xiaomi", None, 4.2, None, 0, 1, 1)
+    assert len(report.headers) == len(rows[0])
+
+
+def test_threshold_filters_small_changes():
+    """Тест: изменения меньше порога отбрасываются, новые бренды остаются."""
+    report = DiffReport(get_report("average-rating"), threshold=0.1)
+    rows = report.compare([("apple", 4.9, 1), ("samsung", 4.6, 1)],
+                          [("apple", 4.2, 2), ("samsung", 4.65, 1), ("xiaomi", 4.2, 1)])
+
+    assert [row[0] for row in rows] == ["apple", "xiaomi"]
+
+
+def test_generate_from_grouped_values():
+    """Тест: сравнение уже сгруппированных значений."""
+    report = DiffReport(get_report("average-price"))
+    rows = report.generate({"before": {"apple": [1000, 900]}, "after": {"apple": [1000]}})
+
+    assert rows == [("apple", 950.0, 1000.0, 50.0, 2, 1, -1)]
+
+
+def test_requires_mean_report():
+    """Тест: сравнение только для отчётов со средним, порог неотрицательный."""
+    with pytest.raises(ValueError):
+        DiffReport(get_report("distinct-products"))
+    with pytest.raises(ValueError):
+        DiffReport(get_report("average-rating"), threshold=-1)
+
+
+def test_bayesian_report_labelled_as_average():
+    """Тест: сравнивается обычное среднее, заголовок не выдаёт его за сглаженное."""
+    report = DiffReport(get_report("bayesian-rating"))
+
+    assert report.headers[1:3] == ("Average Rating Before", "Average Rating After")
+
+
+def test_session_diff(snapshots):
+    """Тест: сравнение сессий совпадает с ручным расчётом."""
+    yesterday, today = snapshots
+
+    with ReportSession(today) as current, ReportSession(yesterday) as baseline:
+        result = current.diff(baseline, "average-rating", threshold=0.1)
+
+    assert result.rows == [
+        ("apple", 4.9, pytest.approx(4.2), pytest.approx(-0.7), 1, 2, 1),
+        ("nokia", 4.0, None, None, 1, 0, -1),
+        ("xiaomi", None, 4.2, None, 0, 1, 1),
+    ]
+
+
+def test_session_diff_uses_cached_summaries(snapshots):
+    """Тест: неизменённый набор файлов не разбирается повторно."""
+    yesterday, today = snapshots
+    cache = ReportCache()
+
+    with ReportSession(today, cache=cache) as current, \
+            ReportSession(yesterday, cache=cache) as baseline:
+        expected = current.diff(baseline, "average-rating").rows
+
+    with patch("reports.session.aggregate_products", wraps=aggregate_products) as loader:
+        with ReportSession(today, cache=cache) as current, \
+                ReportSession(yesterday, cache=cache) as baseline:
+            assert current.diff(baseline, "average-rating", threshold=0.1).rows == [
+                row for row in expected if row[3] is None or abs(row[3]) >= 0.1
+            ]
+
+    loader.assert_not_called()
+    assert cache.stats()["hits"] == 2
+
+
+def test_session_diff_shared_database(snapshots, tmp_path):
+    """Тест: стороны с общей базой SQLite загружаются по очереди."""
+    yesterday, today = snapshots
+    db_path = str(tmp_path / "products.db")
+
+    with ReportSession(today) as current, ReportSession(yesterday) as baseline:
+        expected = current.diff(baseline, "average-price").rows
+
+    with ReportSession(today, db_path=db_path) as current, \
+            ReportSession(yesterday, db_path=db_path) as baseline:
+        rows = current.diff(baseline, "average-price").rows
+
+    assert rows == expected
@@ -0,0 +1,134 @@
+"""Тесты для распределённой загрузки шардов."""
+
+# pylint: disable=redefined-outer-name
+
+import socket
+import sys
+
+import pytest
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.distributed import (
+    AUTHKEY_ENV,
+    ShardCoordinator,
+    ShardError,
+    load_shard,
+    parse_address,
+)
+from data.loader import aggregate_products
+from data.validation import RowValidator
+from reports.session import ReportSession
+
+# Воркер, который берёт шард и умирает, не ответив
+CRASHING_WORKER = (
+    "import os, sys\n"
+    "from multiprocessing.connection import Client\n"
+    "host, port = sys.argv[1].rsplit(':', 1)\n"
+    f"connection = Client((host, int(port)), authkey=bytes.fromhex(os.environ['{AUTHKEY_ENV}']))\n"
+    "connection.send(os.getpid())\n"
+    "connection.recv()\n"
+    "os._exit(1)\n"
+)
+
+
+class CrashingCoordinator(ShardCoordinator):
+    """Координатор, первые воркеры которого падают на первом шарде."""
+
+    def __init__(self, crashing: int, **kwargs):
+        super().__init__(**kwargs)
+        self.crashing = crashing
+
+    def _worker_command(self, address):
+        if self.crashing:
+            self.crashing -= 1
+            host, port = address
+            return [sys.executable, "-c", CRASHING_WORKER, f"{host}:{port}"]
+        return super()._worker_command(address)
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    """Fixture: три CSV файла, один с некорректной строкой."""
+    paths = []
+    parts = [("apple", 4.9), ("samsung", 4.5), ("apple", 9.0)]
+    for index, (brand, rating) in enumerate(parts):
+        path = tmp_path / f"part{index}.csv"
+        path.write_text(
+            f"name,brand,price,rating\nphone,{brand},100,{rating}\nlite,{brand},50,4.0\n",
+            encoding="utf-8",
+        )
+        paths.append(str(path))
+    return paths
+
+
+def _aggregator():
+    return GroupByAggregator(["brand"], [Aggregate("rating", "mean"), Aggregate("price", "count")])
+
+
+def test_parse_address():
+    """Тест: разбор адреса host:port."""
+    assert parse_address("127.0.0.1:9000") == ("127.0.0.1", 9000)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_load_shard(csv_files):
+    """Тест: шард из нескольких файлов агрегируется в один агрегатор."""
+    aggregator, loaded, _ = load_shard(csv_files[:2] + ["missing.csv"], _aggregator())
+
+    assert loaded == 2
+    assert aggregator.rows_seen == 4
+
+
+def test_coordinator_matches_local(csv_files):
+    """Тест: распределённая загрузка совпадает с локальной."""
+    expected_validator = RowValidator()
+    expected = aggregate_products(csv_files, _aggregator(), validator=expected_validator)
+
+    validator = RowValidator()
+    aggregator = _aggregator()
+    shards = [[filepath] for filepath in csv_files]
+    loaded = ShardCoordinator(local_workers=2).aggregate(shards, aggregator, validator=validator)
+
+    assert loaded == 3
+    assert sorted(aggregator.rows()) == sorted(expected.rows())
+    assert validator.rejected == expected_validator.rejected == {"rating_out_of_range": 1}
+
+
+def test_dead_worker_shard_reassigned(csv_files):
+    """Тест: шард упавшего воркера достаётся другому."""
+    coordinator = CrashingCoordinator(crashing=1, local_workers=2)
+    aggregator = _aggregator()
+    coordinator.aggregate([[filepath] for filepath in csv_files], aggregator)
+
+    assert coordinator.reassigned >= 1
+    assert aggregator.rows_seen == 6
+
+
+def test_gives_up_after_max_attempts(csv_files):
+    """Тест: если все воркеры падают, загрузка завершается ошибкой."""
+    coordinator = CrashingCoordinator(crashing=100, local_workers=1, max_attempts=2)
+
+    with pytest.raises(ShardError):
+        coordinator.aggregate([csv_files[:1]], _aggregator())
+
+
+def test_busy_address_raises_shard_error(csv_files):
+    """Тест: занятый адрес — ошибка распределённой загрузки, а не OSError."""
+    with socket.socket() as busy:
+        busy.bind(("127.0.0.1", 0))
+        busy.listen()
+        coordinator = ShardCoordinator(local_workers=0, address=busy.getsockname())
+
+        with pytest.raises(ShardError):
+            coordinator.aggregate([csv_files[:1]], _aggregator())
+
+
+def test_session_with_coordinator(csv_files):
+    """Тест: сессия строит отчёты по агрегатам воркеров."""
+    with ReportSession(csv_files) as session:
+        expected = session.run("average-rating").rows
+
+    coordinator = ShardCoordinator(local_workers=2)
+    with ReportSession(csv_files, coordinator=coordinator) as session:
+        assert session.run("average-rating").rows == expected
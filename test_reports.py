@@ -4,7 +4,13 @@
 
 import pytest
 
+from reports import get_report
+from reports.average_price import AveragePriceReport
 from reports.average_rating import AverageRatingReport
+from reports.bayesian_rating import BayesianRatingReport
+from reports.distinct_products import DistinctProductsReport
+from reports.price_tier_rating import PriceTierRatingReport
+from reports.product_rating import ProductRatingReport
 
 
 @pytest.fixture
@@ -112,3 +118,115 @@ def test_high_and_low_ratings():
     assert result[0][1] == 5.0
     assert result[1][0] == "budget"
     assert result[1][1] == 1.0
+
+
+# ====== Тесты отчётов на движке группировки ======
+
+
+def test_average_price(sample_prices):
+    """Тест: средняя цена по убыванию."""
+    report = AveragePriceReport()
+    result = report.generate(sample_prices)
+
+    assert result == [("samsung", 1249.0), ("apple", 1049.0), ("xiaomi", 199.0)]
+
+
+def test_price_tier_rating():
+    """Тест: рейтинг по брендам и ценовым диапазонам."""
+    report = PriceTierRatingReport()
+    aggregator = report.create_aggregator()
+    aggregator.add_rows(
+        [
+            {"brand": "apple", "price": 1099.0, "rating": 4.9},
+            {"brand": "apple", "price": 249.0, "rating": 4.1},
+            {"brand": "apple", "price": 299.0, "rating": 4.3},
+            {"brand": "samsung", "price": 500.0, "rating": 4.5},
+        ]
+    )
+
+    result = report.build(aggregator)
+
+    # Диапазоны идут от дешёвого к дорогому, а не по алфавиту
+    assert result[0] == ("apple", "budget", pytest.approx(4.2), 2)
+    assert result[1] == ("apple", "flagship", 4.9, 1)
+    assert result[2] == ("samsung", "mid", 4.5, 1)
+
+
+def test_product_rating():
+    """Тест: один товар из нескольких файлов сводится в одну строку."""
+    report = ProductRatingReport()
+    aggregator = report.create_aggregator()
+    aggregator.add_rows(
+        [
+            {"name": "iphone 15 pro", "brand": "apple", "price": 999.0, "rating": 4.9},
+            {"name": "iphone 15 pro", "brand": "apple", "price": 949.0, "rating": 4.7},
+            {"name": "iphone se", "brand": "apple", "price": 429.0, "rating": 4.1},
+        ]
+    )
+
+    result = report.build(aggregator)
+
+    assert result[0] == ("apple", "iphone 15 pro", pytest.approx(4.8), 949.0, 999.0, 2)
+    assert result[1][1] == "iphone se"
+
+
+def test_get_report_headers_match_rows():
+    """Тест: число заголовков совпадает с шириной строки отчёта."""
+    for name in ("average-rating", "average-price", "price-tier-rating", "product-rating"):
+        report = get_report(name)
+        assert len(report.headers) == len(report.group_by) + len(report.aggregates)
+
+
+# ====== Тесты для BayesianRatingReport ======
+
+
+def test_bayesian_prefers_many_ratings():
+    """Тест: тысяча оценок 4.9 выше одной оценки 5.0."""
+    data = {"lucky": [5.0], "solid": [4.9] * 1000, "weak": [3.0] * 50}
+
+    plain = AverageRatingReport().generate(data)
+    damped = BayesianRatingReport().generate(data)
+
+    assert plain[0][0] == "lucky"
+    assert [row[0] for row in damped] == ["solid", "lucky", "weak"]
+    assert damped[0][2] == pytest.approx(4.9)
+    assert damped[1][3] == 1
+
+
+def test_bayesian_formula(sample_ratings):
+    """Тест: сглаженный рейтинг считается по общему среднему."""
+    report = BayesianRatingReport(prior_weight=2)
+    result = {row[0]: row[1] for row in report.generate(sample_ratings)}
+
+    global_mean = sum(sum(values) for values in sample_ratings.values()) / 6
+    assert result["xiaomi"] == pytest.approx((2 * global_mean + 4.6) / 3)
+
+
+def test_bayesian_zero_weight_is_plain_average(sample_ratings):
+    """Тест: при нулевом весе порядок как у обычного среднего."""
+    damped = BayesianRatingReport(prior_weight=0).generate(sample_ratings)
+    plain = AverageRatingReport().generate(sample_ratings)
+
+    assert [(row[0], pytest.approx(row[1])) for row in damped] == plain
+
+
+def test_bayesian_empty_and_invalid_weight():
+    """Тест: пустые данные и отрицательный вес."""
+    assert BayesianRatingReport().generate({}) == []
+    with pytest.raises(ValueError):
+        BayesianRatingReport(prior_weight=-1)
+
+
+# ====== Тесты для DistinctProductsReport ======
+
+
+def test_distinct_products_counts_each_name_once():
+    """Тест: повторы товара не увеличивают число различных товаров."""
+    data = {
+        "apple": ["iphone 15 pro", "iphone 15 pro", "iphone se"],
+        "samsung": ["galaxy s23", "galaxy a54", "galaxy z flip"],
+    }
+
+    result = DistinctProductsReport().generate(data)
+
+    assert result == [("samsung", 3, 3), ("apple", 2, 3)]
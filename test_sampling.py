@@ -0,0 +1,243 @@
+"""Тесты для выборочного чтения и приближённых отчётов."""
+
+# pylint: disable=redefined-outer-name
+
+import gzip
+import os
+import random
+import statistics
+
+import pytest
+
+from data import sampling
+from data.aggregation import Aggregate, GroupByAggregator
+from data.loader import aggregate_products
+from data.sampling import sample_products
+from reports.approximate import ApproximateReport
+from reports.average_price import AveragePriceReport
+from reports.average_rating import AverageRatingReport
+from reports.bayesian_rating import BayesianRatingReport
+from reports.product_rating import ProductRatingReport
+
+BRAND_MEANS = {"apple": 4.5, "samsung": 4.0, "xiaomi": 3.5}
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Fixture: маленькие блоки, чтобы в тестовом файле их были сотни."""
+    monkeypatch.setattr(sampling, "BLOCK_SIZE", 1024)
+
+
+@pytest.fixture
+def big_csv_file(tmp_path):
+    """Fixture: CSV файл с разными средними рейтингами у брендов."""
+    rng = random.Random(3)
+    lines = ["name,brand,price,rating"]
+    for index in range(20000):
+        brand = rng.choice(sorted(BRAND_MEANS))
+        rating = min(5.0, max(0.0, rng.gauss(BRAND_MEANS[brand], 0.5)))
+        lines.append(f"product {index},{brand},{rng.randint(100, 999)},{rating:.2f}")
+
+    filepath = tmp_path / "big.csv"
+    filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(filepath)
+
+
+@pytest.fixture
+def brand_ordered_csv(tmp_path):
+    """Fixture: CSV, отсортированный по бренду и рейтингу внутри бренда.
+
+    Строки одного блока почти одинаковы, поэтому разброс строк сильно
+    занижает погрешность блочной выборки.
+    """
+    rng = random.Random(5)
+    lines = ["name,brand,price,rating"]
+    for brand in sorted(BRAND_MEANS):
+        ratings = sorted(
+            min(5.0, max(0.0, rng.gauss(BRAND_MEANS[brand], 0.5))) for _ in range(10000)
+        )
+        for index, rating in enumerate(ratings):
+            lines.append(f"{brand} {index:<90},{brand},{rng.randint(100, 999)},{rating:.2f}")
+
+    filepath = tmp_path / "ordered.csv"
+    filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(filepath)
+
+
+def _exact(filepath):
+    """Точный отчёт среднего рейтинга."""
+    report = AverageRatingReport()
+    return dict(report.build(aggregate_products([filepath], report.create_aggregator())))
+
+
+def test_full_rate_reads_every_row_once(small_blocks, big_csv_file):
+    """Тест: при доле 1 каждая строка попадает ровно в один блок."""
+    report = AverageRatingReport()
+    aggregator = report.create_aggregator()
+
+    stats = sample_products([big_csv_file], aggregator, rate=1.0, seed=1)
+
+    assert aggregator.rows_seen == 20000
+    assert dict(report.build(aggregator)) == pytest.approx(_exact(big_csv_file))
+    assert stats.fraction_read == pytest.approx(1.0)
+
+
+def test_sample_matches_exact_within_ci(small_blocks, big_csv_file):
+    """Тест: точное среднее попадает в доверительный интервал выборки."""
+    report = ApproximateReport(AverageRatingReport())
+    aggregator = report.create_aggregator()
+
+    stats = sample_products([big_csv_file], aggregator, rate=0.1, seed=7)
+    exact = _exact(big_csv_file)
+
+    assert stats.fraction_read < 0.25
+    for brand, mean, low, high, count in report.build(aggregator):
+        assert low <= exact[brand] <= high
+        assert low < mean < high
+        assert count < 20000 * 0.25
+
+
+def test_block_sample_ci_covers_ordered_data(brand_ordered_csv):
+    """Тест: интервал учитывает похожесть строк внутри блока.
+
+    Интервал по разбросу строк на этих данных накрывает точное среднее
+    лишь в нескольких процентах случаев.
+    """
+    exact = _exact(brand_ordered_csv)
+    covered = total = 0
+
+    for seed in range(15):
+        report = ApproximateReport(AverageRatingReport())
+        aggregator = report.create_aggregator()
+        sample_products([brand_ordered_csv], aggregator, rate=0.3, seed=seed)
+        for brand, _, low, high, _ in report.build(aggregator):
+            total += 1
+            covered += low <= exact[brand] <= high
+
+    assert total == 45
+    assert covered / total >= 0.8
+
+
+def test_small_file_always_sampled(tmp_path):
+    """Тест: файл меньше блока не выпадает из выборки."""
+    filepath = tmp_path / "small.csv"
+    filepath.write_text(
+        "name,brand,price,rating\niphone,apple,999,4.9\ngalaxy,samsung,349,4.2\n",
+        encoding="utf-8",
+    )
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+
+    stats = sample_products([str(filepath)], aggregator, rate=0.001, seed=1)
+
+    assert stats.rows_sampled == aggregator.rows_seen == 2
+
+
+def test_sample_rows_tops_up_short_sample(tmp_path):
+    """Тест: если оценка по первому блоку завышена, блоки дочитываются."""
+    # Первый блок из коротких строк, дальше длинные: строк меньше, чем кажется
+    lines = ["name,brand,price,rating"]
+    lines += [f"p{index},apple,100,4.0" for index in range(4000)]
+    lines += [f"{'x' * 400} {index},samsung,200,3.0" for index in range(4000)]
+    filepath = tmp_path / "skewed.csv"
+    filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+    stats = sample_products([str(filepath)], aggregator, rows=3000, seed=3)
+
+    assert stats.rows_sampled == aggregator.rows_seen == 3000
+    assert stats.fraction_read < 1.0
+
+
+def test_sample_rows_with_compressed_file(tmp_path, big_csv_file):
+    """Тест: сжатый файл не заставляет читать обычные файлы целиком."""
+    with open(big_csv_file, "rb") as source:
+        packed = tmp_path / "big.csv.gz"
+        packed.write_bytes(gzip.compress(source.read()))
+
+    assert sampling.estimate_rows(str(packed)) == pytest.approx(20000, rel=0.2)
+
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+    stats = sample_products([big_csv_file, str(packed)], aggregator, rows=2000, seed=5)
+
+    assert stats.rows_sampled == 2000
+    assert stats.bytes_read < os.path.getsize(big_csv_file) / 2 + os.path.getsize(packed)
+
+
+def test_sample_rows_exact_size(small_blocks, big_csv_file):
+    """Тест: --sample-rows даёт ровно N строк и читает часть файла."""
+    aggregator = ApproximateReport(AverageRatingReport()).create_aggregator()
+
+    stats = sample_products([big_csv_file], aggregator, rows=500, seed=2)
+
+    assert stats.rows_sampled == 500
+    assert aggregator.rows_seen == 500
+    assert stats.fraction_read < 0.2
+
+
+def test_compressed_file_sampled_by_rows(tmp_path, big_csv_file):
+    """Тест: сжатый файл выбирается построчно."""
+    with open(big_csv_file, "rb") as source:
+        packed = tmp_path / "big.csv.gz"
+        packed.write_bytes(gzip.compress(source.read()))
+
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+    sample_products([str(packed)], aggregator, rate=0.5, seed=4)
+
+    assert 9000 < aggregator.rows_seen < 11000
+
+
+def test_variance_merge():
+    """Тест: дисперсия совпадает с statistics.variance и после слияния."""
+    values = [4.1, 4.9, 3.7, 4.4, 5.0, 2.8]
+    left = GroupByAggregator(["brand"], [Aggregate("rating", "var")])
+    right = left.spawn()
+    left.add_rows({"brand": "a", "rating": value} for value in values[:2])
+    right.add_rows({"brand": "a", "rating": value} for value in values[2:])
+
+    left.merge(right)
+
+    assert left.rows() == [("a", pytest.approx(statistics.variance(values)))]
+
+
+def test_single_row_has_no_interval():
+    """Тест: для группы из одной строки интервал не определён."""
+    report = ApproximateReport(AveragePriceReport())
+    aggregator = report.create_aggregator()
+    aggregator.add({"brand": "apple", "price": 999.0})
+
+    assert report.build(aggregator) == [("apple", 999.0, None, None, 1)]
+
+
+def test_invalid_arguments(big_csv_file):
+    """Тест: нужно задать ровно одно из rate и rows."""
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+
+    with pytest.raises(ValueError):
+        sample_products([big_csv_file], aggregator)
+    with pytest.raises(ValueError):
+        sample_products([big_csv_file], aggregator, rate=0.5, rows=10)
+    with pytest.raises(ValueError):
+        sample_products([big_csv_file], aggregator, rate=1.5)
+
+
+def test_bayesian_report_labelled_as_average(big_csv_file):
+    """Тест: по выборке считается обычное среднее и подписано как среднее."""
+    report = ApproximateReport(BayesianRatingReport())
+    aggregator = report.create_aggregator()
+    sample_products([big_csv_file], aggregator, rate=1.0, seed=1)
+
+    assert report.headers == ("Brand", "Average Rating", "CI Low", "CI High", "Sample Size")
+    assert dict(row[:2] for row in report.build(aggregator)) == pytest.approx(
+        _exact(big_csv_file)
+    )
+
+
+def test_report_without_mean_rejected():
+    """Тест: выборка требует отчёта со средним в первом агрегате."""
+    class CountReport(ProductRatingReport):  # pylint: disable=too-few-public-methods
+        """Отчёт без среднего."""
+
+        aggregates = (Aggregate("rating", "count"),)
+
+    with pytest.raises(ValueError):
+        ApproximateReport(CountReport())
@@ -0,0 +1,194 @@
+"""Тесты для сессии построения отчётов."""
+
+# pylint: disable=redefined-outer-name
+
+from unittest.mock import patch
+
+import pytest
+
+from data.aggregation import Aggregate, AggregatorGroup, GroupByAggregator
+from data.loader import aggregate_products
+from reports import REPORTS_REGISTRY, get_report
+from reports.cache import ReportCache
+from reports.session import ReportSession
+
+
+@pytest.fixture
+def csv_files(csv_files):
+    """Fixture: общие файлы и строка с рейтингом вне допустимого диапазона."""
+    with open(csv_files[0], "a", encoding="utf-8") as file:
+        file.write("broken,xiaomi,149,7.5\n")
+    return csv_files
+
+
+@pytest.mark.parametrize("report_name", sorted(REPORTS_REGISTRY))
+def test_run_matches_direct_build(csv_files, report_name):
+    """Тест: сессия даёт тот же результат, что и прямая загрузка."""
+    report = get_report(report_name)
+    aggregator = aggregate_products(
+        csv_files, report.create_aggregator(), validator=None
+    )
+
+    with ReportSession(csv_files, validate=False) as session:
+        result = session.run(report_name)
+
+    assert result.rows == report.build(aggregator)
+    assert result.headers == report.headers
+    assert not result.from_cache
+
+
+def test_repeated_reports_parse_files_once(csv_files):
+    """Тест: повторные отчёты не разбирают файлы заново."""
+    with patch(
+        "reports.session.aggregate_products", wraps=aggregate_products
+    ) as loader:
+        with ReportSession(csv_files) as session:
+            first = session.run("average-rating").rows
+            assert session.run("average-rating").rows == first
+            session.run("bayesian-rating", prior_weight=1)
+            session.run("bayesian-rating", prior_weight=50)
+
+    # Байесовский отчёт с любым prior_weight использует одну загрузку
+    assert loader.call_count == 2
+
+
+def test_prepare_loads_reports_in_one_pass(csv_files):
+    """Тест: prepare() загружает агрегаты нескольких отчётов за один проход."""
+    with patch(
+        "reports.session.aggregate_products", wraps=aggregate_products
+    ) as loader:
+        with ReportSession(csv_files) as session:
+            session.prepare(*REPORTS_REGISTRY)
+            for report_name in REPORTS_REGISTRY:
+                session.run(report_name)
+
+    assert loader.call_count == 1
+    assert isinstance(loader.call_args.args[1], AggregatorGroup)
+
+
+def test_rejected_counted_once(csv_files):
+    """Тест: отклонённые строки считаются по одной загрузке."""
+    with ReportSession(csv_files) as session:
+        session.run("average-rating")
+        session.run("average-price")
+
+        assert session.validator.rejected == {"rating_out_of_range": 1}
+
+
+def test_report_options(csv_files):
+    """Тест: параметры передаются в конструктор отчёта."""
+    with ReportSession(csv_files) as session:
+        weak = {row[0]: row[1] for row in session.run("bayesian-rating", prior_weight=0).rows}
+        strong = {
+            row[0]: row[1] for row in session.run("bayesian-rating", prior_weight=1000).rows
+        }
+
+        assert weak["xiaomi"] == pytest.approx(4.1)
+        assert strong["xiaomi"] > weak["xiaomi"]
+
+        with pytest.raises(ValueError):
+            session.run("average-rating", prior_weight=1)
+
+
+def test_result_cache(csv_files):
+    """Тест: результат берётся из кэша, загрузка не выполняется."""
+    cache = ReportCache()
+    with ReportSession(csv_files, cache=cache) as session:
+        expected = session.run("average-rating").rows
+
+    with patch("reports.session.aggregate_products") as loader:
+        with ReportSession(csv_files, cache=cache) as session:
+            result = session.run("average-rating")
+
+    assert result.from_cache
+    assert result.rows == expected
+    loader.assert_not_called()
+
+
+def test_result_cache_after_file_rewrite(tmp_path):
+    """Тест: результат загруженного до изменения файла не кэшируется под новым отпечатком."""
+    filepath = tmp_path / "products.csv"
+    filepath.write_text("name,brand,price,rating\niphone,apple,999,4.0\n", encoding="utf-8")
+    cache_dir = str(tmp_path / "cache")
+
+    with ReportSession([str(filepath)], cache=ReportCache(cache_dir=cache_dir)) as session:
+        assert session.run("average-rating").rows == [("apple", 4.0)]
+        filepath.write_text(
+            "name,brand,price,rating\niphone 15,apple,1099,2.0\n", encoding="utf-8"
+        )
+        # Сессия отвечает по снимку, загруженному до изменения
+        assert session.run("average-rating").rows == [("apple", 4.0)]
+
+    with ReportSession([str(filepath)], cache=ReportCache(cache_dir=cache_dir)) as session:
+        result = session.run("average-rating")
+
+    assert not result.from_cache
+    assert result.rows == [("apple", 2.0)]
+
+
+def test_stream_with_memory_budget(csv_files):
+    """Тест: потоковый вывод с выгрузкой на диск совпадает с обычным."""
+    with ReportSession(csv_files) as session:
+        expected = session.run("product-rating").rows
+
+    with ReportSession(csv_files, max_memory=1) as session:
+        assert list(session.stream("product-rating")) == expected
+
+
+def test_memory_budget_rejects_parallel_load(csv_files):
+    """Тест: бюджет памяти не молча игнорируется при загрузке в воркерах."""
+    with ReportSession(csv_files, workers=2, max_memory=1) as session:
+        with pytest.raises(ValueError):
+            session.run("average-rating")
+
+
+def test_sample(csv_files):
+    """Тест: отчёт по полной выборке содержит все бренды."""
+    with ReportSession(csv_files) as session:
+        result = session.sample("average-rating", rate=1.0, seed=1)
+
+    assert sorted(row[0] for row in result.rows) == ["apple", "samsung", "xiaomi"]
+    assert result.sample.rows_sampled == 5
+
+
+def test_no_data_raises(tmp_path):
+    """Тест: пустой набор данных даёт ValueError."""
+    empty = tmp_path / "empty.csv"
+    empty.write_text("name,brand,price,rating\n", encoding="utf-8")
+
+    with ReportSession([str(empty)]) as session:
+        with pytest.raises(ValueError):
+            session.run("average-rating")
+
+
+def test_aggregator_group_merge():
+    """Тест: группа агрегаторов сливается попарно."""
+    group = AggregatorGroup([
+        GroupByAggregator(["brand"], [Aggregate("rating", "mean")]),
+        GroupByAggregator(["brand"], [Aggregate("price", "max")]),
+    ])
+    partial = group.spawn()
+    partial.add({"brand": "apple", "rating": 4.0, "price": 100.0})
+    group.add({"brand": "apple", "rating": 5.0, "price": 300.0})
+    group.merge(partial)
+
+    assert group.rows_seen == 2
+    assert group.aggregators[0].rows() == [("apple", 4.5)]
+    assert group.aggregators[1].rows() == [("apple", 300.0)]
+
+
+def test_dedupe(csv_files):
+    """Тест: с dedupe повтор товара и целого файла не меняет результат."""
+    with ReportSession(csv_files, dedupe=True) as session:
+        expected = session.run("average-rating").rows
+        # iphone 15 pro из второго файла уже встречался в первом
+        assert session.duplicates == 1
+        assert dict(expected)["apple"] == pytest.approx(4.5)
+
+    with ReportSession(csv_files + csv_files, dedupe=True) as session:
+        assert session.run("average-rating").rows == expected
+        assert session.duplicates == 6
+
+    with ReportSession(csv_files, dedupe=True, db_path=":memory:") as session:
+        with pytest.raises(ValueError):
+            session.run("average-rating")
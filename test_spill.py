@@ -0,0 +1,123 @@
+"""Тесты для агрегации с выгрузкой на диск."""
+
+# pylint: disable=redefined-outer-name
+
+import os
+import random
+
+import pytest
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.spill import SpillingAggregator, parse_memory_size
+from reports.average_rating import AverageRatingReport
+from reports.bayesian_rating import BayesianRatingReport
+
+from conftest import rounded
+
+AGGREGATES = [Aggregate("rating", "mean"), Aggregate("rating", "count")]
+
+
+@pytest.fixture
+def rows():
+    """Fixture: строки с высокой кардинальностью бренда."""
+    rng = random.Random(7)
+    return [
+        {"brand": f"seller-{rng.randint(0, 499)}", "rating": rng.choice([3.0, 4.0, 5.0])}
+        for _ in range(3000)
+    ]
+
+
+def test_spill_matches_in_memory(rows):
+    """Тест: результаты с выгрузкой совпадают с агрегацией в памяти."""
+    expected = GroupByAggregator(["brand"], AGGREGATES)
+    expected.add_rows(rows)
+
+    with SpillingAggregator(
+        ["brand"], AGGREGATES, max_memory=1, partitions=4, check_interval=100
+    ) as aggregator:
+        aggregator.add_rows(rows)
+
+        assert aggregator.spill_count > 1
+        assert sorted(rounded(aggregator.rows())) == sorted(rounded(expected.rows()))
+        assert aggregator.rows_seen == len(rows)
+
+
+def test_external_sort_order(rows):
+    """Тест: внешняя сортировка даёт тот же порядок, что и отчёт в памяти."""
+    report = AverageRatingReport()
+    expected = report.create_aggregator()
+    expected.add_rows(rows)
+
+    aggregator = SpillingAggregator(
+        report.group_by, report.aggregates, max_memory=1, partitions=8, check_interval=50
+    )
+    aggregator.add_rows(rows)
+
+    assert list(report.iter_rows(aggregator)) == report.build(expected)
+    aggregator.close()
+
+
+def test_no_spill_within_budget(rows):
+    """Тест: в пределах бюджета диск не используется."""
+    aggregator = SpillingAggregator(["brand"], AGGREGATES, max_memory=10**9)
+    aggregator.add_rows(rows)
+
+    assert aggregator.spill_count == 0
+    assert len(aggregator) == len({row["brand"] for row in rows})
+
+
+def test_merge_checks_budget(rows):
+    """Тест: слияние частичных агрегатов тоже соблюдает бюджет."""
+    partial = GroupByAggregator(["brand"], AGGREGATES)
+    partial.add_rows(rows)
+
+    aggregator = SpillingAggregator(["brand"], AGGREGATES, max_memory=1)
+    aggregator.merge(partial)
+
+    assert aggregator.spill_count == 1
+    assert sorted(rounded(aggregator.rows())) == sorted(rounded(partial.rows()))
+
+
+def test_close_removes_files(rows, tmp_path):
+    """Тест: временные файлы удаляются после close."""
+    aggregator = SpillingAggregator(
+        ["brand"], AGGREGATES, max_memory=1, spill_dir=str(tmp_path), check_interval=100
+    )
+    aggregator.add_rows(rows)
+    aggregator.rows()
+
+    assert os.listdir(tmp_path)
+    aggregator.close()
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("1024", 1024), ("512M", 512 * 1024**2), ("2g", 2 * 1024**3), ("1.5KB", 1536)],
+)
+def test_parse_memory_size(value, expected):
+    """Тест: разбор размера памяти."""
+    assert parse_memory_size(value) == expected
+
+
+def test_parse_memory_size_invalid():
+    """Тест: некорректный размер памяти."""
+    with pytest.raises(ValueError):
+        parse_memory_size("много")
+
+
+def test_bayesian_report_after_spill(rows):
+    """Тест: общее среднее собирается из выгруженных разделов."""
+    report = BayesianRatingReport()
+    expected = report.create_aggregator()
+    expected.add_rows(rows)
+
+    with SpillingAggregator(
+        report.group_by, report.aggregates, max_memory=1, partitions=4, check_interval=100
+    ) as aggregator:
+        aggregator.add_rows(rows)
+
+        assert aggregator.totals() == pytest.approx(expected.totals())
+        assert sorted(rounded(report.iter_rows(aggregator))) == sorted(
+            rounded(report.build(expected))
+        )
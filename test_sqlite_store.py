@@ -0,0 +1,115 @@
+"""Тесты для хранилища товаров в SQLite."""
+
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.loader import aggregate_products
+from data.sqlite_store import ProductStore
+from reports import REPORTS_REGISTRY
+
+from conftest import rounded
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture: база во временном каталоге."""
+    with ProductStore(str(tmp_path / "products.db")) as product_store:
+        yield product_store
+
+
+@pytest.mark.parametrize("report_name", sorted(REPORTS_REGISTRY))
+def test_sql_matches_python(store, csv_files, report_name):
+    """Тест: SQL-агрегация даёт тот же отчёт, что и разбор в Python."""
+    report = REPORTS_REGISTRY[report_name]()
+    store.sync(csv_files)
+
+    from_sql = report.build(store.aggregate(report.create_aggregator(), csv_files))
+    from_csv = report.build(aggregate_products(csv_files, report.create_aggregator()))
+
+    assert rounded(from_sql) == rounded(from_csv)
+
+
+def test_sync_skips_unchanged_files(store, csv_files):
+    """Тест: неизменённые файлы не разбираются повторно."""
+    assert store.sync(csv_files) == 2
+    assert store.sync(csv_files) == 0
+
+
+def test_sync_reloads_changed_file(store, csv_files):
+    """Тест: изменённый файл перезагружается без дублирования строк."""
+    store.sync(csv_files)
+    with open(csv_files[1], "a", encoding="utf-8") as file:
+        file.write("galaxy a54,samsung,349,4.2\n")
+    os.utime(csv_files[1], ns=(1, 1))
+
+    assert store.sync(csv_files) == 1
+
+    aggregator = store.aggregate(
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")]), csv_files
+    )
+    assert dict(aggregator.rows()) == {"apple": 3, "samsung": 2, "xiaomi": 1}
+    assert aggregator.rows_seen == 6
+
+
+def test_aggregate_limited_to_files(store, csv_files):
+    """Тест: запрос учитывает только переданные файлы."""
+    store.sync(csv_files)
+
+    aggregator = store.aggregate(
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")]), csv_files[1:]
+    )
+
+    assert aggregator.rows() == [("apple", 1)]
+
+
+def test_unreadable_file_rolled_back(store, tmp_path):
+    """Тест: файл без заголовков не оставляет следов в базе."""
+    empty = tmp_path / "empty.csv"
+    empty.write_text("", encoding="utf-8")
+
+    assert store.sync([str(empty)]) == 0
+    assert store.sync([str(empty)]) == 0
+
+    aggregator = store.aggregate(
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")])
+    )
+    assert aggregator.rows_seen == 0
+
+
+def test_missing_file_removed_from_results(store, csv_files):
+    """Тест: строки удалённого файла не попадают в отчёт."""
+    store.sync(csv_files)
+    os.remove(csv_files[1])
+
+    assert store.sync(csv_files) == 0
+
+    aggregator = store.aggregate(
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")]), csv_files
+    )
+    assert dict(aggregator.rows()) == {"apple": 2, "samsung": 1, "xiaomi": 1}
+
+
+def test_file_became_unreadable_removed_from_results(store, csv_files):
+    """Тест: если файл больше не читается, его старые строки удаляются."""
+    store.sync(csv_files)
+    with open(csv_files[1], "w", encoding="utf-8") as file:
+        file.write("")
+
+    store.sync(csv_files)
+
+    aggregator = store.aggregate(
+        GroupByAggregator(["brand"], [Aggregate("rating", "count")]), csv_files
+    )
+    assert aggregator.rows_seen == 4
+
+
+def test_unknown_column_rejected(store):
+    """Тест: колонки вне таблицы не подставляются в SQL."""
+    aggregator = GroupByAggregator(["brand; DROP TABLE products"], [])
+
+    with pytest.raises(ValueError, match="недоступна"):
+        store.aggregate(aggregator)
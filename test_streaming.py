@@ -0,0 +1,179 @@
+"""Тесты для чтения из stdin и именованных каналов."""
+
+# pylint: disable=redefined-outer-name
+
+import gzip
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.loader import aggregate_products, is_stream_input
+from data.sqlite_store import ProductStore
+from reports.cache import ReportCache
+from reports.session import ReportSession
+
+CSV_CONTENT = (
+    "name,brand,price,rating\n"
+    "iphone 15 pro,apple,999,4.9\n"
+    "galaxy s23 ultra,samsung,1199,4.8\n"
+    "redmi 10c,xiaomi,149,4.1\n"
+)
+
+requires_fifo = pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="нужен os.mkfifo")
+
+
+@pytest.fixture
+def fifo(tmp_path):
+    """Fixture: именованный канал и функция, пишущая в него в фоне.
+
+    Несколько кусков пишутся отдельными записями с паузой между ними.
+    """
+    path = str(tmp_path / "feed")
+    os.mkfifo(path)
+
+    writers = []
+
+    def feed(*chunks: bytes) -> None:
+        def write():
+            with open(path, "wb", buffering=0) as pipe:
+                for index, chunk in enumerate(chunks):
+                    if index:
+                        time.sleep(0.05)
+                    pipe.write(chunk)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writers.append(writer)
+
+    yield path, feed
+
+    for writer in writers:
+        writer.join(timeout=5)
+
+
+def _aggregator():
+    return GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+
+
+@requires_fifo
+def test_is_stream_input(fifo, tmp_path):
+    """Тест: stdin и каналы — потоковые входы, обычные файлы — нет."""
+    regular = tmp_path / "regular.csv"
+    regular.write_text(CSV_CONTENT, encoding="utf-8")
+
+    assert is_stream_input("-")
+    assert is_stream_input(fifo[0])
+    assert not is_stream_input(str(regular))
+    assert not is_stream_input(str(tmp_path / "missing.csv"))
+
+
+@requires_fifo
+@pytest.mark.parametrize("compress", [False, True])
+def test_aggregate_from_fifo(fifo, compress):
+    """Тест: канал (в том числе со сжатыми данными) читается как файл."""
+    path, feed = fifo
+    data = CSV_CONTENT.encode("utf-8")
+    feed(gzip.compress(data) if compress else data)
+
+    aggregator = aggregate_products([path], _aggregator())
+
+    assert sorted(aggregator.rows()) == [("apple", 4.9), ("samsung", 4.8), ("xiaomi", 4.1)]
+
+
+@requires_fifo
+def test_compression_detected_on_short_first_write(fifo):
+    """Тест: сигнатура сжатия, пришедшая по частям, распознаётся."""
+    path, feed = fifo
+    data = gzip.compress(CSV_CONTENT.encode("utf-8"))
+    feed(data[:1], data[1:])
+
+    aggregator = aggregate_products([path], _aggregator())
+
+    assert sorted(aggregator.rows()) == [("apple", 4.9), ("samsung", 4.8), ("xiaomi", 4.1)]
+
+
+@requires_fifo
+def test_parallel_load_reads_fifo_in_main_process(fifo, tmp_path):
+    """Тест: при workers > 1 канал читается, пока процессы разбирают файлы."""
+    path, feed = fifo
+    regular = tmp_path / "regular.csv"
+    regular.write_text("name,brand,price,rating\nlite,apple,100,4.1\n", encoding="utf-8")
+    feed(CSV_CONTENT.encode("utf-8"))
+
+    aggregator = aggregate_products([str(regular), path, str(regular)], _aggregator(), workers=2)
+
+    assert aggregator.rows_seen == 5
+    assert dict(aggregator.rows())["apple"] == pytest.approx((4.9 + 4.1 + 4.1) / 3)
+
+
+@requires_fifo
+def test_session_reads_stream_once(fifo):
+    """Тест: повторная загрузка потока даёт ошибку, кэш не используется."""
+    path, feed = fifo
+    feed(CSV_CONTENT.encode("utf-8"))
+    cache = ReportCache()
+
+    with ReportSession([path], cache=cache) as session:
+        session.prepare("average-rating", "average-price")
+        assert len(session.run("average-rating").rows) == 3
+        assert len(session.run("average-price").rows) == 3
+
+        with pytest.raises(ValueError):
+            session.run("product-rating")
+
+    assert cache.stats()["entries"] == 0
+
+
+@requires_fifo
+def test_store_reloads_fifo(fifo):
+    """Тест: канал перезагружается в базу при каждой синхронизации."""
+    path, feed = fifo
+    with ProductStore() as store:
+        feed(CSV_CONTENT.encode("utf-8"))
+        assert store.sync([path]) == 1
+        feed("name,brand,price,rating\nlite,apple,100,4.0\n".encode("utf-8"))
+        assert store.sync([path]) == 1
+
+        assert store.aggregate(_aggregator(), [path]).rows() == [("apple", 4.0)]
+
+
+def test_script_reads_stdin():
+    """Тест: --files - читает CSV (в том числе сжатый) из stdin."""
+    result = subprocess.run(
+        [sys.executable, "script.py", "--files", "-", "--report", "average-rating"],
+        input=gzip.compress(CSV_CONTENT.encode("utf-8")),
+        capture_output=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+    output = result.stdout.decode("utf-8")
+
+    assert "apple" in output
+    assert "4.9" in output
+
+
+def test_script_quiet_on_closed_stdout(tmp_path):
+    """Тест: закрытый читатель вывода (| head) не даёт traceback."""
+    filepath = tmp_path / "products.csv"
+    filepath.write_text(CSV_CONTENT, encoding="utf-8")
+    read_end, write_end = os.pipe()
+    os.close(read_end)
+
+    try:
+        result = subprocess.run(
+            [sys.executable, "script.py", "--files", str(filepath), "--report", "average-rating"],
+            stdout=write_end,
+            stderr=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=False,
+        )
+    finally:
+        os.close(write_end)
+
+    assert result.returncode == 1
+    assert result.stderr == b""
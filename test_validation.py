@@ -0,0 +1,96 @@
+"""Тесты для проверки строк перед агрегацией."""
+
+# pylint: disable=redefined-outer-name
+
+import math
+
+import pytest
+
+from data.aggregation import Aggregate, GroupByAggregator
+from data.loader import aggregate_products
+from data.validation import RowValidator
+from reports.average_rating import AverageRatingReport
+
+PRICES = [100.0, 100.0, -5.0, 10.0, math.inf, 10.0, 10.0]
+RATINGS = [4.5, math.nan, 4.0, 7.0, 3.0, 3.0, -math.inf]
+
+EXPECTED_REJECTED = {
+    "rating_not_finite": 2,
+    "rating_out_of_range": 1,
+    "price_not_finite": 1,
+    "negative_price": 1,
+}
+
+
+@pytest.fixture
+def bad_csv_files(tmp_path):
+    """Fixture: два CSV файла с некорректными строками."""
+    files = []
+    for index in range(2):
+        filepath = tmp_path / f"bad{index}.csv"
+        filepath.write_text(
+            "name,brand,price,rating\n"
+            "a,apple,100,4.5\n"
+            "b,apple,100,nan\n"
+            "c,samsung,-5,4\n"
+            "d,samsung,10,7\n"
+            "e,samsung,10,3\n",
+            encoding="utf-8",
+        )
+        files.append(str(filepath))
+    return files
+
+
+def test_rejected_rows_counted_per_rule():
+    """Тест: отклонённые строки считаются по первому нарушенному правилу."""
+    validator = RowValidator(use_numpy=False)
+
+    rejected = validator.validate(PRICES, RATINGS)
+
+    assert rejected == [1, 2, 3, 4, 6]
+    assert validator.rejected == EXPECTED_REJECTED
+    assert validator.total_rejected == 5
+
+
+def test_clean_batch_passes():
+    """Тест: чистая пачка не даёт отклонённых строк."""
+    validator = RowValidator(use_numpy=False)
+
+    assert validator.validate([1.0, 999.0], [0.0, 5.0]) == []
+    assert validator.total_rejected == 0
+
+
+def test_numpy_matches_python():
+    """Тест: векторизованная проверка совпадает с построчной."""
+    pytest.importorskip("numpy")
+    vectorized = RowValidator(use_numpy=True)
+    plain = RowValidator(use_numpy=False)
+
+    assert vectorized.validate(PRICES, RATINGS) == plain.validate(PRICES, RATINGS)
+    assert vectorized.rejected == plain.rejected
+
+
+def test_bounds_shared_with_report():
+    """Тест: границы рейтинга совпадают с AverageRatingReport.is_valid_rating."""
+    report = AverageRatingReport()
+    validator = RowValidator(use_numpy=False)
+
+    for rating in (-0.1, 0.0, 4.5, 5.0, 5.1):
+        accepted = not validator.validate([1.0], [rating])
+        assert accepted is report.is_valid_rating(rating)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_loader_drops_invalid_rows(bad_csv_files, workers):
+    """Тест: загрузчик не учитывает отклонённые строки и суммирует счётчики."""
+    validator = RowValidator(use_numpy=False)
+    aggregator = GroupByAggregator(["brand"], [Aggregate("rating", "mean")])
+
+    aggregate_products(bad_csv_files, aggregator, workers=workers, validator=validator)
+
+    assert sorted(aggregator.rows()) == [("apple", 4.5), ("samsung", 3.0)]
+    assert validator.rejected == {
+        "rating_not_finite": 2,
+        "negative_price": 2,
+        "rating_out_of_range": 2,
+    }